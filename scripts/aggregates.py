@@ -0,0 +1,193 @@
+"""
+Pre-aggregated summary tables for the dashboard and analysis queries.
+
+The tables are rebuilt by the load step (inside its transaction) so readers
+get small indexed tables instead of grouping the full player_stats table:
+
+- agg_player_season: one row per player and season
+- agg_player_career: one row per player (career totals)
+- agg_season: one row per season (season totals)
+- agg_overview: one row (player and season counts) for the dashboard sidebar
+- agg_player_metrics: one row per player (career rates)
+- agg_player_season_metrics: one row per player season (rolling and
+  year-over-year metrics)
+
+Stat columns are NULL-filled with 0 the same way the dashboard fills them.
+Averages are ratios of totals (runs / dismissals), not means of season
+averages; the two metric tables come from transform.compute_player_metrics.
+
+numpy, pandas and transform are imported by the build functions only: the
+dashboard imports this module for aggregates_available() on startup.
+"""
+
+# Besides transform.METRIC_COMPONENTS
+REQUIRED_COLUMNS = {
+    "Player_Name", "Year", "Centuries", "Half_Centuries",
+    "Batting_Average", "Bowling_Average",
+}
+
+AGGREGATE_TABLES = {
+    "agg_player_season": """
+        SELECT Player_Name, Year,
+               IFNULL(Runs_Scored, 0) AS Runs_Scored,
+               IFNULL(Centuries, 0) AS Centuries,
+               IFNULL(Half_Centuries, 0) AS Half_Centuries,
+               IFNULL(Wickets_Taken, 0) AS Wickets_Taken,
+               IFNULL(Batting_Average, 0) AS Batting_Average,
+               IFNULL(Bowling_Average, 0) AS Bowling_Average,
+               IFNULL(Dismissals, 0) AS Dismissals,
+               IFNULL(Runs_Conceded, 0) AS Runs_Conceded
+        FROM "{source}"
+    """,
+    "agg_player_career": """
+        SELECT Player_Name,
+               IFNULL(SUM(Runs_Scored), 0) AS Total_Runs,
+               IFNULL(SUM(Centuries), 0) AS Total_Centuries,
+               IFNULL(SUM(Half_Centuries), 0) AS Total_Half_Centuries,
+               IFNULL(SUM(Wickets_Taken), 0) AS Total_Wickets,
+               COUNT(*) AS Seasons_Played,
+               COUNT(Runs_Scored) AS Batting_Seasons,
+               COUNT(Wickets_Taken) AS Bowling_Seasons
+        FROM "{source}"
+        GROUP BY Player_Name
+    """,
+    "agg_season": """
+        SELECT IFNULL(Year, 0) AS Year,
+               IFNULL(SUM(Runs_Scored), 0) AS Runs_Scored,
+               IFNULL(SUM(Wickets_Taken), 0) AS Wickets_Taken,
+               IFNULL(1.0 * SUM(Runs_Scored) / NULLIF(SUM(Dismissals), 0), 0) AS Batting_Average,
+               IFNULL(1.0 * SUM(Runs_Conceded) / NULLIF(SUM(Wickets_Taken), 0), 0) AS Bowling_Average,
+               COUNT(DISTINCT Player_Name) AS Players
+        FROM "{source}"
+        GROUP BY IFNULL(Year, 0)
+    """,
+    "agg_overview": """
+        SELECT COUNT(DISTINCT Player_Name) AS Players,
+               COUNT(DISTINCT Year) AS Seasons,
+               MIN(Year) AS First_Year,
+               MAX(Year) AS Last_Year
+        FROM "{source}"
+        WHERE Year > 0
+    """,
+}
+
+AGGREGATE_INDEXES = [
+    "CREATE INDEX ix_agg_player_season_year ON agg_player_season (Year, Player_Name)",
+    "CREATE INDEX ix_agg_player_season_player ON agg_player_season (Player_Name, Year)",
+    "CREATE UNIQUE INDEX ix_agg_player_career_player ON agg_player_career (Player_Name)",
+    "CREATE INDEX ix_agg_player_career_runs ON agg_player_career (Total_Runs DESC)",
+    "CREATE INDEX ix_agg_player_career_wickets ON agg_player_career (Total_Wickets DESC)",
+    "CREATE UNIQUE INDEX ix_agg_season_year ON agg_season (Year)",
+]
+
+# Built from transform.compute_player_metrics rather than SQL
+METRIC_TABLES = ["agg_player_metrics", "agg_player_season_metrics"]
+
+METRIC_INDEXES = [
+    "CREATE UNIQUE INDEX ix_agg_player_metrics_player ON agg_player_metrics (Player_Name)",
+    "CREATE UNIQUE INDEX ix_agg_player_season_metrics_player "
+    "ON agg_player_season_metrics (Player_Name, Year)",
+]
+
+# Season rows per batch read by build_metric_tables
+METRICS_BATCH_ROWS = 100_000
+
+
+def _insert_frame(conn, df, name, create):
+    import pandas as pd
+
+    if create:
+        conn.execute(pd.io.sql.get_schema(df, name, con=conn))
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    # Column-wise tolist() gives Python scalars; SQLite stores NaN as NULL
+    rows = zip(*(df[col].tolist() for col in df.columns))
+    conn.executemany(f'INSERT INTO "{name}" ({columns}) VALUES ({placeholders})', rows)
+
+
+def _seasons_frame(rows):
+    """Season rows (Player_Name, Year, *METRIC_COMPONENTS tuples) as a frame"""
+    import numpy as np
+    import pandas as pd
+    from transform import METRIC_COMPONENTS
+
+    # Column arrays straight from the tuples: read_sql_query would infer
+    # every column's type from the Python objects first
+    columns = list(zip(*rows)) or [()] * (2 + len(METRIC_COMPONENTS))
+    seasons = pd.DataFrame({"Player_Name": np.array(columns[0], dtype=object)})
+    for col, values in zip(["Year"] + METRIC_COMPONENTS, columns[1:]):
+        seasons[col] = np.fromiter(values, dtype=np.int64, count=len(rows))
+    return seasons
+
+
+def build_metric_tables(conn, source_table="player_stats", batch_rows=METRICS_BATCH_ROWS):
+    """
+    Computes career and rolling metrics over every season in source_table
+    and stores them in agg_player_metrics and agg_player_season_metrics.
+    Seasons are read in player order, in batches that never split a player.
+    """
+    from transform import METRIC_COMPONENTS, compute_player_metrics
+
+    # Dropped before the read starts: SQLite can't drop a table while a
+    # statement on the connection is still reading
+    for name in METRIC_TABLES:
+        conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+    components = ", ".join(f'IFNULL("{col}", 0)' for col in METRIC_COMPONENTS)
+    cursor = conn.execute(
+        f'SELECT Player_Name, Year, {components} FROM "{source_table}" '
+        "WHERE Year IS NOT NULL ORDER BY Player_Name, Year"
+    )
+    first, held = True, []
+    while True:
+        rows = cursor.fetchmany(batch_rows)
+        done = not rows
+        rows = held + rows
+        held = []
+        if not done and rows:
+            # The last player's seasons may continue in the next batch
+            cut = len(rows)
+            while cut > 0 and rows[cut - 1][0] == rows[-1][0]:
+                cut -= 1
+            rows, held = rows[:cut], rows[cut:]
+        if rows or (done and first):
+            career, season_metrics = compute_player_metrics(_seasons_frame(rows))
+            season_metrics["Year"] = season_metrics["Year"].astype("int64")
+            _insert_frame(conn, career, "agg_player_metrics", create=first)
+            _insert_frame(conn, season_metrics, "agg_player_season_metrics", create=first)
+            first = False
+        if done:
+            break
+    for ddl in METRIC_INDEXES:
+        conn.execute(ddl)
+
+
+def build_aggregate_tables(conn, source_table="player_stats"):
+    """
+    (Re)builds the aggregate tables from source_table.
+    Runs on the caller's connection so it can share the load transaction.
+    Returns False (and builds nothing) if source_table lacks the stat columns.
+    """
+    from transform import METRIC_COMPONENTS
+
+    columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{source_table}")')}
+    if not REQUIRED_COLUMNS | set(METRIC_COMPONENTS) <= columns:
+        return False
+
+    for name, select in AGGREGATE_TABLES.items():
+        conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+        conn.execute(f'CREATE TABLE "{name}" AS {select.format(source=source_table)}')
+    for ddl in AGGREGATE_INDEXES:
+        conn.execute(ddl)
+    build_metric_tables(conn, source_table)
+    return True
+
+
+def aggregates_available(conn):
+    """True if the aggregate tables have been built"""
+    tables = list(AGGREGATE_TABLES) + METRIC_TABLES
+    placeholders = ", ".join("?" for _ in tables)
+    rows = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})",
+        tables,
+    ).fetchone()
+    return rows[0] == len(tables)
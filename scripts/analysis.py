@@ -1,55 +1,203 @@
-import sqlite3
+import os
+import sys
 import pandas as pd
 
-def connect_to_db(db_path="data/ipl_stats.db"):
-    """Connect to the SQLite database"""
-    return sqlite3.connect(db_path)
-
-def get_top_run_scorers(limit=10):
-    """Get top run scorers from the database"""
-    conn = connect_to_db()
-    query = """
-    SELECT Player_Name, SUM(Runs_Scored) as Total_Runs,
-           COUNT(*) as Seasons_Played,
-           AVG(Batting_Average) as Avg_Batting_Avg
-    FROM player_stats
-    WHERE Runs_Scored IS NOT NULL
-    GROUP BY Player_Name
-    ORDER BY Total_Runs DESC
-    LIMIT ?
+sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
+
+from aggregates import aggregates_available
+from db import DEFAULT_DB_PATH, connect, get_pool
+import leaderboard
+from players import resolve_player, search_index_available, search_pattern
+from query_cache import QueryCache
+
+# Queries are module-level so scripts/check_query_plans.py can EXPLAIN them
+# Career averages are precomputed ratios of totals (agg_player_metrics)
+TOP_RUN_SCORERS_QUERY = """
+SELECT c.Player_Name, c.Total_Runs, c.Batting_Seasons as Seasons_Played,
+       m.Batting_Average, m.Strike_Rate
+FROM agg_player_career c
+LEFT JOIN agg_player_metrics m ON m.Player_Name = c.Player_Name
+WHERE c.Batting_Seasons > 0
+ORDER BY c.Total_Runs DESC
+LIMIT ? OFFSET ?
+"""
+
+TOP_WICKET_TAKERS_QUERY = """
+SELECT c.Player_Name, c.Total_Wickets, c.Bowling_Seasons as Seasons_Played,
+       m.Bowling_Average, m.Economy_Rate
+FROM agg_player_career c
+LEFT JOIN agg_player_metrics m ON m.Player_Name = c.Player_Name
+WHERE c.Bowling_Seasons > 0
+ORDER BY c.Total_Wickets DESC
+LIMIT ? OFFSET ?
+"""
+
+PLAYER_STATS_QUERY = """
+SELECT * FROM player_stats
+WHERE Player_Name IN (
+    SELECT Player_Name FROM player_name_fts WHERE name_key LIKE ?
+)
+ORDER BY Year DESC
+"""
+
+PLAYER_SEASONS_QUERY = """
+SELECT * FROM player_stats
+WHERE Player_Name = ?
+ORDER BY Year DESC
+"""
+
+# Fallbacks for databases built before the aggregate tables / search index existed
+RAW_TOP_RUN_SCORERS_QUERY = """
+SELECT Player_Name, SUM(Runs_Scored) as Total_Runs,
+       COUNT(*) as Seasons_Played,
+       1.0 * SUM(Runs_Scored) / NULLIF(SUM(Dismissals), 0) as Batting_Average,
+       100.0 * SUM(Runs_Scored) / NULLIF(SUM(Balls_Faced), 0) as Strike_Rate
+FROM player_stats
+WHERE Runs_Scored IS NOT NULL
+GROUP BY Player_Name
+ORDER BY Total_Runs DESC
+LIMIT ? OFFSET ?
+"""
+
+RAW_TOP_WICKET_TAKERS_QUERY = """
+SELECT Player_Name, SUM(Wickets_Taken) as Total_Wickets,
+       COUNT(*) as Seasons_Played,
+       1.0 * SUM(Runs_Conceded) / NULLIF(SUM(Wickets_Taken), 0) as Bowling_Average,
+       6.0 * SUM(Runs_Conceded) / NULLIF(SUM(Balls_Bowled), 0) as Economy_Rate
+FROM player_stats
+WHERE Wickets_Taken IS NOT NULL
+GROUP BY Player_Name
+ORDER BY Total_Wickets DESC
+LIMIT ? OFFSET ?
+"""
+
+# Leaderboards over selected seasons ({years} is one placeholder per season)
+SEASONS_TOP_RUN_SCORERS_QUERY = """
+SELECT Player_Name, SUM(Runs_Scored) as Total_Runs,
+       COUNT(*) as Seasons_Played,
+       1.0 * SUM(Runs_Scored) / NULLIF(SUM(Dismissals), 0) as Batting_Average,
+       100.0 * SUM(Runs_Scored) / NULLIF(SUM(Balls_Faced), 0) as Strike_Rate
+FROM player_stats
+WHERE Runs_Scored IS NOT NULL AND Year IN ({years})
+GROUP BY Player_Name
+ORDER BY Total_Runs DESC
+LIMIT ? OFFSET ?
+"""
+
+SEASONS_TOP_WICKET_TAKERS_QUERY = """
+SELECT Player_Name, SUM(Wickets_Taken) as Total_Wickets,
+       COUNT(*) as Seasons_Played,
+       1.0 * SUM(Runs_Conceded) / NULLIF(SUM(Wickets_Taken), 0) as Bowling_Average,
+       6.0 * SUM(Runs_Conceded) / NULLIF(SUM(Balls_Bowled), 0) as Economy_Rate
+FROM player_stats
+WHERE Wickets_Taken IS NOT NULL AND Year IN ({years})
+GROUP BY Player_Name
+ORDER BY Total_Wickets DESC
+LIMIT ? OFFSET ?
+"""
+
+RAW_PLAYER_STATS_QUERY = """
+SELECT * FROM player_stats
+WHERE Player_Name LIKE ?
+ORDER BY Year DESC
+"""
+
+# Every query issued by this module, with example parameters (used by the plan check)
+QUERIES = {
+    "top_run_scorers": (TOP_RUN_SCORERS_QUERY, [10, 0]),
+    "top_wicket_takers": (TOP_WICKET_TAKERS_QUERY, [10, 0]),
+    "seasons_top_run_scorers": (SEASONS_TOP_RUN_SCORERS_QUERY.format(years="?, ?"),
+                                [2023, 2024, 10, 0]),
+    "seasons_top_wicket_takers": (SEASONS_TOP_WICKET_TAKERS_QUERY.format(years="?, ?"),
+                                  [2023, 2024, 10, 0]),
+    "player_stats": (PLAYER_STATS_QUERY, ["%virat kohli%"]),
+    "player_seasons": (PLAYER_SEASONS_QUERY, ["Virat Kohli"]),
+    "raw_top_run_scorers": (RAW_TOP_RUN_SCORERS_QUERY, [10, 0]),
+    "raw_top_wicket_takers": (RAW_TOP_WICKET_TAKERS_QUERY, [10, 0]),
+    "raw_player_stats": (RAW_PLAYER_STATS_QUERY, ["%Virat Kohli%"]),
+}
+
+# Results of the get_* functions, per data version (see query_cache.py).
+# Set result_cache.disk_dir to also keep them on disk.
+result_cache = QueryCache()
+
+def query_cache_stats():
+    """Hit/miss counters of the result cache"""
+    return result_cache.stats()
+
+def connect_to_db(db_path=DEFAULT_DB_PATH):
+    """Connect to the SQLite database (a standalone read-only connection)"""
+    return connect(db_path, readonly=True)
+
+def _read_sql(query, fallback_query, is_available, params):
+    """Runs query on a pooled connection, or fallback_query if is_available(conn) is False"""
+    with get_pool().connection() as conn:
+        if not is_available(conn):
+            query = fallback_query
+        return pd.read_sql_query(query, conn, params=params)
+
+def _seasons_query(query, years, limit, offset):
+    """(sql, params) of a SEASONS_* leaderboard query for the given seasons"""
+    years = [int(year) for year in years]
+    return query.format(years=", ".join("?" for _ in years)), years + [limit, offset]
+
+def _seasons_leaderboard(top, years, limit, offset):
+    """top(conn, ...) from the ranking index, or None if the database has none"""
+    with get_pool().connection() as conn:
+        if leaderboard.leaderboard_available(conn):
+            return top(conn, limit, offset, years)
+    return None
+
+@result_cache.memoize
+def get_top_run_scorers(limit=10, offset=0, years=None):
     """
-    df = pd.read_sql_query(query, conn, params=[limit])
-    conn.close()
-    return df
-
-def get_top_wicket_takers(limit=10):
-    """Get top wicket takers from the database"""
-    conn = connect_to_db()
-    query = """
-    SELECT Player_Name, SUM(Wickets_Taken) as Total_Wickets,
-           COUNT(*) as Seasons_Played,
-           AVG(Bowling_Average) as Avg_Bowling_Avg
-    FROM player_stats
-    WHERE Wickets_Taken IS NOT NULL
-    GROUP BY Player_Name
-    ORDER BY Total_Wickets DESC
-    LIMIT ?
+    Get top run scorers from the database (all-time, or over the given seasons).
+    Season selections are ranked from the leaderboard index when it exists.
+    """
+    if years:
+        ranked = _seasons_leaderboard(leaderboard.top_run_scorers, years, limit, offset)
+        if ranked is not None:
+            return ranked
+        query, params = _seasons_query(SEASONS_TOP_RUN_SCORERS_QUERY, years, limit, offset)
+        return get_pool().read_sql(query, params)
+    return _read_sql(TOP_RUN_SCORERS_QUERY, RAW_TOP_RUN_SCORERS_QUERY,
+                     aggregates_available, [limit, offset])
+
+@result_cache.memoize
+def get_top_wicket_takers(limit=10, offset=0, years=None):
+    """
+    Get top wicket takers from the database (all-time, or over the given seasons).
+    Season selections are ranked from the leaderboard index when it exists.
+    """
+    if years:
+        ranked = _seasons_leaderboard(leaderboard.top_wicket_takers, years, limit, offset)
+        if ranked is not None:
+            return ranked
+        query, params = _seasons_query(SEASONS_TOP_WICKET_TAKERS_QUERY, years, limit, offset)
+        return get_pool().read_sql(query, params)
+    return _read_sql(TOP_WICKET_TAKERS_QUERY, RAW_TOP_WICKET_TAKERS_QUERY,
+                     aggregates_available, [limit, offset])
+
+@result_cache.memoize
+def get_player_stats(player_name, years=None):
     """
-    df = pd.read_sql_query(query, conn, params=[limit])
-    conn.close()
-    return df
-
-def get_player_stats(player_name):
-    """Get detailed stats for a specific player"""
-    conn = connect_to_db()
-    query = """
-    SELECT * FROM player_stats
-    WHERE Player_Name LIKE ?
-    ORDER BY Year DESC
+    Get detailed stats for a specific player (only the given seasons, if any).
+    Matches any spelling or alias ('M.S. Dhoni', 'ms dhoni'); a misspelled
+    name falls back to the closest player.
     """
-    df = pd.read_sql_query(query, conn, params=[f"%{player_name}%"])
-    conn.close()
-    return df
+    with get_pool().connection() as conn:
+        if not search_index_available(conn):
+            stats = pd.read_sql_query(RAW_PLAYER_STATS_QUERY, conn, params=[f"%{player_name}%"])
+        else:
+            # The trigram FTS index answers the substring match without scanning player_stats
+            stats = pd.read_sql_query(PLAYER_STATS_QUERY, conn, params=[search_pattern(player_name)])
+            if stats.empty:
+                closest = resolve_player(conn, player_name)
+                if closest is not None:
+                    stats = pd.read_sql_query(PLAYER_SEASONS_QUERY, conn, params=[closest])
+    if years:
+        stats = stats[stats["Year"].isin([int(year) for year in years])].reset_index(drop=True)
+    return stats
 
 def run_basic_analysis():
     """Run basic analysis and print results"""
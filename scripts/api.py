@@ -0,0 +1,276 @@
+"""
+Read-only JSON HTTP API over analysis.py, for services that need the
+leaderboards and player lookups without scraping the dashboard.
+
+Endpoints (GET):
+- /health                  data version, response- and query-cache counters
+- /top-run-scorers         ?limit=10&offset=0&years=2023,2024
+- /top-wicket-takers       same parameters
+- /players?q=koh           player names for a partial name (autocomplete)
+- /players/<name>          season rows of one player (?years=, limit, offset)
+
+Every response carries an ETag built from the data stamp (data version
+plus content hash, so a rebuilt database that starts again at version 1
+doesn't match) and the normalized request, so a client sending it back in If-None-Match gets a
+304 until the next load changes the data. Response bodies are kept in an
+in-process LRU keyed on (data stamp, endpoint, parameters); a reload
+makes the old entries unreachable and they age out. Behind it, the
+analysis.py results are memoized too (query_cache.py), which also serves
+every page of a player's seasons from one query.
+
+Standard library only: ThreadingHTTPServer runs each request on its own
+thread, with connections borrowed from the shared read pool (db.get_pool).
+
+Usage:
+    python scripts/api.py [--host 127.0.0.1] [--port 8502] [--verbose]
+                          [--query-cache-dir [data/query_cache]]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
+
+import analysis
+from db import get_pool
+from load import HASH_COLUMN
+from lru import LRUCache
+from metadata import data_stamp
+from players import autocomplete, search_index_available
+from query_cache import DEFAULT_DISK_DIR
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+# Hot responses kept in memory (bodies are a few KB each)
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+response_cache = LRUCache(max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES)
+
+
+class ApiError(Exception):
+    """A request the API answers with an error status and message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(params, name, default, minimum, maximum=None):
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        bounds = f"{minimum}..{maximum}" if maximum is not None else f">= {minimum}"
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be {bounds}")
+    return value
+
+
+def parse_params(query):
+    """
+    Normalized (limit, offset, years, q) from a query string; years may be
+    comma-separated and/or repeated ('years=2023,2024' or 'years=2023&years=2024')
+    """
+    params = parse_qs(query)
+    limit = _int_param(params, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+    offset = _int_param(params, "offset", 0, 0)
+    years = set()
+    for value in params.get("years", []):
+        for year in value.split(","):
+            if year.strip():
+                try:
+                    years.add(int(year))
+                except ValueError:
+                    raise ApiError(HTTPStatus.BAD_REQUEST, f"invalid year '{year}'")
+    q = params.get("q", [""])[-1].strip()
+    return limit, offset, tuple(sorted(years)), q
+
+
+def _records(df):
+    """DataFrame -> list of JSON-ready row dicts (NaN becomes null)"""
+    return json.loads(df.to_json(orient="records"))
+
+
+def top_run_scorers(limit, offset, years, q):
+    return _records(analysis.get_top_run_scorers(limit, offset, years))
+
+
+def top_wicket_takers(limit, offset, years, q):
+    return _records(analysis.get_top_wicket_takers(limit, offset, years))
+
+
+def search_players(limit, offset, years, q):
+    if not q:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "'q' is required")
+    with get_pool().connection() as conn:
+        if not search_index_available(conn):
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, "player search index not built yet")
+        names = autocomplete(conn, q, limit=limit + offset)
+    return names[offset:]
+
+
+def player_stats(name, limit, offset, years):
+    stats = analysis.get_player_stats(name, years)
+    if stats.empty:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"no player matching '{name}'")
+    # The row hash is the loader's change detection, not a stat
+    stats = stats.drop(columns=[HASH_COLUMN], errors="ignore")
+    return _records(stats.iloc[offset:offset + limit])
+
+
+# Path -> handler(limit, offset, years, q) returning the response's results
+ROUTES = {
+    "/top-run-scorers": top_run_scorers,
+    "/top-wicket-takers": top_wicket_takers,
+    "/players": search_players,
+}
+PLAYER_PREFIX = "/players/"
+
+
+def make_etag(stamp, request_key):
+    digest = hashlib.sha1(repr(request_key).encode()).hexdigest()[:16]
+    return f'"{stamp}-{digest}"'
+
+
+def build_body(data_version, request_key):
+    """JSON body for a normalized request (raises ApiError)"""
+    path, (limit, offset, years, q) = request_key
+    if path.startswith(PLAYER_PREFIX):
+        name = path[len(PLAYER_PREFIX):]
+        results = player_stats(name, limit, offset, years)
+    else:
+        results = ROUTES[path](limit, offset, years, q)
+    body = {
+        "data_version": data_version,
+        "limit": limit,
+        "offset": offset,
+        "years": list(years),
+        "results": results,
+    }
+    return json.dumps(body).encode()
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "IPLStatsAPI/1.0"
+    # Keep-alive: clients reuse one connection for many requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle's algorithm the
+    # body waits for the client's delayed ACK (~40 ms per keep-alive request)
+    disable_nagle_algorithm = True
+    verbose = False
+
+    def do_GET(self):
+        try:
+            self._get()
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception as e:  # never drop the connection without an answer
+            self.log_error("%s", e)
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"})
+
+    def _get(self):
+        url = urlsplit(self.path)
+        path = unquote(url.path).rstrip("/") or "/"
+        with get_pool().connection() as conn:
+            stamp = data_stamp(conn)
+        data_version = int(stamp.split(".")[0])
+
+        if path == "/health":
+            self._send_json(HTTPStatus.OK, {
+                "status": "ok",
+                "data_version": data_version,
+                "cache": {"entries": len(response_cache), "bytes": response_cache.size_bytes,
+                          "hits": response_cache.hits, "misses": response_cache.misses},
+                "query_cache": analysis.query_cache_stats(),
+            })
+            return
+        if path not in ROUTES and not (path.startswith(PLAYER_PREFIX) and len(path) > len(PLAYER_PREFIX)):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"unknown endpoint '{path}'")
+
+        request_key = (path, parse_params(url.query))
+        etag = make_etag(stamp, request_key)
+        # The ETag is known before any query runs: a revalidation costs one lookup
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            self._send(HTTPStatus.NOT_MODIFIED, b"", etag)
+            return
+
+        cache_key = (stamp, request_key)
+        body = response_cache.get(cache_key)
+        cache_status = "hit"
+        if body is None:
+            body = build_body(data_version, request_key)
+            response_cache.put(cache_key, body)
+            cache_status = "miss"
+        self._send(HTTPStatus.OK, body, etag, {"X-Cache": cache_status})
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode())
+
+    def _send(self, status, body, etag=None, headers=None):
+        self.send_response(status)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            # Clients may store responses but must revalidate them
+            self.send_header("Cache-Control", "no-cache")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    """A ThreadingHTTPServer serving the API (port 0 picks a free port)"""
+    handler = type("Handler", (ApiHandler,), {"verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the IPL analysis queries as a JSON API")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--query-cache-dir", nargs="?", const=DEFAULT_DISK_DIR, default=None,
+                        help="also keep analysis results on disk, shared across restarts "
+                             f"(default directory: {DEFAULT_DISK_DIR})")
+    args = parser.parse_args()
+
+    analysis.result_cache.disk_dir = args.query_cache_dir
+
+    server = make_server(args.host, args.port, args.verbose)
+    host, port = server.server_address[:2]
+    print(f"🌐 IPL stats API on http://{host}:{port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("👋 API stopped")
+
+
+if __name__ == "__main__":
+    main()
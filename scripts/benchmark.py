@@ -0,0 +1,244 @@
+"""
+Benchmark suite on synthetic IPL data at scale tiers (10k, 1m rows).
+
+Times, per tier:
+- extract_data, transform_data and validate_frame
+- load_data_to_db: a full replace and an incremental upsert of unchanged data
+- every query in analysis.QUERIES
+- the dashboard's aggregation paths in queries.py (default view and a
+  player search)
+- leaderboards over the default seasons from the ranking index
+  (leaderboard.py), next to the SQL regroup they replace
+
+Each metric is the median of --repeat runs. Results are compared with a
+stored baseline; a metric more than --tolerance times (and NOISE_FLOOR_S)
+slower than its baseline fails the run (exit code 1).
+Synthetic CSVs are generated once per tier and cached in data/bench/.
+
+Usage:
+    python scripts/benchmark.py [--tiers 10k,1m] [--repeat 5]
+                                [--save-baseline] [--tolerance 1.5]
+"""
+
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
+
+import analysis
+import leaderboard
+import queries
+from db import connect
+from extract import extract_data
+from figure_cache import default_years
+from load import load_data_to_db
+from synthetic_data import write_synthetic_csv
+from transform import transform_data
+from validate import validate_frame
+
+TIERS = {"10k": 10_000, "1m": 1_000_000}
+BENCH_DIR = "data/bench"
+BASELINE_PATH = "data/benchmark_baseline.json"
+SEED = 0
+
+# A metric fails when it is this many times slower than its baseline...
+DEFAULT_TOLERANCE = 1.5
+# ...and slower by more than this, so scheduler jitter on millisecond
+# queries can't fail a run
+NOISE_FLOOR_S = 0.010
+DEFAULT_REPEAT = 5
+
+PLAYER_SEARCH = "kohli"
+
+
+def tier_csv(tier):
+    """Path of the tier's synthetic CSV, generated on first use"""
+    path = os.path.join(BENCH_DIR, f"synthetic_{tier}_seed{SEED}.csv")
+    if not os.path.exists(path):
+        print(f"   generating {TIERS[tier]:,} synthetic rows -> {path}")
+        write_synthetic_csv(path, TIERS[tier], seed=SEED)
+    return path
+
+
+def median_of(repeat, fn, setup=None):
+    """
+    Median wall time of `repeat` calls of fn(setup()) (setup is not timed),
+    with the pipeline's progress output silenced. Returns (seconds, result).
+    The median, unlike the best run, doesn't record a lucky low as baseline.
+    """
+    times, result = [], None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn(arg) if setup else fn()
+            times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def benchmark_tier(tier, repeat):
+    """{metric: seconds} for one tier"""
+    csv_path = tier_csv(tier)
+    metrics = {}
+
+    metrics["extract"], df_raw = median_of(repeat, functools.partial(extract_data, csv_path))
+    metrics["transform"], df = median_of(repeat, transform_data, setup=df_raw.copy)
+    del df_raw
+    metrics["validate"], _ = median_of(repeat, validate_frame, setup=df.copy)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        load = functools.partial(load_data_to_db, df, db_path, "player_stats")
+        metrics["load_replace"], _ = median_of(repeat, load)
+        metrics["load_upsert_unchanged"], _ = median_of(
+            repeat, functools.partial(load, mode="upsert"))
+        del df, load
+
+        conn = connect(db_path, readonly=True)
+        try:
+            for name, (sql, params) in analysis.QUERIES.items():
+                metrics[f"analysis.{name}"], _ = median_of(
+                    repeat, functools.partial(pd.read_sql_query, sql, conn, params=params))
+
+            years = default_years(queries.fetch_years(conn))
+            dashboard = {
+                "fetch_years": lambda search: queries.fetch_years(conn),
+                "fetch_summary": lambda search: queries.fetch_summary(conn, years, search),
+                "fetch_player_names": lambda search: queries.fetch_player_names(conn, years, search),
+                "fetch_player_totals": lambda search: queries.fetch_player_totals(conn, years, search),
+                "fetch_season_totals": lambda search: queries.fetch_season_totals(conn, years, search),
+                "fetch_rows": lambda search: queries.fetch_rows(
+                    conn, ["Player_Name", "Year", "Runs_Scored", "Batting_Average",
+                           "Batting_Strike_Rate"],
+                    years, search, extra_where="Runs_Scored > 100"),
+            }
+            for name, fn in dashboard.items():
+                metrics[f"dashboard.{name}"], _ = median_of(repeat, functools.partial(fn, ""))
+                if name != "fetch_years":
+                    metrics[f"dashboard.{name}[search]"], _ = median_of(
+                        repeat, functools.partial(fn, PLAYER_SEARCH))
+
+            seasons_sql, seasons_params = analysis._seasons_query(
+                analysis.SEASONS_TOP_RUN_SCORERS_QUERY, years, 10, 0)
+            ranked = {
+                "top_run_scorers[seasons]": lambda: leaderboard.top_run_scorers(conn, 10, 0, years),
+                "top_run_scorers[seasons,sql]": lambda: pd.read_sql_query(
+                    seasons_sql, conn, params=seasons_params),
+                "top_wicket_takers[seasons]": lambda: leaderboard.top_wicket_takers(
+                    conn, 10, 0, years),
+                "bowling_averages[seasons]": lambda: queries.fetch_leaders(
+                    conn, "Bowling_Average", 15, years, ascending=True,
+                    minimums={"Wickets_Taken": 10}),
+            }
+            for name, fn in ranked.items():
+                metrics[f"leaderboard.{name}"], _ = median_of(repeat, fn)
+        finally:
+            conn.close()
+    return metrics
+
+
+def compare(results, baseline, tolerance):
+    """[(tier, metric, seconds, baseline_seconds)] of regressed metrics"""
+    regressions = []
+    for tier, tier_results in results.items():
+        tier_baseline = baseline.get(tier, {}).get("metrics", {})
+        for metric, seconds in tier_results["metrics"].items():
+            before = tier_baseline.get(metric)
+            if before is None:
+                continue
+            if seconds > before * tolerance and seconds - before > NOISE_FLOOR_S:
+                regressions.append((tier, metric, seconds, before))
+    return regressions
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    baseline = load_baseline(path) or {"tiers": {}}
+    baseline["tiers"].update(results)
+    baseline["recorded_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    baseline["machine"] = f"{platform.platform()}, {platform.processor() or platform.machine()}, " \
+                          f"Python {platform.python_version()}, pandas {pd.__version__}"
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IPL pipeline and queries")
+    parser.add_argument("--tiers", default="10k",
+                        help=f"comma-separated tiers out of {', '.join(TIERS)}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="runs per metric; the median is recorded")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="record these results as the new baseline for the tiers run")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="fail when a metric is this many times slower than the baseline")
+    args = parser.parse_args()
+
+    tiers = [tier.strip() for tier in args.tiers.split(",")]
+    unknown = [tier for tier in tiers if tier not in TIERS]
+    if unknown:
+        parser.error(f"unknown tier(s): {', '.join(unknown)}")
+
+    baseline = load_baseline(args.baseline)
+    baseline_tiers = baseline["tiers"] if baseline else {}
+
+    print("⏱ IPL benchmark suite")
+    print("=" * 50)
+    results = {}
+    for tier in tiers:
+        print(f"\n📏 Tier {tier} ({TIERS[tier]:,} rows)")
+        metrics = benchmark_tier(tier, args.repeat)
+        results[tier] = {"rows": TIERS[tier], "metrics": metrics}
+        before = baseline_tiers.get(tier, {}).get("metrics", {})
+        if baseline and not before and not args.save_baseline:
+            print(f"   ⚠ no baseline for tier {tier}; its metrics are not checked")
+        for metric, seconds in metrics.items():
+            line = f"   {metric:<40} {seconds * 1000:10.1f} ms"
+            if metric in before:
+                line += f"   ({seconds / before[metric]:.2f}x baseline)"
+            print(line)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\n⚠ No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    regressions = compare(results, baseline_tiers, args.tolerance)
+    if regressions:
+        print(f"\n❌ PERFORMANCE REGRESSION: {len(regressions)} metric(s) over "
+              f"{args.tolerance}x baseline (baseline: {baseline.get('machine', 'unknown machine')})")
+        for tier, metric, seconds, before in regressions:
+            print(f"   [{tier}] {metric}: {seconds * 1000:.1f} ms vs {before * 1000:.1f} ms "
+                  f"({seconds / before:.2f}x)")
+        return 1
+
+    print(f"\n✅ No regressions against the baseline (tolerance {args.tolerance}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Before/after benchmark for the extract + transform step.
+
+"before" is the original approach: untyped pd.read_csv, a frame-wide
+replace of 'No stats', then one pd.to_numeric pass per column.
+"after" parses with the declared schema (dtypes, na_values, converters).
+
+Usage:
+    python scripts/benchmark_transform.py [--replicas 100] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
+
+from extract import extract_data
+from transform import transform_data
+
+LEGACY_NUMERIC_COLUMNS = [
+    "Year",
+    "Matches_Batted", "Not_Outs", "Runs_Scored", "Balls_Faced",
+    "Batting_Average", "Batting_Strike_Rate",
+    "Centuries", "Half_Centuries", "Fours", "Sixes",
+    "Matches_Bowled", "Balls_Bowled", "Runs_Conceded",
+    "Wickets_Taken", "Bowling_Average",
+    "Economy_Rate", "Bowling_Strike_Rate",
+    "Four_Wicket_Hauls", "Five_Wicket_Hauls",
+    "Highest_Score"
+]
+
+
+def legacy_extract_transform(csv_path):
+    """The original extract + transform implementation, kept for comparison"""
+    df = pd.read_csv(csv_path)
+    df = df.replace("No stats", pd.NA)
+    df["Highest_Score"] = df["Highest_Score"].astype(str).str.replace("*", "", regex=False)
+    for col in LEGACY_NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["Player_Name"] = df["Player_Name"].str.strip().str.title()
+    return df
+
+
+def schema_extract_transform(csv_path):
+    """The schema-driven extract + transform"""
+    return transform_data(extract_data(csv_path), verbose=False)
+
+
+def make_replica(csv_path, replicas, out_path):
+    """Writes the CSV repeated `replicas` times (header once)"""
+    with open(csv_path, encoding="utf-8") as src:
+        header = src.readline()
+        body = src.read()
+    if not body.endswith("\n"):
+        body += "\n"
+    with open(out_path, "w", encoding="utf-8") as dst:
+        dst.write(header)
+        for _ in range(replicas):
+            dst.write(body)
+
+
+def time_it(fn, csv_path, repeat):
+    """Best wall time of `repeat` runs, plus the resulting frame"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(csv_path)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(csv_path, label, repeat):
+    before, df_before = time_it(legacy_extract_transform, csv_path, repeat)
+    # extract_data prints progress, keep the benchmark output readable
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            after, df_after = time_it(schema_extract_transform, csv_path, repeat)
+        finally:
+            sys.stdout = stdout
+
+    mem_before = df_before.memory_usage(deep=True).sum() / 1024 ** 2
+    mem_after = df_after.memory_usage(deep=True).sum() / 1024 ** 2
+    print(f"\n📏 {label} ({len(df_after):,} rows)")
+    print(f"   before: {before * 1000:9.1f} ms   {mem_before:8.2f} MB")
+    print(f"   after:  {after * 1000:9.1f} ms   {mem_after:8.2f} MB")
+    print(f"   speedup: {before / after:.2f}x, memory: {mem_before / mem_after:.2f}x smaller")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract + transform")
+    parser.add_argument("--csv", default="data/raw/cricket_data_2025.csv")
+    parser.add_argument("--replicas", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("⏱ Extract + transform benchmark")
+    print("=" * 50)
+    benchmark(args.csv, "Bundled CSV", args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        replica_path = os.path.join(tmp, "replica.csv")
+        make_replica(args.csv, args.replicas, replica_path)
+        benchmark(replica_path, f"{args.replicas}x synthetic replica", args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Plotly figure builders for the dashboard, one per chart id.
+
+Each builder queries the data it needs for the given filters and returns a
+Figure, or None when there is nothing to plot. Builders don't depend on
+Streamlit, so the ETL can pre-build (warm) figures right after a load.
+
+Plotly is imported inside the builders: most page loads are served from
+the figure cache, and plotly.express alone takes a large part of a cold
+start to import.
+"""
+
+import queries
+
+CAREER_PREFIX = "career:"
+
+
+def career_chart_id(player_name):
+    """Chart id of a player's career chart"""
+    return f"{CAREER_PREFIX}{player_name}"
+
+
+def runs_top15(conn, years, player_search):
+    import plotly.express as px
+
+    runs_by_player = queries.fetch_leaders(  # Only players with runs
+        conn, 'Runs_Scored', 15, years, player_search, minimums={'Runs_Scored': 1}
+    )
+    if runs_by_player.empty:
+        return None
+
+    fig_runs = px.bar(
+        runs_by_player,
+        x='Runs_Scored',
+        y='Player_Name',
+        orientation='h',
+        title="Top 15 Run Scorers",
+        labels={'Runs_Scored': 'Total Runs', 'Player_Name': 'Player'}
+    )
+    fig_runs.update_layout(height=600)
+    return fig_runs
+
+
+def _centuries_data(conn, years, player_search):
+    player_totals = queries.shared_player_totals(conn, years, player_search)
+    centuries_data = player_totals[['Player_Name', 'Centuries', 'Half_Centuries']]
+    centuries_data = centuries_data[(centuries_data['Centuries'] > 0) | (centuries_data['Half_Centuries'] > 0)]
+    return centuries_data.sort_values('Centuries', ascending=False).head(10)
+
+
+def centuries(conn, years, player_search):
+    import plotly.express as px
+
+    centuries_data = _centuries_data(conn, years, player_search)
+    if centuries_data.empty:
+        return None
+    return px.bar(
+        centuries_data,
+        x='Player_Name',
+        y='Centuries',
+        title="Most Centuries",
+        color='Centuries'
+    )
+
+
+def half_centuries(conn, years, player_search):
+    import plotly.express as px
+
+    centuries_data = _centuries_data(conn, years, player_search)
+    if centuries_data.empty:
+        return None
+    return px.bar(
+        centuries_data,
+        x='Player_Name',
+        y='Half_Centuries',
+        title="Most Half-Centuries",
+        color='Half_Centuries'
+    )
+
+
+def wickets_top15(conn, years, player_search):
+    import plotly.express as px
+
+    wickets_by_player = queries.fetch_leaders(conn, 'Wickets_Taken', 15, years, player_search)
+
+    fig_wickets = px.bar(
+        wickets_by_player,
+        x='Wickets_Taken',
+        y='Player_Name',
+        orientation='h',
+        title="Top 15 Wicket Takers",
+        labels={'Wickets_Taken': 'Total Wickets', 'Player_Name': 'Player'}
+    )
+    fig_wickets.update_layout(height=600)
+    return fig_wickets
+
+
+def bowling_averages(conn, years, player_search):
+    import plotly.express as px
+
+    bowling_avg_data = queries.fetch_leaders(
+        conn, 'Bowling_Average', 15, years, player_search,
+        ascending=True, minimums={'Wickets_Taken': 10}
+    )
+
+    return px.bar(
+        bowling_avg_data,
+        x='Bowling_Average',
+        y='Player_Name',
+        orientation='h',
+        title="Best Bowling Averages (Min 10 wickets)",
+        labels={'Bowling_Average': 'Bowling Average', 'Player_Name': 'Player'}
+    )
+
+
+def batting_scatter(conn, years, player_search):
+    import plotly.express as px
+
+    scatter_data = queries.fetch_rows(  # Players with significant runs
+        conn,
+        ['Player_Name', 'Year', 'Runs_Scored', 'Batting_Average', 'Batting_Strike_Rate'],
+        years, player_search,
+        extra_where="Runs_Scored > 100",
+    )
+    return px.scatter(
+        scatter_data,
+        x='Batting_Average',
+        y='Batting_Strike_Rate',
+        size='Runs_Scored',
+        color='Year',
+        hover_name='Player_Name',
+        title="Batting Average vs Strike Rate (Players with >100 runs)",
+        labels={
+            'Batting_Average': 'Batting Average',
+            'Batting_Strike_Rate': 'Strike Rate',
+            'Runs_Scored': 'Total Runs'
+        }
+    )
+
+
+def runs_trend(conn, years, player_search):
+    import plotly.express as px
+
+    season_stats = queries.fetch_season_totals(conn, years, player_search)
+    return px.line(
+        season_stats,
+        x='Year',
+        y='Runs_Scored',
+        title="Total Runs by Season",
+        markers=True
+    )
+
+
+def wickets_trend(conn, years, player_search):
+    import plotly.express as px
+
+    season_stats = queries.fetch_season_totals(conn, years, player_search)
+    return px.line(
+        season_stats,
+        x='Year',
+        y='Wickets_Taken',
+        title="Total Wickets by Season",
+        markers=True
+    )
+
+
+def career(conn, years, player_name):
+    import plotly.graph_objects as go
+
+    player_data = queries.fetch_rows(
+        conn,
+        ['Year', 'Runs_Scored', 'Wickets_Taken'],
+        years,
+        extra_where="Player_Name = ?",
+        extra_params=[player_name],
+        order_by="Year",
+    )
+
+    fig_career = go.Figure()
+
+    fig_career.add_trace(go.Scatter(
+        x=player_data['Year'],
+        y=player_data['Runs_Scored'],
+        mode='lines+markers',
+        name='Runs Scored',
+        line=dict(color='blue')
+    ))
+
+    fig_career.add_trace(go.Scatter(
+        x=player_data['Year'],
+        y=player_data['Wickets_Taken'],
+        mode='lines+markers',
+        name='Wickets Taken',
+        line=dict(color='red'),
+        yaxis='y2'
+    ))
+
+    fig_career.update_layout(
+        title=f"{player_name} - Career Performance",
+        xaxis=dict(title="Year"),
+        yaxis=dict(title="Runs Scored"),
+        yaxis2=dict(title="Wickets Taken", overlaying="y", side="right"),
+        height=400
+    )
+    return fig_career
+
+
+# Charts that depend only on the sidebar filters (warmed after each ETL run)
+CHART_BUILDERS = {
+    "runs_top15": runs_top15,
+    "centuries": centuries,
+    "half_centuries": half_centuries,
+    "wickets_top15": wickets_top15,
+    "bowling_averages": bowling_averages,
+    "batting_scatter": batting_scatter,
+    "runs_trend": runs_trend,
+    "wickets_trend": wickets_trend,
+}
+
+
+def build_figure(chart_id, conn, years=(), player_search=""):
+    """
+    Builds the figure for chart_id under the given filters (None if no data).
+    Career charts ('career:<player>') ignore the player search.
+    """
+    if chart_id.startswith(CAREER_PREFIX):
+        return career(conn, years, chart_id[len(CAREER_PREFIX):])
+    return CHART_BUILDERS[chart_id](conn, years, player_search)
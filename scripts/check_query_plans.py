@@ -0,0 +1,130 @@
+"""
+Query plan regression check for analysis.py.
+
+Runs EXPLAIN QUERY PLAN for every query in analysis.QUERIES against the
+database and fails (exit code 1) if any of them does an unbounded scan: a
+'SCAN <table>' step, with or without an index, that reads every row. Walking
+an index is still a full scan unless the walk delivers rows in ORDER BY order
+under the outermost SELECT's LIMIT (no temp B-tree sort or grouping), so
+it stops after the requested rows. Queries in FULL_SCAN_ALLOWED (the fallbacks for databases
+without the aggregate tables or search index) scan by design and are
+reported without failing.
+
+Usage:
+    python scripts/check_query_plans.py [--db data/ipl_stats.db]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+
+sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
+
+from analysis import QUERIES
+
+
+def explain(conn, query, params):
+    """Returns the EXPLAIN QUERY PLAN steps of a query as (id, parent id, detail)"""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+    return [(row[0], row[1], row[-1]) for row in rows]
+
+
+# Queries expected to scan: {name: why}
+FULL_SCAN_ALLOWED = {
+    "raw_top_run_scorers": "fallback without agg_player_career (groups every row)",
+    "raw_top_wicket_takers": "fallback without agg_player_career (groups every row)",
+    "raw_player_stats": "fallback without the search index (LIKE on every name)",
+}
+
+# A virtual table scan with a constraint, e.g. 'INDEX 0:L0' (FTS5 trigram LIKE)
+_CONSTRAINED_VTAB = re.compile(r"VIRTUAL TABLE INDEX \d+:\S+")
+
+# Plan steps that open a nested query (subquery, CTE, compound part); their
+# children don't run in the outermost SELECT
+_NESTED_STEP = re.compile(
+    r"(CORRELATED )?(LIST |SCALAR )?SUBQUERY|CO-ROUTINE|MATERIALIZE|COMPOUND|"
+    r"LEFT-MOST SUBQUERY|UNION|EXCEPT|INTERSECT"
+)
+
+
+def top_level_steps(plan):
+    """Ids of the plan steps of the outermost SELECT (not inside a nested query)"""
+    top = {0}
+    for step_id, parent, detail in plan:  # parents are listed before their children
+        if parent in top and not _NESTED_STEP.match(detail):
+            top.add(step_id)
+    top.discard(0)
+    return top
+
+
+def has_outer_limit(query):
+    """True if the outermost SELECT has a LIMIT (not only a subquery or CTE)"""
+    # String literals, then parenthesized groups (innermost first), are dropped
+    outer = re.sub(r"'(?:[^']|'')*'", "''", query)
+    while True:
+        stripped = re.sub(r"\([^()]*\)", "", outer)
+        if stripped == outer:
+            break
+        outer = stripped
+    return re.search(r"\bLIMIT\b", outer, re.IGNORECASE) is not None
+
+
+def is_full_scan(step, query, plan):
+    """
+    A plan step is a full scan if it SCANs a table (with or without an
+    index), unless the scan is bounded: an ordered index walk in the
+    outermost SELECT, under that SELECT's LIMIT, with no temp B-tree sort or
+    grouping there. Virtual tables (FTS5) scanned with a constraint report
+    their own index use and are allowed.
+    """
+    step_id, _, detail = step
+    if not detail.startswith("SCAN "):
+        return False
+    if "VIRTUAL TABLE" in detail:
+        return not _CONSTRAINED_VTAB.search(detail)
+    top = top_level_steps(plan)
+    ordered_walk = (
+        "USING" in detail and step_id in top
+        and not any("TEMP B-TREE" in d for i, _, d in plan if i in top)
+    )
+    return not (ordered_walk and has_outer_limit(query))
+
+
+def check_query_plans(db_path="data/ipl_stats.db", verbose=True):
+    """
+    Returns a dict of query name -> list of full-scan plan steps
+    (empty lists mean the query is index-backed; FULL_SCAN_ALLOWED
+    queries are checked but always get an empty list)
+    """
+    conn = sqlite3.connect(db_path)
+    failures = {}
+    try:
+        for name, (query, params) in QUERIES.items():
+            plan = explain(conn, query, params)
+            scans = [step[2] for step in plan if is_full_scan(step, query, plan)]
+            allowed = name in FULL_SCAN_ALLOWED
+            failures[name] = [] if allowed else scans
+            if verbose:
+                status = "❌" if failures[name] else ("⚠️" if scans else "✅")
+                note = f" (full scan allowed: {FULL_SCAN_ALLOWED[name]})" if scans and allowed else ""
+                print(f"{status} {name}{note}")
+                for _, _, detail in plan:
+                    print(f"      {detail}")
+    finally:
+        conn.close()
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check analysis.py query plans")
+    parser.add_argument("--db", default="data/ipl_stats.db")
+    args = parser.parse_args()
+
+    results = check_query_plans(args.db)
+    failed = [name for name, scans in results.items() if scans]
+    if failed:
+        print(f"\n❌ Unbounded scans in: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ All analysis queries are index-backed (or allowed to scan)")
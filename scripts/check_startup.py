@@ -0,0 +1,110 @@
+"""
+Startup-time budget check for the dashboard.
+
+Measures, each in a fresh Python process (so nothing is already imported):
+- imports: importing the modules streamlit_app.py imports at the top, and
+  which heavy libraries (pandas, plotly) that pulls in; they must not load
+  until a view needs them
+- first_render: the first full script run of streamlit_app.py (Streamlit's
+  AppTest), i.e. the time until the default view is drawn
+
+A measurement over its budget, or a heavy library loaded at import time,
+fails the run (exit code 1). Run it against a loaded database (after
+etl_pipeline.py); the best of --repeat runs is compared with the budget.
+
+Usage:
+    python scripts/check_startup.py [--repeat 3] [--scale 1.0]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP_PATH = os.path.join(ROOT, "streamlit_app.py")
+
+# Seconds; --scale multiplies them on slower machines
+BUDGETS = {"imports": 0.15, "first_render": 0.8}
+
+# Must not be imported by the dashboard's startup imports
+HEAVY_MODULES = ["pandas", "plotly", "plotly.express", "numpy"]
+
+IMPORTS_PROBE = """
+import json, os, sys, time
+sys.path.append(os.path.join({root!r}, "scripts"))
+start = time.perf_counter()
+import charts, db, figure_cache, metadata, players, queries
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+FIRST_RENDER_PROBE = """
+import json, os, sys, time
+from streamlit.testing.v1 import AppTest
+os.chdir({root!r})
+start = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "errors": [str(e.value) for e in at.exception],
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_probe(code):
+    """Runs a probe in a fresh interpreter and returns its JSON result"""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def best_probe(code, repeat):
+    """The fastest of `repeat` probe runs"""
+    return min((run_probe(code) for _ in range(repeat)), key=lambda r: r["seconds"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the dashboard's startup time budget")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply every budget (for slower machines)")
+    args = parser.parse_args()
+
+    heavy = HEAVY_MODULES
+    print("⏱ Dashboard startup budget")
+    print("=" * 50)
+    imports = best_probe(IMPORTS_PROBE.format(root=ROOT, heavy=heavy), args.repeat)
+    first_render = best_probe(
+        FIRST_RENDER_PROBE.format(root=ROOT, app=APP_PATH, heavy=heavy), args.repeat)
+
+    failures = []
+    for name, result in [("imports", imports), ("first_render", first_render)]:
+        budget = BUDGETS[name] * args.scale
+        ok = result["seconds"] <= budget
+        print(f"   {name:<14} {result['seconds'] * 1000:8.1f} ms   budget {budget * 1000:.0f} ms  "
+              f"{'✅' if ok else '❌'}")
+        if not ok:
+            failures.append(f"{name} took {result['seconds']:.3f}s (budget {budget:.3f}s)")
+    print(f"   loaded by first render: {', '.join(first_render['heavy']) or 'none of ' + ', '.join(heavy)}")
+
+    if imports["heavy"]:
+        failures.append(f"startup imports load {', '.join(imports['heavy'])}")
+    if first_render["errors"]:
+        failures.append(f"first render raised: {'; '.join(first_render['errors'])}")
+
+    if failures:
+        print("\n❌ STARTUP BUDGET EXCEEDED")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+    print("\n✅ Startup within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
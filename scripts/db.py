@@ -0,0 +1,133 @@
+"""
+Shared SQLite connection handling for the ETL scripts, analysis and the dashboard.
+
+- Every connection runs in WAL mode, so readers keep working while
+  the load step writes, with tuned cache/mmap pragmas.
+- ConnectionPool keeps a few long-lived read connections. Python's sqlite3
+  caches prepared statements per connection, so reusing connections also
+  reuses the prepared statements for repeated queries.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_DB_PATH = "data/ipl_stats.db"
+
+# Applied to every connection (journal_mode=WAL is persisted in the file)
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",      # safe with WAL, avoids an fsync per commit
+    "cache_size": -64000,         # ~64 MB page cache (negative = KiB)
+    "mmap_size": 268435456,       # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,         # ms to wait for a lock instead of failing
+}
+
+STATEMENT_CACHE_SIZE = 256
+DEFAULT_POOL_SIZE = 4
+
+
+def connect(db_path=DEFAULT_DB_PATH, readonly=False, check_same_thread=True):
+    """
+    Opens a SQLite connection with the shared pragmas applied.
+    readonly=True sets query_only so the connection can never write.
+    """
+    conn = sqlite3.connect(
+        db_path,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=check_same_thread,
+    )
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class ConnectionPool:
+    """
+    A small thread-safe pool of read-only connections.
+
+    Connections are created lazily up to `size`; callers beyond that
+    wait until a connection is returned.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return connect(self.db_path, readonly=True, check_same_thread=False)
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for the duration of the with-block"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def read_sql(self, query, params=None):
+        """Runs a query on a pooled connection and returns a DataFrame"""
+        import pandas as pd  # deferred: the dashboard starts without pandas
+
+        with self.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    def close(self):
+        """Closes the idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+def database_path(conn):
+    """File of the connection's main database ('' if in memory), e.g. to key caches"""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return path
+    return ""
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=DEFAULT_DB_PATH, size=DEFAULT_POOL_SIZE):
+    """
+    Returns the process-wide pool for db_path (created on first use).
+    Pools are per process: a forked worker gets its own connections.
+    """
+    key = (os.getpid(), os.path.abspath(db_path))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, size)
+            _pools[key] = pool
+        return pool
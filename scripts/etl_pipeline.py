@@ -2,49 +2,143 @@
 IPL Player Statistics ETL Pipeline
 This script runs the complete ETL process:
 1. Extract: Read raw data from CSV
-2. Transform: Clean and transform the data
+2. Transform: Clean and transform the data, then validate it (rows that
+   break a rule in validate.RULES go to the quarantine table)
 3. Load: Store cleaned data in SQLite database
+
+Every CSV in data/raw (one file per season or league) is ingested: files
+are extracted and transformed in parallel worker processes (--workers N,
+default: one per core) and written to SQLite by a single writer.
+
+Pass --chunksize N to stream the CSVs through the pipeline N rows at a time
+instead of loading them into memory at once.
+
+Each run's per-stage timings are printed and appended to
+data/pipeline_runs.jsonl and the pipeline_runs table (--trace-memory adds
+tracemalloc peaks, at some cost in speed).
 """
 
 import sys
 import os
 sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
 
-from extract import extract_data
-from transform import transform_data
-from load import load_data_to_db
+from itertools import chain
+
+from extract import extract_data_chunks
+from ingest import RAW_DATA_DIR, discover_source_files, iter_transformed_files
+from instrumentation import RunRecorder, print_report, save_run, stage
+from transform import transform_chunks
+from validate import validate_frames
+from load import load_frames_to_db
+from source_manifest import detect_source_changes
+
+def warm_dashboard_cache(db_path):
+    """
+    Pre-builds the dashboard's default-view figures for the new data version.
+    Optional: a failure here never fails the pipeline.
+    """
+    try:
+        from figure_cache import warm_figure_cache
+        with stage("warm_cache"):
+            count = warm_figure_cache(db_path)
+        print(f"🔥 Warmed {count} dashboard figures")
+    except Exception as e:
+        print(f"⚠ Skipped dashboard figure warm-up: {e}")
+
+def scan_sources(source_files, source_dir):
+    """
+    Hashes every source file (before it is read for the load) and returns a
+    before_commit callback that replaces the source manifest with the scan,
+    so update_data.py compares later changes against what this rebuild loaded
+    """
+    with stage("scan_sources"):
+        changes = detect_source_changes(None, source_files, source_dir)
+    return lambda conn: changes.record(conn, replace=True)
+
+def run_streaming_pipeline(source_files, db_path, table_name, chunksize, record_manifest=None):
+    """
+    Streams the CSVs through extract -> transform -> load chunk by chunk.
+    All chunks are written in one transaction, so peak memory is bounded
+    by chunksize rather than by the size of the files.
+    record_manifest: before_commit callback of scan_sources, if any
+    """
+    print(f"\n🌊 STREAMING EXTRACT → TRANSFORM → LOAD (chunksize={chunksize})")
+    chunks = validate_frames(transform_chunks(chain.from_iterable(
+        extract_data_chunks(path, chunksize=chunksize) for path in source_files
+    )))
+    if not load_frames_to_db(chunks, db_path, table_name, before_commit=record_manifest):
+        raise RuntimeError("load failed")
+    warm_dashboard_cache(db_path)
 
-def run_etl_pipeline():
+def run_etl_pipeline(chunksize=None, source_dir=RAW_DATA_DIR, workers=None, trace_memory=False):
     """
     Main function to run the ETL pipeline
+    chunksize: if set, stream the raw CSVs in chunks of this many rows
+    workers: extract/transform processes (default: one per core, at most one per file)
+    trace_memory: also record tracemalloc peaks per stage
     """
+    config = {"source_dir": source_dir, "chunksize": chunksize, "workers": workers}
+    with RunRecorder("etl", trace_memory=trace_memory, config=config) as recorder:
+        success = _run_pipeline(chunksize, source_dir, workers)
+    report, slowdowns = save_run(recorder, "data/ipl_stats.db", "success" if success else "failed")
+    print_report(report, slowdowns)
+    return success
+
+def _run_pipeline(chunksize, source_dir, workers):
     print("🚀 Starting IPL Player Statistics ETL Pipeline")
     print("=" * 50)
 
+    db_path = "data/ipl_stats.db"
+    table_name = "player_stats"
+    source_files = discover_source_files(source_dir)
+    if not source_files:
+        print(f"❌ ETL Pipeline failed: no CSV files in {source_dir}")
+        return False
+    print(f"📂 Source files: {len(source_files)} in {source_dir}")
+
+    if chunksize:
+        try:
+            record_manifest = scan_sources(source_files, source_dir)
+            run_streaming_pipeline(source_files, db_path, table_name, chunksize, record_manifest)
+            print("\n🎉 ETL Pipeline completed successfully!")
+            print("=" * 50)
+        except Exception as e:
+            print(f"❌ ETL Pipeline failed: {e}")
+            return False
+        return True
+
     try:
-        # Step 1: Extract
-        print("\n📥 STEP 1: EXTRACT")
-        raw_data_path = "data/raw/cricket_data_2025.csv"
-        df_raw = extract_data(raw_data_path)
+        # The source manifest is replaced in the load transaction, so later
+        # updates compare against exactly what this rebuild loaded
+        record_manifest = scan_sources(source_files, source_dir)
+
+        # Steps 1 + 2: Extract and transform every file in parallel
+        print("\n📥 STEP 1 + 2: EXTRACT & TRANSFORM")
+        clean_rows = 0
+        columns = 0
 
-        # Step 2: Transform
-        print("\n🔄 STEP 2: TRANSFORM")
-        df_clean = transform_data(df_raw)
+        def transformed_frames():
+            nonlocal clean_rows, columns
+            for df_clean in iter_transformed_files(source_files, workers):
+                clean_rows += df_clean.shape[0]
+                columns = df_clean.shape[1]
+                yield df_clean
 
-        # Step 3: Load
+        # Step 3: Load (one writer, one transaction, fed as files finish)
         print("\n💾 STEP 3: LOAD")
-        db_path = "data/ipl_stats.db"
-        table_name = "player_stats"
-        load_data_to_db(df_clean, db_path, table_name)
+        if not load_frames_to_db(transformed_frames(), db_path, table_name,
+                                 before_commit=record_manifest):
+            raise RuntimeError("load failed")
+        warm_dashboard_cache(db_path)
 
         print("\n🎉 ETL Pipeline completed successfully!")
         print("=" * 50)
 
         # Optional: Show some basic stats
-        print(f"📊 Pipeline Summary:")
-        print(f"   - Raw data rows: {df_raw.shape[0]}")
-        print(f"   - Clean data rows: {df_clean.shape[0]}")
-        print(f"   - Columns: {df_clean.shape[1]}")
+        print("📊 Pipeline Summary:")
+        print(f"   - Source files: {len(source_files)}")
+        print(f"   - Clean data rows: {clean_rows}")
+        print(f"   - Columns: {columns}")
         print(f"   - Database: {db_path}")
         print(f"   - Table: {table_name}")
 
@@ -55,7 +149,21 @@ def run_etl_pipeline():
     return True
 
 if __name__ == "__main__":
-    success = run_etl_pipeline()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the IPL ETL pipeline")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="stream the raw CSVs in chunks of this many rows")
+    parser.add_argument("--source-dir", default=RAW_DATA_DIR,
+                        help="directory of source CSVs to ingest")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="extract/transform worker processes (default: one per core)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record tracemalloc peaks per stage (slower)")
+    args = parser.parse_args()
+
+    success = run_etl_pipeline(chunksize=args.chunksize, source_dir=args.source_dir,
+                               workers=args.workers, trace_memory=args.trace_memory)
     if success:
         print("\n✅ Ready for downstream analysis!")
     else:
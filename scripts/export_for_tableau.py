@@ -1,6 +1,234 @@
-import sqlite3
+"""
+Exports player_stats for Tableau and other downstream consumers.
+
+- CSV (the original Tableau export)
+- Parquet: one directory per season (hive-style Year=<season>), streamed
+  out of SQLite in record batches with per-column compression. Only seasons
+  whose content changed since the last export are rewritten.
+- Arrow IPC (Feather v2): uncompressed, so Python readers can memory-map it
+  without copying (pyarrow.ipc.open_file(pyarrow.memory_map(path))).
+
+Usage:
+    python scripts/export_for_tableau.py [--format csv|parquet|arrow|all] [--full]
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
 import pandas as pd
 
+sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
+
+from db import connect
+from load import HASH_COLUMN
+from schema import COLUMN_SCHEMA
+
+PARQUET_DIR = "data/export/parquet"
+ARROW_PATH = "data/export/ipl_stats.arrow"
+MANIFEST_NAME = "_manifest.json"
+BATCH_SIZE = 50_000
+
+# Text columns are highly repetitive and compress well with zstd;
+# numeric columns use snappy, which is cheaper to decode
+PARQUET_COMPRESSION = {
+    "Player_Name": "zstd",
+    "Best_Bowling_Match": "zstd",
+}
+DEFAULT_PARQUET_COMPRESSION = "snappy"
+
+# Partition directory for rows without a season (hive convention)
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def _require_pyarrow():
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ImportError("Parquet/Arrow export needs pyarrow: pip install pyarrow")
+
+
+def export_columns(conn, table_name):
+    """Exported columns (internal bookkeeping columns are left out)"""
+    rows = conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+    return [(row[1], row[2]) for row in rows if row[1] != HASH_COLUMN]
+
+
+def arrow_schema(columns):
+    """Arrow schema from the declared column schema (SQLite types as fallback)"""
+    import pyarrow as pa
+
+    from_schema = {
+        "Int16": pa.int16(), "Int32": pa.int32(), "float32": pa.float32(),
+        "category": pa.string(), "object": pa.string(),
+    }
+    from_sqlite = {"INTEGER": pa.int64(), "REAL": pa.float64(), "TEXT": pa.string()}
+    fields = []
+    for name, declared_type in columns:
+        if name in COLUMN_SCHEMA:
+            fields.append(pa.field(name, from_schema[COLUMN_SCHEMA[name]]))
+        else:
+            fields.append(pa.field(name, from_sqlite.get(declared_type.upper(), pa.string())))
+    return pa.schema(fields)
+
+
+def iter_record_batches(conn, table_name, schema, where="", params=(), batch_size=BATCH_SIZE):
+    """Streams rows out of SQLite as Arrow record batches"""
+    import pyarrow as pa
+
+    column_list = ", ".join(f'"{name}"' for name in schema.names)
+    cursor = conn.execute(
+        f'SELECT {column_list} FROM "{table_name}"{where} ORDER BY Player_Name', params
+    )
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        columns = list(zip(*rows))
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+
+def season_checksums(conn, table_name):
+    """
+    Content checksum per season (key 'null' for rows without a Year),
+    computed from the per-row hashes written by the load step
+    """
+    checksums = {}
+    cursor = conn.execute(
+        f'SELECT Year, {HASH_COLUMN} FROM "{table_name}" ORDER BY Year, Player_Name'
+    )
+    current, digest = None, None
+    for year, row_hash in cursor:
+        key = "null" if year is None else str(int(year))
+        if key != current:
+            if digest is not None:
+                checksums[current] = digest.hexdigest()
+            current, digest = key, hashlib.sha1()
+        digest.update(str(row_hash).encode())
+    if digest is not None:
+        checksums[current] = digest.hexdigest()
+    return checksums
+
+
+def _read_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("seasons", {})
+
+
+def _write_manifest(out_dir, seasons):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"seasons": seasons}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _partition_dir(out_dir, season):
+    name = NULL_PARTITION if season == "null" else season
+    return os.path.join(out_dir, f"Year={name}")
+
+
+def _write_season(conn, table_name, schema, out_dir, season):
+    """Writes one season's rows to its partition; returns the row count"""
+    import pyarrow.parquet as pq
+
+    if season == "null":
+        where, params = " WHERE Year IS NULL", ()
+    else:
+        where, params = " WHERE Year = ?", (int(season),)
+
+    file_schema = schema.remove(schema.get_field_index("Year"))
+    compression = {
+        name: PARQUET_COMPRESSION.get(name, DEFAULT_PARQUET_COMPRESSION)
+        for name in file_schema.names
+    }
+
+    partition = _partition_dir(out_dir, season)
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, "part-0.parquet")
+    tmp_path = path + ".tmp"
+
+    rows = 0
+    with pq.ParquetWriter(tmp_path, file_schema, compression=compression) as writer:
+        for batch in iter_record_batches(conn, table_name, schema, where, params):
+            batch = batch.drop_columns(["Year"])
+            writer.write_batch(batch, row_group_size=BATCH_SIZE)
+            rows += batch.num_rows
+    # Swap the partition file in atomically
+    os.replace(tmp_path, path)
+    return rows
+
+
+def export_to_parquet(db_path="data/ipl_stats.db", table_name="player_stats",
+                      out_dir=PARQUET_DIR, full=False):
+    """
+    Exports the table to a Year-partitioned Parquet dataset.
+    Unless full=True, only seasons whose checksum changed since the last
+    export are rewritten, and seasons that disappeared are removed.
+    """
+    _require_pyarrow()
+    print("Exporting data to Parquet...")
+
+    conn = connect(db_path, readonly=True)
+    try:
+        schema = arrow_schema(export_columns(conn, table_name))
+        checksums = season_checksums(conn, table_name)
+        previous = {} if full else _read_manifest(out_dir)
+        if full and os.path.isdir(out_dir):
+            shutil.rmtree(out_dir)
+        os.makedirs(out_dir, exist_ok=True)
+
+        changed = [s for s, checksum in checksums.items() if previous.get(s) != checksum]
+        removed = [s for s in previous if s not in checksums]
+
+        rows = 0
+        for season in changed:
+            rows += _write_season(conn, table_name, schema, out_dir, season)
+        for season in removed:
+            shutil.rmtree(_partition_dir(out_dir, season), ignore_errors=True)
+
+        _write_manifest(out_dir, checksums)
+        print(f"✅ Parquet dataset written to {out_dir}")
+        print(f"   Seasons rewritten: {len(changed)} ({rows} rows), "
+              f"unchanged: {len(checksums) - len(changed)}, removed: {len(removed)}")
+        return changed
+    finally:
+        conn.close()
+
+
+def export_to_arrow(db_path="data/ipl_stats.db", table_name="player_stats", arrow_path=ARROW_PATH):
+    """
+    Exports the table to an uncompressed Arrow IPC (Feather v2) file,
+    streamed batch by batch so the table is never fully in memory
+    """
+    _require_pyarrow()
+    import pyarrow as pa
+
+    print("Exporting data to Arrow IPC...")
+    conn = connect(db_path, readonly=True)
+    try:
+        schema = arrow_schema(export_columns(conn, table_name))
+        os.makedirs(os.path.dirname(arrow_path) or ".", exist_ok=True)
+        tmp_path = arrow_path + ".tmp"
+        rows = 0
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for batch in iter_record_batches(conn, table_name, schema):
+                writer.write_batch(batch)
+                rows += batch.num_rows
+        os.replace(tmp_path, arrow_path)
+        print(f"✅ Data exported to {arrow_path}")
+        print(f"   Rows: {rows}, Columns: {len(schema)}")
+    finally:
+        conn.close()
+
+
 def export_to_csv(db_path="data/ipl_stats.db", table_name="player_stats", csv_path="data/ipl_stats_for_tableau.csv"):
     """
     Exports data from SQLite database to CSV for Tableau
@@ -8,11 +236,13 @@ def export_to_csv(db_path="data/ipl_stats.db", table_name="player_stats", csv_pa
     print("Exporting data to CSV for Tableau...")
 
     # Connect to database
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path, readonly=True)
 
     try:
         # Read data into pandas DataFrame
-        query = f"SELECT * FROM {table_name}"
+        column_list = ", ".join(f'"{name}"' for name, _ in export_columns(conn, table_name))
+        # Player order like the Parquet / Arrow exports (player_stats is a view)
+        query = f"SELECT {column_list} FROM {table_name} ORDER BY Player_Name, Year"
         df = pd.read_sql_query(query, conn)
 
         # Export to CSV
@@ -26,4 +256,15 @@ def export_to_csv(db_path="data/ipl_stats.db", table_name="player_stats", csv_pa
         conn.close()
 
 if __name__ == "__main__":
-    export_to_csv()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Export player stats")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow", "all"], default="csv")
+    parser.add_argument("--full", action="store_true",
+                        help="rewrite every Parquet season instead of only changed ones")
+    args = parser.parse_args()
+
+    if args.format in ("csv", "all"):
+        export_to_csv()
+    if args.format in ("parquet", "all"):
+        export_to_parquet(full=args.full)
+    if args.format in ("arrow", "all"):
+        export_to_arrow()
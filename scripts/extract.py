@@ -1,11 +1,73 @@
 import pandas as pd
 
+from instrumentation import stage
+from schema import read_csv_options, apply_schema_dtypes
+from source_manifest import read_season_rows
+
+
+def _csv_options(file_path, typed=True):
+    """
+    read_csv options for the file's header: the declared schema when typed,
+    otherwise every column as a raw string (the transform step coerces them).
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    if typed:
+        return read_csv_options(header)
+    return {"dtype": {col: "object" for col in header}}
+
+
 def extract_data(file_path):
-    df = pd.read_csv(file_path)
+    with stage("extract") as timed:
+        try:
+            df = pd.read_csv(file_path, **_csv_options(file_path))
+            df = apply_schema_dtypes(df)
+        except (ValueError, TypeError) as e:
+            # Values that don't fit the schema are coerced to NULL in transform
+            print(f"⚠ Schema parse failed ({e}), reading raw strings instead")
+            df = pd.read_csv(file_path, **_csv_options(file_path, typed=False))
+        timed.rows = len(df)
     print("✅ Data extracted")
     print(f"Rows: {df.shape[0]}, Columns: {df.shape[1]}")
     return df
 
+
+def extract_seasons(file_path, seasons):
+    """
+    Extracts only the rows of the given seasons (keys like '2024' or 'null'),
+    streaming the file so unchanged seasons are never parsed by pandas
+    """
+    with stage("extract") as timed:
+        buffer = read_season_rows(file_path, seasons)
+        df = pd.read_csv(buffer, **_csv_options(file_path))
+        df = apply_schema_dtypes(df)
+        timed.rows = len(df)
+    print(f"✅ Extracted {df.shape[0]} rows for {len(seasons)} changed season(s)")
+    return df
+
+
+def extract_data_chunks(file_path, chunksize=50_000):
+    """
+    Yields the CSV in DataFrame chunks of at most chunksize rows,
+    so memory use stays flat regardless of file size.
+    Every chunk is parsed with the declared schema, so dtypes are
+    identical across chunks.
+    """
+    reader = pd.read_csv(file_path, chunksize=chunksize, **_csv_options(file_path))
+    total_rows = 0
+    while True:
+        with stage("extract") as timed:
+            chunk = next(reader, None)
+            if chunk is not None:
+                chunk = apply_schema_dtypes(chunk)
+                timed.rows = len(chunk)
+        if chunk is None:
+            break
+        total_rows += len(chunk)
+        yield chunk
+    print(f"✅ Data extracted in chunks of {chunksize}")
+    print(f"Rows: {total_rows}")
+
+
 if __name__ == "__main__":
     df = extract_data("data/raw/cricket_data_2025.csv")
     print(df.head())
@@ -0,0 +1,132 @@
+"""
+Memoized Plotly figure payloads for the dashboard.
+
+Figures are stored as serialized JSON keyed on
+(data stamp, selected years, player search, chart id), the stamp being
+metadata.data_stamp() (data version plus content hash prefix):
+
+- FigureCache is an in-process LRU bounded by entry count and total bytes.
+- The figure_cache table in ipl_stats.db holds figures pre-built by
+  warm_figure_cache() right after an ETL run (the default "last 3 years"
+  view), so the first page load after a refresh doesn't build them either.
+"""
+
+import json
+import sqlite3
+
+from charts import CHART_BUILDERS, build_figure
+from db import DEFAULT_DB_PATH, connect
+from lru import LRUCache
+from metadata import data_stamp
+import queries
+
+FIGURE_TABLE = "figure_cache"
+
+# Payload stored for "no data to plot"
+EMPTY_PAYLOAD = "null"
+
+
+def figure_key(stamp, years, player_search, chart_id):
+    """Cache key; years are normalized so selection order doesn't matter"""
+    return (str(stamp), tuple(sorted(int(y) for y in years)), player_search or "", chart_id)
+
+
+def serialize_figure(fig):
+    """Figure (or None) -> JSON payload"""
+    return EMPTY_PAYLOAD if fig is None else fig.to_json()
+
+
+def deserialize_figure(payload):
+    """JSON payload -> plotly figure dict (None for 'no data')"""
+    return json.loads(payload)
+
+
+class FigureCache(LRUCache):
+    """Thread-safe LRU of figure payloads bounded by entries and total bytes"""
+
+
+def _years_text(years):
+    return ",".join(str(y) for y in years)
+
+
+def read_warm_figure(conn, key):
+    """Payload pre-built by warm_figure_cache for key, or None"""
+    stamp, years, player_search, chart_id = key
+    try:
+        row = conn.execute(
+            f'SELECT figure_json FROM "{FIGURE_TABLE}" '
+            "WHERE data_stamp = ? AND years = ? AND player_search = ? AND chart_id = ?",
+            [stamp, _years_text(years), player_search, chart_id],
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Table not created yet (no warm-up has run), or from before data stamps
+        return None
+    return row[0] if row else None
+
+
+def get_figure_payload(cache, conn, stamp, years, player_search, chart_id):
+    """
+    Returns the JSON payload for a chart: from the in-process LRU, else the
+    warmed table, else by building the figure (and caching the result).
+    """
+    key = figure_key(stamp, years, player_search, chart_id)
+    payload = cache.get(key)
+    if payload is None:
+        payload = read_warm_figure(conn, key)
+        if payload is None:
+            payload = serialize_figure(build_figure(chart_id, conn, key[1], key[2]))
+        cache.put(key, payload)
+    return payload
+
+
+def default_years(years):
+    """The dashboard's default selection: the last 3 seasons"""
+    return years[-3:] if len(years) > 3 else years
+
+
+def warm_figure_cache(db_path=DEFAULT_DB_PATH):
+    """
+    Pre-builds every filter-level chart for the default view (last 3 seasons,
+    no player search) of the current data stamp and stores the payloads
+    in the figure_cache table. Figures of older stamps are dropped.
+    Returns the number of figures written.
+    """
+    conn = connect(db_path)
+    try:
+        stamp = data_stamp(conn)
+        years = default_years(queries.fetch_years(conn))
+        key_years = figure_key(stamp, years, "", "")[1]
+
+        payloads = [
+            (chart_id, serialize_figure(build_figure(chart_id, conn, key_years, "")))
+            for chart_id in CHART_BUILDERS
+        ]
+
+        with conn:
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{FIGURE_TABLE}")')]
+            if columns and "data_stamp" not in columns:
+                # Keyed on data_version only (older layout); the figures are rebuilt anyway
+                conn.execute(f'DROP TABLE "{FIGURE_TABLE}"')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS "{FIGURE_TABLE}" ('
+                "data_stamp TEXT NOT NULL, years TEXT NOT NULL, "
+                "player_search TEXT NOT NULL, chart_id TEXT NOT NULL, "
+                "figure_json TEXT NOT NULL, "
+                "PRIMARY KEY (data_stamp, years, player_search, chart_id))"
+            )
+            conn.execute(f'DELETE FROM "{FIGURE_TABLE}" WHERE data_stamp <> ?', [stamp])
+            conn.executemany(
+                f'INSERT OR REPLACE INTO "{FIGURE_TABLE}" VALUES (?, ?, ?, ?, ?)',
+                [
+                    (stamp, _years_text(key_years), "", chart_id, payload)
+                    for chart_id, payload in payloads
+                ],
+            )
+        return len(payloads)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    count = warm_figure_cache()
+    print(f"✅ Warmed {count} figures for the default dashboard view")
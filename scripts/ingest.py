@@ -0,0 +1,84 @@
+"""
+Parallel extract + transform over a directory of source CSVs.
+
+Each file (one season or league per file) is parsed, cleaned and validated
+in its own worker process; the transformed DataFrames are handed back to the caller,
+which writes them through a single SQLite writer (load_frames_to_db).
+Results come back in sorted path order, so the writer starts as soon as the
+first file is ready and later files win on duplicate (Player_Name, Year) keys.
+"""
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from extract import extract_data, extract_seasons
+from instrumentation import collect_stages, merge_stages, stage
+from transform import transform_data
+from validate import validate_frame
+
+RAW_DATA_DIR = "data/raw"
+SOURCE_PATTERN = "*.csv"
+
+
+def discover_source_files(source_dir=RAW_DATA_DIR, pattern=SOURCE_PATTERN):
+    """Source CSVs in source_dir, sorted by path"""
+    return sorted(glob.glob(os.path.join(source_dir, pattern)))
+
+
+def default_workers(n_files):
+    """One worker per file, capped at the cores available to this process"""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on Windows/macOS
+        cores = os.cpu_count() or 1
+    return max(1, min(n_files, cores))
+
+
+def extract_transform_file(path, seasons=None):
+    """
+    Worker: extracts one file (only the given season keys, if any),
+    transforms it and sets aside the rows that fail validation.
+    Runs in a child process, so it must stay importable.
+    """
+    df = extract_data(path) if seasons is None else extract_seasons(path, seasons)
+    return validate_frame(transform_data(df, verbose=False))
+
+
+def _worker(path, seasons):
+    """extract_transform_file plus the stage measurements taken in the worker"""
+    with collect_stages() as records:
+        df = extract_transform_file(path, seasons)
+    return df, records
+
+
+def iter_transformed_files(jobs, workers=None):
+    """
+    Yields transformed DataFrames for jobs, in order.
+    A job is a path, or a (path, seasons) pair to read only those seasons.
+    With a single job or workers=1 everything runs in this process.
+    """
+    jobs = [(job, None) if isinstance(job, str) else tuple(job) for job in jobs]
+    if not jobs:
+        return
+    workers = workers or default_workers(len(jobs))
+
+    if workers == 1 or len(jobs) == 1:
+        for path, seasons in jobs:
+            yield extract_transform_file(path, seasons)
+        return
+
+    print(f"⚙ Extracting and transforming {len(jobs)} files with {workers} worker processes")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        paths, seasons = zip(*jobs)
+        # map() submits every file up front and returns results in order
+        results = executor.map(_worker, paths, seasons)
+        while True:
+            # Time spent here is the writer waiting on the workers
+            with stage("extract_transform.wait"):
+                result = next(results, None)
+            if result is None:
+                break
+            df, records = result
+            merge_stages(records)
+            yield df
@@ -0,0 +1,390 @@
+"""
+Per-stage timing and memory instrumentation for the ETL.
+
+Pipeline code wraps its steps in stage("name"); while a RunRecorder is
+active each stage records wall time, CPU time, the peak RSS of the process
+so far, the tracemalloc peak within the stage (when trace_memory=True) and
+rows/sec. Repeated stages (chunks, files) are summed under one name. With
+no active recorder stage() is a no-op, so library code can always use it;
+the same goes for count(), which adds to a named counter of the run (e.g.
+rows quarantined per validation rule).
+
+At the end of a run the report is appended to data/pipeline_runs.jsonl and
+the pipeline_runs table, and stages that took far longer than in recent
+runs that did the same work (the same stages: a no-op update is never the
+yardstick for one that loaded data) are flagged.
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RUN_HISTORY_PATH = "data/pipeline_runs.jsonl"
+RUNS_TABLE = "pipeline_runs"
+
+# A stage is flagged when it takes this many times its recent median
+SLOWDOWN_FACTOR = 3.0
+HISTORY_RUNS = 10
+
+_active = None
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory (None if unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def current_rss_mb():
+    """This process's resident memory now (None where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+
+class StageStats:
+    """Accumulated measurements of one named stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall_s = 0.0
+        self.self_s = 0.0  # wall time minus nested stages
+        self.cpu_s = 0.0
+        self.rows = 0
+        self.peak_rss_mb = None
+        self.tracemalloc_peak_mb = None
+
+    def add(self, wall_s, self_s, cpu_s, rows, rss_mb, traced_mb):
+        self.calls += 1
+        self.wall_s += wall_s
+        self.self_s += self_s
+        self.cpu_s += cpu_s
+        self.rows += rows or 0
+        if rss_mb is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, rss_mb)
+        if traced_mb is not None:
+            self.tracemalloc_peak_mb = max(self.tracemalloc_peak_mb or 0, traced_mb)
+
+    def merge(self, record):
+        """Adds a to_dict() record (e.g. measured in a worker process)"""
+        self.calls += record["calls"] - 1
+        self.add(record["wall_s"], record["self_s"], record["cpu_s"], record["rows"],
+                 record["peak_rss_mb"], record["tracemalloc_peak_mb"])
+
+    def to_dict(self):
+        return {
+            "stage": self.name,
+            "calls": self.calls,
+            "wall_s": round(self.wall_s, 4),
+            "self_s": round(self.self_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "rows": self.rows,
+            "rows_per_s": round(self.rows / self.wall_s) if self.rows and self.wall_s else None,
+            "peak_rss_mb": self.peak_rss_mb,
+            "tracemalloc_peak_mb": self.tracemalloc_peak_mb,
+        }
+
+
+class StageHandle:
+    """Yielded by stage(); set .rows once the row count is known"""
+
+    def __init__(self, rows=None):
+        self.rows = rows
+        self.child_wall = 0.0
+        self.traced_peak = 0
+
+
+class RunRecorder:
+    """Collects stage measurements for one pipeline run"""
+
+    def __init__(self, pipeline, trace_memory=False, config=None):
+        self.pipeline = pipeline
+        self.trace_memory = trace_memory
+        # Runs are only compared with earlier runs of the same config
+        self.config = dict(config or {}, trace_memory=trace_memory)
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.stages = {}
+        self.counters = {}
+        self._stack = []
+        self._started = None
+        self.wall_s = None
+        self.cpu_s = None
+
+    def __enter__(self):
+        global _active
+        self._previous = _active
+        _active = self
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+        else:
+            self._owns_tracing = False
+        self._started = (time.perf_counter(), time.process_time())
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        self.wall_s = time.perf_counter() - self._started[0]
+        self.cpu_s = time.process_time() - self._started[1]
+        if self._owns_tracing:
+            tracemalloc.stop()
+        _active = self._previous
+        return False
+
+    def _stats(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        return stats
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        handle = StageHandle(rows)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # tracemalloc has one peak counter: fold it into the enclosing
+            # stage before resetting it for this one
+            if self._stack:
+                parent = self._stack[-1]
+                parent.traced_peak = max(parent.traced_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._stack.append(handle)
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield handle
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            self._stack.pop()
+            traced_mb = None
+            if tracing:
+                traced = max(handle.traced_peak, tracemalloc.get_traced_memory()[1])
+                traced_mb = round(traced / (1024 * 1024), 1)
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent.traced_peak = max(parent.traced_peak, traced)
+                tracemalloc.reset_peak()
+            if self._stack:
+                self._stack[-1].child_wall += wall
+            self._stats(name).add(wall, wall - handle.child_wall, cpu, handle.rows,
+                                  peak_rss_mb(), traced_mb)
+
+    def merge(self, records):
+        """Adds stage records measured elsewhere (e.g. in worker processes)"""
+        for record in records:
+            self._stats(record["stage"]).merge(record)
+
+    def report(self, status="success", extra=None):
+        report = {
+            "run_id": self.run_id,
+            "pipeline": self.pipeline,
+            "config": self.config,
+            "started_at": self.started_at,
+            "status": status,
+            "wall_s": round(self.wall_s or 0.0, 4),
+            "cpu_s": round(self.cpu_s or 0.0, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": [stats.to_dict() for stats in self.stages.values()],
+        }
+        if self.counters:
+            report["counters"] = dict(self.counters)
+        if extra:
+            report.update(extra)
+        return report
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Times a stage of the active run (no-op when nothing is recording)"""
+    if _active is None:
+        yield StageHandle(rows)
+    else:
+        with _active.stage(name, rows) as handle:
+            yield handle
+
+
+def count(name, n=1):
+    """Adds n to a counter of the active run (no-op when nothing is recording)"""
+    if _active is not None:
+        _active.counters[name] = _active.counters.get(name, 0) + n
+
+
+def merge_stages(records):
+    """Adds records from collect_stages() to the active run, if any"""
+    if _active is not None:
+        _active.merge(records)
+
+
+@contextmanager
+def collect_stages():
+    """
+    Records stages into a fresh recorder and yields the list their records
+    are written to on exit; used in worker processes, whose measurements
+    (wall, CPU, worker RSS) are shipped back and merged into the parent's run.
+    """
+    records = []
+    if tracemalloc.is_tracing():
+        # Inherited from a forked parent; only the parent's memory is traced
+        tracemalloc.stop()
+    with RunRecorder("worker") as recorder:
+        yield records
+    records.extend(stats.to_dict() for stats in recorder.stages.values())
+
+
+def run_work(run):
+    """What a run did, for comparing like with like: the set of its stages"""
+    return frozenset(stats["stage"] for stats in run["stages"])
+
+
+def read_history(path=RUN_HISTORY_PATH, pipeline=None, config=None, limit=HISTORY_RUNS,
+                 work=None):
+    """
+    The last `limit` successful runs (of pipeline and config, and with the
+    given run_work if any) from the JSON-lines history
+    """
+    if not os.path.exists(path):
+        return []
+    runs = []
+    with open(path) as f:
+        for line in f:
+            try:
+                run = json.loads(line)
+            except ValueError:
+                continue
+            if run.get("status") != "success":
+                continue
+            if pipeline is not None and run.get("pipeline") != pipeline:
+                continue
+            if config is not None and run.get("config") != config:
+                continue
+            if work is not None and run_work(run) != work:
+                continue
+            runs.append(run)
+    return runs[-limit:]
+
+
+def find_slowdowns(report, history, factor=SLOWDOWN_FACTOR):
+    """
+    Stages (and the run as a whole) whose wall time is more than factor
+    times their median over the history runs that did the same work
+    (run_work). Returns [(stage, wall_s, median_s, ratio)], the ratio taken
+    against a 1 ms floor so a 0.0 median doesn't divide by zero.
+    """
+    work = run_work(report)
+    past = {}
+    for run in history:
+        if run_work(run) != work:
+            continue
+        past.setdefault("total", []).append(run["wall_s"])
+        for stats in run["stages"]:
+            past.setdefault(stats["stage"], []).append(stats["wall_s"])
+
+    current = [("total", report["wall_s"])] + [
+        (stats["stage"], stats["wall_s"]) for stats in report["stages"]
+    ]
+    slowdowns = []
+    for name, wall_s in current:
+        if not past.get(name):
+            continue
+        median = statistics.median(past[name])
+        # Ignore sub-10ms stages: their timing is mostly noise
+        ratio = wall_s / max(median, 0.001)
+        if wall_s >= 0.01 and ratio > factor:
+            slowdowns.append((name, wall_s, median, ratio))
+    return slowdowns
+
+
+def append_history(report, path=RUN_HISTORY_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(report) + "\n")
+
+
+def write_runs_table(conn, report):
+    """Stores one row per stage plus a 'total' row (caller commits)"""
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{RUNS_TABLE}" ('
+        "run_id TEXT NOT NULL, pipeline TEXT NOT NULL, config TEXT, started_at TEXT NOT NULL, "
+        "status TEXT NOT NULL, stage TEXT NOT NULL, calls INTEGER, wall_s REAL, "
+        "self_s REAL, cpu_s REAL, rows INTEGER, rows_per_s REAL, peak_rss_mb REAL, "
+        "tracemalloc_peak_mb REAL, PRIMARY KEY (run_id, stage))"
+    )
+    total = {
+        "stage": "total", "calls": 1, "wall_s": report["wall_s"], "self_s": None,
+        "cpu_s": report["cpu_s"], "rows": None, "rows_per_s": None,
+        "peak_rss_mb": report["peak_rss_mb"], "tracemalloc_peak_mb": None,
+    }
+    conn.executemany(
+        f'INSERT OR REPLACE INTO "{RUNS_TABLE}" VALUES '
+        "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (report["run_id"], report["pipeline"], json.dumps(report["config"], sort_keys=True),
+             report["started_at"], report["status"],
+             s["stage"], s["calls"], s["wall_s"], s["self_s"], s["cpu_s"], s["rows"],
+             s["rows_per_s"], s["peak_rss_mb"], s["tracemalloc_peak_mb"])
+            for s in [total] + report["stages"]
+        ],
+    )
+
+
+def save_run(recorder, db_path, status="success", extra=None, history_path=RUN_HISTORY_PATH):
+    """
+    Appends the run report to the history file and the pipeline_runs table
+    and returns (report, slowdowns). Never raises: instrumentation must not
+    fail the pipeline.
+    """
+    report = recorder.report(status, extra)
+    slowdowns = []
+    try:
+        history = read_history(history_path, recorder.pipeline, recorder.config,
+                               work=run_work(report))
+        slowdowns = find_slowdowns(report, history) if status == "success" else []
+        report["slow_stages"] = [name for name, *_ in slowdowns]
+        append_history(report, history_path)
+    except OSError as e:
+        print(f"⚠ Could not write run history: {e}")
+    try:
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            with conn:
+                write_runs_table(conn, report)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠ Could not record run in {RUNS_TABLE}: {e}")
+    return report, slowdowns
+
+
+def print_report(report, slowdowns=()):
+    print(f"\n⏱ Stage timings (run {report['run_id']}, {report['wall_s']:.2f}s total, "
+          f"peak RSS {report['peak_rss_mb']} MB):")
+    for s in report["stages"]:
+        rate = f"{s['rows_per_s']:>10,} rows/s" if s["rows_per_s"] else " " * 17
+        print(f"   {s['stage']:<36} {s['wall_s']:>8.3f}s  self {s['self_s']:>7.3f}s  "
+              f"cpu {s['cpu_s']:>7.3f}s  {rate}")
+    counters = report.get("counters", {})
+    if counters:
+        print("   " + ", ".join(f"{name} {value:,}" for name, value in counters.items()))
+    for name, wall_s, median, ratio in slowdowns:
+        print(f"⚠ {name} took {wall_s:.3f}s, {ratio:.1f}× its recent median "
+              f"({median:.3f}s)")
@@ -0,0 +1,266 @@
+"""
+Ranking index: leaderboards over any set of seasons without regrouping rows.
+
+Built by the load step from player_stats: the players (sorted by name),
+the seasons (ascending; NULL Year is season 0, first) and, per ranked stat,
+a (seasons + 1) x players array of prefix sums over the seasons: row j holds
+every player's total over the first j seasons. A player's total over the
+seasons [lo, hi) is prefix[hi] - prefix[lo], and any selection of seasons
+is a few such contiguous runs, so the totals of all players for a selection
+are one vectorized subtraction per run. Rates (averages, strike and economy
+rates) are ratios of those totals, like the metric tables.
+
+The top K are then picked with a partial selection (np.argpartition,
+linear in the players) and only those K are sorted; ties go to the player
+whose name sorts first.
+
+The arrays are stored in agg_leaderboard as raw BLOBs in the narrowest
+integer type that holds them, and read back (np.frombuffer, no parsing)
+once per database and data stamp per process.
+"""
+
+from db import database_path
+from lru import LRUCache
+from metadata import data_stamp
+
+LEADERBOARD_TABLE = "agg_leaderboard"
+
+# Prefix-summed stats: {name: SQL expression over the source table}.
+# Batting / bowling seasons count the rows with runs / wickets recorded
+STATS = {
+    "Runs_Scored": "IFNULL(Runs_Scored, 0)",
+    "Dismissals": "IFNULL(Dismissals, 0)",
+    "Balls_Faced": "IFNULL(Balls_Faced, 0)",
+    "Batting_Seasons": "Runs_Scored IS NOT NULL",
+    "Wickets_Taken": "IFNULL(Wickets_Taken, 0)",
+    "Runs_Conceded": "IFNULL(Runs_Conceded, 0)",
+    "Balls_Bowled": "IFNULL(Balls_Bowled, 0)",
+    "Bowling_Seasons": "Wickets_Taken IS NOT NULL",
+}
+
+# Rates over a selection: {name: (numerator, denominator, scale)}
+RATES = {
+    "Batting_Average": ("Runs_Scored", "Dismissals", 1.0),
+    "Strike_Rate": ("Runs_Scored", "Balls_Faced", 100.0),
+    "Bowling_Average": ("Runs_Conceded", "Wickets_Taken", 1.0),
+    "Economy_Rate": ("Runs_Conceded", "Balls_Bowled", 6.0),
+}
+
+# Loaded indexes kept per process (one per database and data stamp; a reload replaces it)
+CACHE_MAX_ENTRIES = 2
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+_leaderboards = LRUCache(
+    max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, sizeof=lambda lb: lb.nbytes
+)
+
+
+def _narrowest_int(low, high):
+    import numpy as np
+
+    return next(t for t in (np.int8, np.int16, np.int32, np.int64)
+                if np.iinfo(t).min <= low and high <= np.iinfo(t).max)
+
+
+class Leaderboard:
+    """Players, seasons and per-stat prefix sums (see module docstring)"""
+
+    def __init__(self, players, seasons, prefix):
+        self.players = players  # numpy object array, sorted
+        self.seasons = seasons  # numpy int array, ascending
+        self.prefix = prefix    # {stat: (len(seasons) + 1, len(players)) array}
+
+    @property
+    def nbytes(self):
+        names = sum(len(name) + 50 for name in self.players)  # str objects
+        return names + self.seasons.nbytes + sum(p.nbytes for p in self.prefix.values())
+
+    def window(self, years=None):
+        """Contiguous season runs [(lo, hi)] covering `years` (None: every season)"""
+        import numpy as np
+
+        if not years:
+            return [(0, len(self.seasons))]
+        wanted = np.unique(np.asarray([int(year) for year in years]))
+        columns = np.searchsorted(self.seasons, wanted)
+        found = columns < len(self.seasons)
+        columns = columns[found][self.seasons[columns[found]] == wanted[found]]
+        runs = []
+        for column in columns:
+            if runs and runs[-1][1] == column:
+                runs[-1] = (runs[-1][0], column + 1)
+            else:
+                runs.append((column, column + 1))
+        return runs
+
+    def totals(self, stat, runs, players=None):
+        """
+        Total of a stat (int64) or rate (float64, NaN without a denominator)
+        over the runs, for every player or only the given player indices
+        """
+        import numpy as np
+
+        if stat in RATES:
+            numerator, denominator, scale = RATES[stat]
+            num = self.totals(numerator, runs, players)
+            den = self.totals(denominator, runs, players)
+            out = np.full(len(num), np.nan)
+            np.divide(num * scale, den, out=out, where=den > 0)
+            return out
+        prefix = self.prefix[stat]
+        total = np.zeros(len(self.players) if players is None else len(players), dtype=np.int64)
+        for lo, hi in runs:
+            if players is None:
+                total += prefix[hi]
+                total -= prefix[lo]
+            else:
+                total += prefix[hi, players]
+                total -= prefix[lo, players]
+        return total
+
+    def top(self, values, k, offset=0, mask=None, ascending=False):
+        """
+        Player indices ranked offset .. offset + k - 1 by values (largest
+        first unless ascending), among the players where mask is True
+        """
+        import numpy as np
+
+        candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(values))
+        key = values[candidates] if ascending else -values[candidates]
+        n = min(offset + k, len(key))
+        if n <= 0:
+            return candidates[:0]
+        # Every candidate up to the n-th smallest key, ties at the boundary included
+        threshold = np.partition(key, n - 1)[n - 1]
+        picked = np.flatnonzero(key <= threshold)
+        # Candidates are in name order: the position breaks ties
+        picked = picked[np.lexsort((picked, key[picked]))]
+        return candidates[picked[offset:n]]
+
+
+def build_leaderboard(conn, source_table="player_stats"):
+    """
+    (Re)builds agg_leaderboard from source_table on the caller's connection.
+    Returns False (and builds nothing) if source_table lacks the stat columns.
+    """
+    import numpy as np
+
+    table_columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{source_table}")')}
+    needed = {"Player_Name", "Year"} | {stat for stat in STATS if not stat.endswith("_Seasons")}
+    if not needed <= table_columns:
+        return False
+
+    # In name order (the Player_Name/Year index): a player's index is the
+    # number of name changes before its rows, no string sort needed.
+    # Column arrays come straight from the tuples, as in aggregates._seasons_frame
+    rows = conn.execute(
+        f'SELECT Player_Name, IFNULL(Year, 0), {", ".join(STATS.values())} '
+        f'FROM "{source_table}" WHERE Player_Name IS NOT NULL ORDER BY Player_Name'
+    ).fetchall()
+    columns = list(zip(*rows)) or [()] * (2 + len(STATS))
+    names = np.array(columns[0], dtype=object)
+    first_row = np.ones(len(names), dtype=bool)
+    first_row[1:] = names[1:] != names[:-1]
+    players, player_index = names[first_row], np.cumsum(first_row) - 1
+    years = np.fromiter(columns[1], dtype=np.int64, count=len(rows))
+    seasons, season_index = np.unique(years, return_inverse=True)
+
+    conn.execute(f'DROP TABLE IF EXISTS "{LEADERBOARD_TABLE}"')
+    conn.execute(
+        f'CREATE TABLE "{LEADERBOARD_TABLE}" (Name TEXT PRIMARY KEY, Dtype TEXT NOT NULL, Data BLOB)'
+    )
+    entries = [
+        ("Player_Name", "text", "\n".join(players).encode()),
+        ("Year", "int64", seasons.astype(np.int64).tobytes()),
+    ]
+    for stat, values in zip(STATS, columns[2:]):
+        # (Player_Name, Year) is unique: one cell per row, then a running sum down the seasons
+        prefix = np.zeros((len(seasons) + 1, len(players)), dtype=np.int64)
+        prefix[season_index + 1, player_index] = np.fromiter(values, dtype=np.int64,
+                                                             count=len(rows))
+        np.cumsum(prefix, axis=0, out=prefix)
+        dtype = _narrowest_int(prefix.min(initial=0), prefix.max(initial=0))
+        entries.append((stat, np.dtype(dtype).name, prefix.astype(dtype).tobytes()))
+    conn.executemany(f'INSERT INTO "{LEADERBOARD_TABLE}" VALUES (?, ?, ?)', entries)
+    return True
+
+
+def leaderboard_available(conn):
+    """True if the ranking index has been built"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", [LEADERBOARD_TABLE]
+    ).fetchone()
+    return row is not None
+
+
+def load_leaderboard(conn):
+    """The Leaderboard stored in agg_leaderboard"""
+    import numpy as np
+
+    entries = {name: (dtype, data) for name, dtype, data in
+               conn.execute(f'SELECT Name, Dtype, Data FROM "{LEADERBOARD_TABLE}"')}
+    names = entries.pop("Player_Name")[1].decode()
+    players = np.array(names.split("\n") if names else [], dtype=object)
+    seasons = np.frombuffer(entries.pop("Year")[1], dtype=np.int64)
+    prefix = {
+        stat: np.frombuffer(data, dtype=dtype).reshape(len(seasons) + 1, len(players))
+        for stat, (dtype, data) in entries.items()
+    }
+    return Leaderboard(players, seasons, prefix)
+
+
+def get_leaderboard(conn):
+    """load_leaderboard, shared by every caller in the process for the database and data stamp"""
+    key = (database_path(conn), data_stamp(conn))
+    leaderboard = _leaderboards.get(key)
+    if leaderboard is None:
+        leaderboard = load_leaderboard(conn)
+        _leaderboards.put(key, leaderboard)
+    return leaderboard
+
+
+def top_players(conn, order_by, limit, offset=0, years=None, ascending=False,
+                minimums=None, columns=(), names=None):
+    """
+    DataFrame of the players ranked offset .. offset + limit - 1 by a stat or
+    rate over the given seasons (all when empty): Player_Name, order_by and
+    `columns`, renamed by names ({stat: column name}) if given.
+    minimums: {stat or rate: lowest value a player needs}.
+    """
+    import numpy as np
+    import pandas as pd
+
+    leaderboard = get_leaderboard(conn)
+    runs = leaderboard.window(years)
+    # Every player's value only for what ranks or filters; the other columns
+    # are computed for the ranked players alone
+    values = {name: leaderboard.totals(name, runs)
+              for name in dict.fromkeys([order_by, *(minimums or {})])}
+    mask = ~np.isnan(values[order_by]) if order_by in RATES else None
+    for name, minimum in (minimums or {}).items():
+        keep = values[name] >= minimum
+        mask = keep if mask is None else mask & keep
+    ranked = leaderboard.top(values[order_by], limit, offset, mask, ascending)
+
+    # One constructor call: adding columns one at a time costs more than the ranking
+    data = {"Player_Name": leaderboard.players[ranked]}
+    for name in dict.fromkeys([order_by, *columns]):
+        column = values[name][ranked] if name in values else leaderboard.totals(name, runs, ranked)
+        data[(names or {}).get(name, name)] = column
+    return pd.DataFrame(data)
+
+
+def top_run_scorers(conn, limit=10, offset=0, years=None):
+    """Columns of analysis.get_top_run_scorers, ranked by runs over the seasons"""
+    return top_players(conn, "Runs_Scored", limit, offset, years,
+                       minimums={"Batting_Seasons": 1},
+                       columns=["Batting_Seasons", "Batting_Average", "Strike_Rate"],
+                       names={"Runs_Scored": "Total_Runs", "Batting_Seasons": "Seasons_Played"})
+
+
+def top_wicket_takers(conn, limit=10, offset=0, years=None):
+    """Columns of analysis.get_top_wicket_takers, ranked by wickets over the seasons"""
+    return top_players(conn, "Wickets_Taken", limit, offset, years,
+                       minimums={"Bowling_Seasons": 1},
+                       columns=["Bowling_Seasons", "Bowling_Average", "Economy_Rate"],
+                       names={"Wickets_Taken": "Total_Wickets", "Bowling_Seasons": "Seasons_Played"})
@@ -1,33 +1,425 @@
-import sqlite3
+import numpy as np
 import pandas as pd
 
-def load_data_to_db(df, db_path="data/ipl_stats.db", table_name="player_stats"):
+from aggregates import aggregates_available, build_aggregate_tables
+from db import connect
+from instrumentation import count, stage
+from leaderboard import build_leaderboard, leaderboard_available
+from metadata import bump_data_version
+from players import add_players, build_player_dimension, search_index_available
+from star_schema import (
+    FACT_KEY, FACT_TABLE, FACT_TABLES, add_seasons, analyze, create_fact_tables, create_view,
+    drop_view_or_table, ensure_dimensions, key_codes, season_ids, split_columns,
+    star_layout_available,
+)
+from star_schema import create_indexes as create_star_indexes
+from query_cache import invalidate_all as invalidate_query_caches
+from validate import clear_quarantine, format_counts, pop_validation, write_quarantine
+
+# Natural key of a player_stats row. Year is NULL for players without any
+# recorded season; its season_id (star_schema.py) is 0.
+KEY_COLUMNS = ["Player_Name", "Year"]
+HASH_COLUMN = "Row_Hash"
+
+# A full rebuild writes the fact tables to <table>__staging, validates
+# them, then renames them over the live ones in the same transaction
+STAGING_SUFFIX = "__staging"
+
+
+def compute_row_hashes(df):
     """
-    Loads the transformed DataFrame into a SQLite database.
-    Creates the table if it doesn't exist.
+    Returns a 64-bit content hash per row (stored as a signed SQLite INTEGER).
+    """
+    hash_columns = [col for col in df.columns if col != HASH_COLUMN]
+    hashes = pd.util.hash_pandas_object(df[hash_columns], index=False)
+    return hashes.astype("int64")
+
+
+def create_indexes(conn, table_name):
+    """
+    Creates the lookup indexes used by analysis and the dashboard. The fact
+    tables' primary keys serve player lookups; dim_player indexes names.
+    """
+    if star_layout_available(conn, table_name):
+        create_star_indexes(conn)
+
+
+def _table_columns(conn, table_name):
+    rows = conn.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+    return [row[1] for row in rows]
+
+
+def layout_is_current(conn, table_name, columns):
+    """
+    True if table_name is the star schema view with exactly `columns` (plus
+    Row_Hash); an upsert into another layout rebuilds it from the frames given
+    """
+    return (star_layout_available(conn, table_name)
+            and _table_columns(conn, table_name) == list(columns) + [HASH_COLUMN])
+
+
+def _to_records(df):
+    """Converts a DataFrame into DB-API rows with NULLs instead of NaN/NA"""
+    float32_columns = [col for col in df.columns if df[col].dtype == "float32"]
+    if float32_columns:
+        # Widen float32 rates and drop the float32 representation noise
+        # (18.2 -> 18.200000762939453) before they are stored as REAL
+        df = df.astype({col: "float64" for col in float32_columns})
+        df[float32_columns] = df[float32_columns].round(4)
+    return df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+
+def _executemany(conn, query, records, batch_size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            conn.executemany(query, batch)
+            batch = []
+    if batch:
+        conn.executemany(query, batch)
+
+
+def _add_keys(conn, df):
+    """df with player_id and season_id columns, adding new players and seasons"""
+    codes, names = pd.factorize(df["Player_Name"])
+    if (codes < 0).any():
+        raise ValueError("rows without a Player_Name can't be loaded")
+    ids = add_players(conn, list(names))
+    df["player_id"] = np.array([ids[name] for name in names], dtype=np.int64)[codes]
+    df["season_id"] = season_ids(df["Year"])
+    add_seasons(conn, np.unique(df["season_id"].to_numpy()))
+    return df
+
+
+def _write_facts(conn, df, suffix, fresh, batch_size):
+    """
+    Writes df's rows (with keys) to the fact tables. A batting / bowling row
+    is only written if it has any batting / bowling stat; unless the tables
+    are fresh, the ones left over from an earlier version of a row are deleted.
+    """
+    for table, columns in split_columns(df.columns).items():
+        if table == FACT_TABLE:
+            has_stats = np.ones(len(df), dtype=bool)
+        else:
+            has_stats = df[columns].notna().any(axis=1).to_numpy()
+        rows = df[FACT_KEY + columns][has_stats]
+        column_list = ", ".join(f'"{col}"' for col in rows.columns)
+        placeholders = ", ".join("?" for _ in rows.columns)
+        # Later frames (e.g. other source files) may repeat a key: last one wins
+        _executemany(
+            conn, f'INSERT OR REPLACE INTO "{table}{suffix}" ({column_list}) VALUES ({placeholders})',
+            _to_records(rows), batch_size,
+        )
+        if not fresh and not has_stats.all():
+            _delete_keys(conn, f"{table}{suffix}", df[FACT_KEY][~has_stats])
+
+
+def _delete_keys(conn, table, keys):
+    conn.executemany(
+        f'DELETE FROM "{table}" WHERE player_id = ? AND season_id = ?',
+        keys.itertuples(index=False, name=None),
+    )
+
+
+def _stored_keys(conn, season_values, columns="player_id, season_id"):
+    """Stored fact rows of the given seasons, as a tuple of column arrays"""
+    placeholders = ", ".join("?" for _ in season_values)
+    rows = conn.execute(
+        f'SELECT {columns} FROM "{FACT_TABLE}" WHERE season_id IN ({placeholders})',
+        [int(season) for season in season_values],
+    ).fetchall()
+    return tuple(np.array(col, dtype=np.int64) for col in (zip(*rows) if rows else
+                                                             [()] * (columns.count(",") + 1)))
+
+
+def _changed_rows(conn, df):
+    """Mask of df's rows that are new or whose Row_Hash differs from the stored one"""
+    player, season, stored_hash = _stored_keys(
+        conn, np.unique(df["season_id"].to_numpy()), f"player_id, season_id, {HASH_COLUMN}"
+    )
+    position = pd.Index(key_codes(player, season)).get_indexer(
+        key_codes(df["player_id"].to_numpy(), df["season_id"].to_numpy())
+    )
+    found = position >= 0
+    changed = ~found
+    changed[found] = stored_hash[position[found]] != df[HASH_COLUMN].to_numpy()[found]
+    return changed
+
+
+def _season_values(seasons):
+    """Season keys ('2024', 'null') -> season_id values"""
+    return [0 if season == "null" else int(season) for season in seasons]
+
+
+def _prune_seasons(conn, seasons, incoming):
+    """
+    Deletes rows of the given seasons that were not part of this load
+    (players dropped from a changed season, or whole removed seasons).
+    incoming: key codes of the rows loaded. Returns the number of rows deleted.
+    """
+    player, season = _stored_keys(conn, _season_values(seasons))
+    stale = ~np.isin(key_codes(player, season), incoming)
+    keys = pd.DataFrame({"player_id": player[stale], "season_id": season[stale]})
+    for table in FACT_TABLES:
+        _delete_keys(conn, table, keys)
+    return len(keys)
+
+
+def _checksum(row_hashes):
+    """
+    Order-independent 64-bit checksum of Row_Hash values: the sums of their
+    low and high 32-bit halves, so SQLite can compute it without overflowing
     """
-    print("Starting data load...")
+    hashes = np.asarray(row_hashes, dtype=np.int64).view(np.uint64)
+    low = int((hashes & 0xFFFFFFFF).sum())
+    high = int((hashes >> 32).sum())
+    return (low + (high << 32)) % 2 ** 64
 
-    # Connect to SQLite database (creates it if it doesn't exist)
-    conn = sqlite3.connect(db_path)
+
+class _StagedRows:
+    """Key and row hashes of every frame written to the staging table"""
+
+    def __init__(self):
+        self.key_hashes = []
+        self.row_hashes = []
+
+    def add(self, df):
+        self.key_hashes.append(pd.util.hash_pandas_object(df[KEY_COLUMNS], index=False).to_numpy())
+        self.row_hashes.append(df[HASH_COLUMN].to_numpy())
+
+    def expected(self):
+        """(row count, checksum) the table must have; later frames win on repeated keys"""
+        keys = np.concatenate(self.key_hashes)[::-1]
+        rows = np.concatenate(self.row_hashes)[::-1]
+        _, last = np.unique(keys, return_index=True)
+        return len(last), _checksum(rows[last])
+
+
+def _table_fingerprint(conn, table_name):
+    """(row count, checksum) of the Row_Hash values stored in table_name"""
+    count, low, high = conn.execute(
+        f'SELECT COUNT(*), IFNULL(SUM({HASH_COLUMN} & 4294967295), 0), '
+        f'IFNULL(SUM(({HASH_COLUMN} >> 32) & 4294967295), 0) FROM "{table_name}"'
+    ).fetchone()
+    return count, (low + (high << 32)) % 2 ** 64
+
+
+def _validate_staging(conn, staging_table, staged):
+    """Raises ValueError unless the staging table holds exactly the rows sent"""
+    expected_rows, expected_checksum = staged.expected()
+    rows, checksum = _table_fingerprint(conn, staging_table)
+    if rows != expected_rows:
+        raise ValueError(
+            f"staging table has {rows} rows, expected {expected_rows}"
+        )
+    if checksum != expected_checksum:
+        raise ValueError("staging table checksum does not match the rows sent")
+
+
+def _swap_in(conn, table_name, columns):
+    """
+    Replaces the fact tables with the validated staging ones, and table_name
+    (the view, or a wide table of an older database) with the view over them
+    """
+    # Dropped first: a view over a dropped table would fail the renames
+    drop_view_or_table(conn, table_name)
+    for table in FACT_TABLES:
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(f'ALTER TABLE "{table}{STAGING_SUFFIX}" RENAME TO "{table}"')
+    create_view(conn, table_name, columns)
+
+
+def _write_frames(conn, frames, table_name, mode, batch_size,
+                  prune_seasons=None, before_commit=None):
+    """
+    Writes an iterable of DataFrames into the star schema behind table_name
+    inside one transaction. A rebuild goes to staging fact tables that
+    replace the live ones only after their row count and checksum match what
+    was sent. Rows validate_frame set aside go to the quarantine table,
+    replacing those of the reloaded data.
+    Returns (rows_seen, rows_written, rebuilt, validation counts).
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    rows_seen = rows_written = 0
+    rebuilt = False
+    suffix = ""
+    columns = None
+    staged = _StagedRows()
+    incoming = []
+    touched = set()  # season_ids written or pruned by an upsert
+    spellings = set()
+    validation = {}
+
+    ensure_dimensions(conn)
+    for i, df in enumerate(frames):
+        spellings.update(df.attrs.pop("player_spellings", ()))
+        quarantined, counts = pop_validation(df)
+        with stage("load.insert", len(df)):
+            df = df.copy()
+            df[HASH_COLUMN] = compute_row_hashes(df)
+
+            if i == 0:
+                columns = list(df.columns)
+                rebuilt = (
+                    mode == "replace"
+                    or _table_columns(conn, table_name) != columns
+                    or not star_layout_available(conn, table_name)
+                )
+                if rebuilt:
+                    if mode == "upsert" and _table_columns(conn, table_name):
+                        print(f"Table '{table_name}' has an outdated layout, rebuilding it")
+                    suffix = STAGING_SUFFIX
+                    for table in FACT_TABLES:
+                        conn.execute(f'DROP TABLE IF EXISTS "{table}{suffix}"')
+                    create_fact_tables(conn, df, suffix)
+
+                # Quarantined rows of the data being replaced are validated again
+                if rebuilt or prune_seasons:
+                    clear_quarantine(conn, None if rebuilt else prune_seasons)
+
+            df = _add_keys(conn, df)
+            if rebuilt:
+                staged.add(df)
+                changed = df
+            else:
+                # Unchanged rows (same Row_Hash) are left untouched
+                changed = df[_changed_rows(conn, df)]
+                touched.update(changed["season_id"].unique().tolist())
+            _write_facts(conn, changed, suffix, fresh=rebuilt and i == 0, batch_size=batch_size)
+            if prune_seasons:
+                incoming.append(key_codes(df["player_id"].to_numpy(), df["season_id"].to_numpy()))
+            rows_seen += len(df)
+            rows_written += len(changed)
+
+        for name, n in (counts or {}).items():
+            validation[name] = validation.get(name, 0) + n
+            count(f"validate.{name}", n)
+        if quarantined is not None:
+            with stage("load.quarantine", len(quarantined)):
+                write_quarantine(conn, quarantined)
+
+    if rebuilt:
+        with stage("load.validate"):
+            _validate_staging(conn, f"{FACT_TABLE}{STAGING_SUFFIX}", staged)
+        with stage("load.swap"):
+            _swap_in(conn, table_name, columns)
+
+    if prune_seasons and not rebuilt:
+        with stage("load.prune"):
+            rows_written += _prune_seasons(conn, prune_seasons, np.concatenate(incoming or [[]]))
+            touched.update(_season_values(prune_seasons))
+
+    # Secondary indexes go on after a bulk rebuild (cheaper than maintaining
+    # them row by row); on existing tables this is a no-op
+    with stage("load.indexes"):
+        create_indexes(conn, table_name)
+        if rebuilt:
+            analyze(conn)
+
+    # Derived tables and the data version only change when the data did
+    # (or when an older database doesn't have the derived tables yet)
+    if (rebuilt or rows_written or not aggregates_available(conn)
+            or not search_index_available(conn) or not leaderboard_available(conn)):
+        # Summary tables, the ranking index, the player dimension and the
+        # search index are rebuilt in the same transaction as the data
+        with stage("load.aggregates"):
+            if build_aggregate_tables(conn, table_name):
+                print("✔ Rebuilt aggregate tables")
+        with stage("load.leaderboard"):
+            if build_leaderboard(conn, table_name):
+                print("✔ Rebuilt leaderboard index")
+        if "Player_Name" in _table_columns(conn, table_name):
+            with stage("load.players"):
+                build_player_dimension(conn, table_name, spellings)
+
+        # Readers key their caches on the data version; the content hash is
+        # only recomputed for the seasons this load changed
+        with stage("load.data_version"):
+            version = bump_data_version(conn, FACT_TABLE, None if rebuilt else touched)
+        print(f"✔ Data version is now {version}")
+
+    if before_commit is not None:
+        before_commit(conn)
+
+    with stage("load.commit"):
+        conn.execute("COMMIT")
+    return rows_seen, rows_written, rebuilt, validation
+
+
+def load_frames_to_db(frames, db_path="data/ipl_stats.db", table_name="player_stats",
+                      mode="replace", batch_size=5000, prune_seasons=None, before_commit=None):
+    """
+    Loads an iterable of transformed DataFrames (e.g. CSV chunks) into a
+    SQLite database.
+
+    Rows are stored in the star schema of star_schema.py, with table_name
+    the view joining it back into the wide layout.
+    mode='replace' rebuilds the tables from the frames: rows go to staging
+    tables, which replace the live ones only if their row count and checksum
+    match what was sent.
+    mode='upsert' inserts new (Player_Name, Year) rows and updates existing
+    ones only when their Row_Hash changed; unchanged rows are left untouched.
+    prune_seasons (upsert only): season keys ('2024', 'null') whose complete
+    contents are in the frames; rows of those seasons not in the frames are deleted.
+    before_commit(conn) is called inside the transaction just before COMMIT.
+    Everything runs inside a single transaction, so readers never see a
+    dropped or half-written table, and frames are consumed one at a time.
+
+    Returns True on success, False if the load failed and was rolled back.
+    """
+    if mode not in ("replace", "upsert"):
+        raise ValueError(f"Unknown load mode: {mode}")
+
+    print(f"Starting data load ({mode})...")
+
+    # Connect to SQLite database (creates it if it doesn't exist).
+    # WAL mode lets dashboard readers keep querying while this writes.
+    conn = connect(db_path)
+    # Manage transactions explicitly so DDL and DML commit together
+    conn.isolation_level = None
 
     try:
-        # Load data into the database
-        # if_exists='replace' will drop the table if it exists and create a new one
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
+        with stage("load") as timed:
+            rows_seen, rows_written, rebuilt, validation = _write_frames(
+                conn, frames, table_name, mode, batch_size, prune_seasons, before_commit
+            )
+            timed.rows = rows_seen
+        # Cached analysis results of this process are stale from here on
+        # (other processes notice the new data version on their next call)
+        invalidate_query_caches()
         print(f"✅ Data loaded into table '{table_name}' in database '{db_path}'")
+        if validation.get("quarantined"):
+            print(f"⚠ {format_counts(validation)}; see the quarantine table")
+        if not rebuilt:
+            print(f"Rows inserted/updated: {rows_written} "
+                  f"(unchanged: {rows_seen - rows_written})")
 
         # Verify by showing row count
         cursor = conn.cursor()
-        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
         row_count = cursor.fetchone()[0]
         print(f"Total rows in database: {row_count}")
+        return True
 
     except Exception as e:
-        print(f"❌ Error loading data: {e}")
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        print(f"❌ Error loading data: {e} (rolled back, previous data unchanged)")
+        return False
     finally:
         conn.close()
 
+
+def load_data_to_db(df, db_path="data/ipl_stats.db", table_name="player_stats",
+                    mode="replace", batch_size=5000, prune_seasons=None, before_commit=None):
+    """
+    Loads the transformed DataFrame into a SQLite database.
+    See load_frames_to_db for the available modes and options.
+    """
+    return load_frames_to_db([df], db_path, table_name, mode=mode, batch_size=batch_size,
+                             prune_seasons=prune_seasons, before_commit=before_commit)
+
 if __name__ == "__main__":
     # For testing - load sample data
     # In real pipeline, this will be called from main script
@@ -36,4 +428,4 @@ if __name__ == "__main__":
         'Player_Name': ['Test Player 1', 'Test Player 2'],
         'Runs_Scored': [100, 200]
     })
-    load_data_to_db(df_sample)
\ No newline at end of file
+    load_data_to_db(df_sample)
@@ -0,0 +1,155 @@
+"""
+Load test for the JSON API (scripts/api.py).
+
+Sends GET requests from concurrent clients, each over its own keep-alive
+connection, cycling through a mix of endpoints, and reports requests/sec,
+latency percentiles and status counts. With --revalidate clients send back
+the ETag they last saw (If-None-Match), like a caching HTTP client would.
+
+Usage:
+    python scripts/load_test_api.py [--url http://127.0.0.1:8502]
+                                    [--requests 2000] [--concurrency 8]
+                                    [--revalidate] [--start]
+
+--start launches a local API server on a free port for the run.
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Request mix: leaderboards (all-time and by season), lookups, autocomplete
+DEFAULT_PATHS = [
+    "/top-run-scorers?limit=10",
+    "/top-wicket-takers?limit=10",
+    "/top-run-scorers?limit=25&offset=25",
+    "/top-run-scorers?years=2023,2024",
+    "/top-wicket-takers?years=2024",
+    "/players/Virat%20Kohli",
+    "/players/ms%20dhoni?years=2020,2021",
+    "/players?q=shar",
+]
+
+
+def _client(host, port, paths, n_requests, revalidate, results):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    etags = {}
+    latencies, statuses = [], Counter()
+    try:
+        for i in range(n_requests):
+            path = paths[i % len(paths)]
+            headers = {"If-None-Match": etags[path]} if revalidate and path in etags else {}
+            start = time.perf_counter()
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status] += 1
+            if response.getheader("ETag"):
+                etags[path] = response.getheader("ETag")
+    finally:
+        conn.close()
+    results.append((latencies, statuses))
+
+
+def run_load_test(url, n_requests, concurrency, paths=DEFAULT_PATHS, revalidate=False):
+    """Returns a summary dict: requests, seconds, rps, p50/p95/p99 (ms), statuses"""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    per_client = [n_requests // concurrency + (i < n_requests % concurrency)
+                  for i in range(concurrency)]
+    results = []
+    threads = [
+        threading.Thread(target=_client, args=(host, port, paths, n, revalidate, results))
+        for n in per_client if n
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client, _ in results for latency in client)
+    statuses = sum((client_statuses for _, client_statuses in results), Counter())
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+        "statuses": dict(statuses),
+    }
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server():
+    """Starts scripts/api.py on a free local port; returns (process, url)"""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(__file__), "api.py"), "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            conn.getresponse().read()
+            conn.close()
+            return process, url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("API server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the IPL stats API")
+    parser.add_argument("--url", default="http://127.0.0.1:8502")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--revalidate", action="store_true",
+                        help="send If-None-Match with the last ETag seen per path")
+    parser.add_argument("--start", action="store_true",
+                        help="start a local API server for the run")
+    args = parser.parse_args()
+
+    process = None
+    if args.start:
+        process, args.url = start_server()
+    try:
+        print(f"🚀 {args.requests:,} requests, {args.concurrency} clients -> {args.url}"
+              f"{' (revalidating)' if args.revalidate else ''}")
+        summary = run_load_test(args.url, args.requests, args.concurrency,
+                                revalidate=args.revalidate)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(f"   {summary['rps']:,.0f} requests/sec ({summary['requests']:,} in {summary['seconds']:.2f}s)")
+    print(f"   latency p50 {summary['p50_ms']:.2f} ms, p95 {summary['p95_ms']:.2f} ms, "
+          f"p99 {summary['p99_ms']:.2f} ms")
+    print(f"   statuses: {', '.join(f'{k}: {v:,}' for k, v in sorted(summary['statuses'].items()))}")
+    return 0 if all(status < 400 for status in summary["statuses"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Per-process memory of the dashboard's data model on synthetic data.
+
+Builds a database from a benchmark tier's synthetic rows (once; cached in
+data/bench/), then measures each model in a fresh process:
+
+- legacy: the former model, the whole player_stats table read into one
+  DataFrame (object names, float64/int64 stats), NULL-filled, plus the
+  df.copy() every session made of it
+- compact: the frames the dashboard builds now for the same sessions: the
+  shared per-player totals (all-time and the default seasons), the season
+  totals, the scatter rows and the player names. Frames are compacted and
+  shared by every session of the process.
+
+Reports the frames' memory (deep, including strings), the process RSS once
+they are built, and its peak RSS.
+
+Usage:
+    python scripts/measure_memory.py [--tier 1m] [--sessions 2]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
+
+from benchmark import BENCH_DIR, SEED, TIERS, tier_csv
+
+PROBE = """
+import json, sys
+sys.path.append({scripts!r})
+from db import connect
+from instrumentation import current_rss_mb, peak_rss_mb
+import measure_memory
+conn = connect({db_path!r}, readonly=True)
+start_rss = current_rss_mb()
+frames_mb, held = measure_memory.{model}(conn, {sessions})  # held stays alive
+print(json.dumps({{"frames_mb": frames_mb, "start_rss_mb": start_rss,
+                  "rss_mb": current_rss_mb(), "peak_rss_mb": peak_rss_mb()}}))
+"""
+
+
+def tier_db(tier):
+    """Path of the tier's database, built from its synthetic CSV on first use"""
+    path = os.path.join(BENCH_DIR, f"synthetic_{tier}_seed{SEED}.db")
+    if not os.path.exists(path):
+        from extract import extract_data
+        from load import load_data_to_db
+        from transform import transform_data
+
+        print(f"   building {path}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = transform_data(extract_data(tier_csv(tier)), verbose=False)
+            load_data_to_db(df, path + ".tmp", "player_stats")
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def _mb(df):
+    return df.memory_usage(index=True, deep=True).sum() / (1024 * 1024)
+
+
+def legacy(conn, sessions):
+    """
+    The former dashboard frame: SELECT *, fillna(0), one copy per session.
+    Returns (frames MB, the objects to keep alive while RSS is read).
+    """
+    import pandas as pd
+
+    df = pd.read_sql_query("SELECT * FROM player_stats", conn).fillna(0)
+    copies = [df.copy() for _ in range(sessions)]
+    return round(_mb(df) + sum(_mb(copy) for copy in copies), 1), [df, copies]
+
+
+def compact(conn, sessions):
+    """The frames behind the default view and the all-time charts, shared by sessions"""
+    import queries
+    from figure_cache import default_years
+
+    years = default_years(queries.fetch_years(conn))
+    held = []
+    for _ in range(sessions):
+        held.append([
+            queries.shared_player_totals(conn, (), ""),
+            queries.shared_player_totals(conn, years, ""),
+            queries.fetch_season_totals(conn, years, ""),
+            queries.fetch_rows(conn, ["Player_Name", "Year", "Runs_Scored", "Batting_Average",
+                                      "Batting_Strike_Rate"],
+                               years, "", extra_where="Runs_Scored > 100"),
+        ])
+    # Shared frames are counted once, however many sessions hold them
+    unique = {id(df): df for frames in held for df in frames}
+    # One tuple for every session (st.cache_resource)
+    names = tuple(queries.fetch_player_names(conn, years, ""))
+    names_mb = sum(sys.getsizeof(name) for name in names) / (1024 * 1024)
+    return round(sum(_mb(df) for df in unique.values()) + names_mb, 1), [held, names]
+
+
+def measure(db_path, model, sessions):
+    code = PROBE.format(scripts=os.path.dirname(os.path.abspath(__file__)),
+                        db_path=db_path, model=model, sessions=sessions)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the dashboard's in-process memory")
+    parser.add_argument("--tier", default="1m", choices=list(TIERS))
+    parser.add_argument("--sessions", type=int, default=2,
+                        help="concurrent sessions to simulate")
+    args = parser.parse_args()
+
+    print(f"🧠 Dashboard memory at {TIERS[args.tier]:,} rows, {args.sessions} session(s)")
+    print("=" * 50)
+    db_path = tier_db(args.tier)
+    for model in ("legacy", "compact"):
+        r = measure(db_path, model, args.sessions)
+        print(f"   {model:<8} frames {r['frames_mb']:>8.1f} MB   "
+              f"RSS {r['rss_mb']:>8.1f} MB (+{r['rss_mb'] - r['start_rss_mb']:.1f})   "
+              f"peak RSS {r['peak_rss_mb']:>8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+ETL metadata stored alongside the data in ipl_stats.db.
+
+The etl_metadata key/value table holds the data-version stamp written by
+the load step: a monotonically increasing data_version, a content_hash of
+player_stats and the load time. Readers key their caches on data_stamp()
+(version plus hash prefix), so a reload is picked up without restarting
+them and a rebuilt database that started again at version 1 isn't
+mistaken for the old one.
+
+The content hash is kept per season in etl_season_hashes (row count and an
+order-independent checksum of the Row_Hash values), so a load only rehashes
+the seasons it wrote or pruned; content_hash combines the season entries.
+Identical data gives the same hash however it was loaded.
+"""
+
+import hashlib
+import sqlite3
+from datetime import datetime
+
+METADATA_TABLE = "etl_metadata"
+SEASON_HASH_TABLE = "etl_season_hashes"
+
+
+def ensure_metadata_table(conn):
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{METADATA_TABLE}" '
+        "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    )
+
+
+def get_metadata(conn, key, default=None):
+    """Reads one metadata value (default if the table or key is missing)"""
+    try:
+        row = conn.execute(
+            f'SELECT value FROM "{METADATA_TABLE}" WHERE key = ?', [key]
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Table not created yet (database from before versioning)
+        return default
+    return row[0] if row else default
+
+
+def set_metadata(conn, key, value):
+    conn.execute(
+        f'INSERT INTO "{METADATA_TABLE}" (key, value) VALUES (?, ?) '
+        "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+        [key, str(value)],
+    )
+
+
+def get_data_version(conn):
+    """Current data version (0 if the database was never stamped)"""
+    return int(get_metadata(conn, "data_version", 0))
+
+
+def data_stamp(conn):
+    """'<data_version>.<content hash prefix>' of the database ('0.' if never stamped)"""
+    try:
+        values = dict(conn.execute(
+            f'SELECT key, value FROM "{METADATA_TABLE}" '
+            "WHERE key IN ('data_version', 'content_hash')"
+        ).fetchall())
+    except sqlite3.OperationalError:
+        # Table not created yet (database from before versioning)
+        values = {}
+    return f"{values.get('data_version', 0)}.{values.get('content_hash', '')[:16]}"
+
+
+def update_season_hashes(conn, fact_table, seasons=None, hash_column="Row_Hash"):
+    """
+    Recomputes the etl_season_hashes entries of the given season_ids from
+    fact_table (every season if None, or if there are no entries yet)
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", [SEASON_HASH_TABLE]
+    ).fetchone()
+    if not exists:
+        conn.execute(
+            f'CREATE TABLE "{SEASON_HASH_TABLE}" ('
+            "season_id INTEGER PRIMARY KEY, row_count INTEGER NOT NULL, "
+            "low_sum INTEGER NOT NULL, high_sum INTEGER NOT NULL)"
+        )
+        seasons = None
+    if seasons is None:
+        conn.execute(f'DELETE FROM "{SEASON_HASH_TABLE}"')
+        where, params = "", []
+    else:
+        seasons = sorted({int(season) for season in seasons})
+        if not seasons:
+            return
+        placeholders = ", ".join("?" for _ in seasons)
+        conn.execute(f'DELETE FROM "{SEASON_HASH_TABLE}" WHERE season_id IN ({placeholders})',
+                     seasons)
+        where, params = f" WHERE season_id IN ({placeholders})", seasons
+    # Sums of the low and high 32-bit halves: order-independent, no overflow
+    conn.execute(
+        f'INSERT INTO "{SEASON_HASH_TABLE}" '
+        f"SELECT season_id, COUNT(*), SUM({hash_column} & 4294967295), "
+        f"SUM(({hash_column} >> 32) & 4294967295) "
+        f'FROM "{fact_table}"{where} GROUP BY season_id',
+        params,
+    )
+
+
+def compute_content_hash(conn):
+    """SHA-1 over the per-season entries; identical for identical data"""
+    digest = hashlib.sha1()
+    for season_id, row_count, low_sum, high_sum in conn.execute(
+        f'SELECT season_id, row_count, low_sum, high_sum FROM "{SEASON_HASH_TABLE}" '
+        "ORDER BY season_id"
+    ):
+        digest.update(f"{season_id}:{row_count}:{low_sum}:{high_sum}\n".encode())
+    return digest.hexdigest()
+
+
+def bump_data_version(conn, fact_table, seasons=None):
+    """
+    Increments data_version and records the content hash and load time,
+    rehashing only the given season_ids of fact_table (all if None).
+    Runs on the caller's connection so it commits with the load transaction.
+    Returns the new version.
+    """
+    ensure_metadata_table(conn)
+    version = get_data_version(conn) + 1
+    update_season_hashes(conn, fact_table, seasons)
+    set_metadata(conn, "data_version", version)
+    set_metadata(conn, "content_hash", compute_content_hash(conn))
+    set_metadata(conn, "loaded_at", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    return version
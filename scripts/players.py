@@ -0,0 +1,272 @@
+"""
+Canonical player names, the player dimension and player search.
+
+Names are reduced to a match key (case-folded, accents and periods dropped,
+whitespace collapsed, initials joined), so 'MS Dhoni', 'M.S. Dhoni' and
+'ms  dhoni' are one player. The display name is derived from the key alone
+('MS Dhoni', 'Quinton de Kock', 'Jake Fraser-McGurk'), which keeps it
+identical across chunks and files. data/player_aliases.csv maps variant spellings to a
+canonical name, and pins display names the rules get wrong
+('AB de Villiers,AB de Villiers').
+
+The load step records every player in dim_player (stable player_id per
+key, also the player key of the fact tables in star_schema.py) and every
+spelling seen in player_alias, and indexes the keys in the trigram FTS5
+table player_name_fts for substring, autocomplete and fuzzy lookups.
+"""
+
+import csv
+import difflib
+import functools
+import os
+import re
+import unicodedata
+
+DIM_TABLE = "dim_player"
+ALIAS_TABLE = "player_alias"
+KEY_TABLE = "player_name_key"
+SEARCH_TABLE = "player_name_fts"
+ALIASES_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "player_aliases.csv")
+
+# Lower-case name particles ('Faf du Plessis'), unless they start the name
+PARTICLES = {"de", "du", "da", "van", "der", "von", "la", "le", "ul"}
+
+_DROP_CHARS = re.compile(r"[^a-z0-9'\s\-]")
+# A single letter followed by another single letter: 'm s dhoni' -> 'ms dhoni'
+_SPLIT_INITIALS = re.compile(r"\b([a-z]) (?=[a-z]\b)")
+_VOWELS = re.compile(r"[aeiouy]")
+
+
+def name_key(name):
+    """Match key: 'M.S.  Dhoni' -> 'ms dhoni'"""
+    folded = str(name)
+    if not folded.isascii():
+        folded = unicodedata.normalize("NFKD", folded).encode("ascii", "ignore").decode()
+    folded = " ".join(_DROP_CHARS.sub("", folded.casefold().replace(".", " ")).split())
+    return _SPLIT_INITIALS.sub(r"\1", folded)
+
+
+@functools.lru_cache(maxsize=65536)
+def _display_word(word, first):
+    # Cached: names share most of their words
+    if not first and word in PARTICLES:
+        return word
+    letters = word.replace("'", "")
+    if len(letters) <= 3 and not _VOWELS.search(letters):
+        return word.upper()  # initials: 'ms' -> 'MS'
+    if word.startswith("mc") and len(word) > 2:
+        return "Mc" + word[2:].capitalize()
+    # 'o'brien' -> "O'Brien"
+    return "'".join(part.capitalize() for part in word.split("'"))
+
+
+def display_name(key):
+    """Canonical display name for a match key: 'ms dhoni' -> 'MS Dhoni'"""
+    words = []
+    for i, word in enumerate(key.split(" ")):
+        if "-" in word:
+            word = "-".join(_display_word(part, i == 0 and j == 0)
+                            for j, part in enumerate(word.split("-")))
+        else:
+            word = _display_word(word, i == 0)
+        words.append(word)
+    return " ".join(words)
+
+
+@functools.lru_cache(maxsize=None)
+def load_aliases(path=ALIASES_PATH):
+    """{alias key: canonical display name} from the alias CSV (alias,canonical)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8", newline="") as f:
+        return {
+            name_key(row["alias"]): row["canonical"].strip()
+            for row in csv.DictReader(f)
+            if row.get("alias") and row.get("canonical")
+        }
+
+
+def canonical_name(raw_name, aliases=None):
+    """The canonical display name of a raw name (after aliases)"""
+    aliases = load_aliases() if aliases is None else aliases
+    key = name_key(raw_name)
+    return aliases.get(key) or display_name(key)
+
+
+def ensure_player_tables(conn):
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{DIM_TABLE}" ('
+        "player_id INTEGER PRIMARY KEY, player_key TEXT NOT NULL UNIQUE, "
+        "Player_Name TEXT NOT NULL)"
+    )
+    # Exact-name lookups through the player_stats view (star_schema.py)
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS "ix_{DIM_TABLE}_name" ON "{DIM_TABLE}" (Player_Name)'
+    )
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{ALIAS_TABLE}" ('
+        "alias TEXT PRIMARY KEY, alias_key TEXT NOT NULL, "
+        f'player_id INTEGER NOT NULL REFERENCES "{DIM_TABLE}" (player_id))'
+    )
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS "ix_{ALIAS_TABLE}_key" ON "{ALIAS_TABLE}" (alias_key)'
+    )
+
+
+def add_players(conn, names):
+    """
+    {Player_Name: player_id} for the given canonical names, adding new
+    players to dim_player (ids never change once assigned). Caller commits.
+    """
+    ensure_player_tables(conn)
+    keys = {name: name_key(name) for name in names}
+    conn.executemany(
+        f'INSERT INTO "{DIM_TABLE}" (player_key, Player_Name) VALUES (?, ?) '
+        "ON CONFLICT (player_key) DO UPDATE SET Player_Name = excluded.Player_Name "
+        "WHERE Player_Name IS NOT excluded.Player_Name",
+        [(key, name) for name, key in keys.items()],
+    )
+    ids = dict(conn.execute(f'SELECT player_key, player_id FROM "{DIM_TABLE}"'))
+    return {name: ids[key] for name, key in keys.items()}
+
+
+def build_player_dimension(conn, table_name, spellings=()):
+    """
+    Records spellings [(raw name, canonical name)] and the alias file in
+    player_alias, and rebuilds the search index over the players of
+    table_name (added to dim_player as the load keyed their rows). Caller commits.
+    """
+    ensure_player_tables(conn)
+    aliases = [(raw, canonical) for raw, canonical in spellings if raw != canonical]
+    aliases += [(alias, canonical) for alias, canonical in load_aliases().items()]
+    conn.executemany(
+        f'INSERT OR REPLACE INTO "{ALIAS_TABLE}" (alias, alias_key, player_id) '
+        f'SELECT ?, ?, player_id FROM "{DIM_TABLE}" WHERE player_key = ?',
+        [(alias, name_key(alias), name_key(canonical)) for alias, canonical in aliases],
+    )
+    build_search_index(conn, table_name)
+
+
+def build_search_index(conn, table_name):
+    """
+    Rebuilds the search index over the players currently in table_name: one
+    row per match key (canonical and alias keys) in player_name_key, whose
+    key index serves prefix lookups, and the trigram FTS5 table
+    player_name_fts over it for substring and fuzzy lookups
+    """
+    conn.execute(f'DROP TABLE IF EXISTS "{SEARCH_TABLE}"')
+    conn.execute(f'DROP TABLE IF EXISTS "{KEY_TABLE}"')
+    conn.execute(
+        f'CREATE TABLE "{KEY_TABLE}" ('
+        "id INTEGER PRIMARY KEY, name_key TEXT NOT NULL, Player_Name TEXT NOT NULL)"
+    )
+    # One indexed probe per player, not a pass over every row of table_name
+    in_table = f'EXISTS (SELECT 1 FROM "{table_name}" t WHERE t.Player_Name = d.Player_Name)'
+    conn.execute(
+        f'INSERT INTO "{KEY_TABLE}" (name_key, Player_Name) '
+        f'SELECT d.player_key, d.Player_Name FROM "{DIM_TABLE}" d WHERE {in_table} '
+        f'UNION SELECT a.alias_key, d.Player_Name FROM "{ALIAS_TABLE}" a '
+        f'JOIN "{DIM_TABLE}" d USING (player_id) WHERE {in_table} '
+        "ORDER BY 1"
+    )
+    conn.execute(f'CREATE INDEX "ix_{KEY_TABLE}" ON "{KEY_TABLE}" (name_key)')
+    conn.execute(
+        f'CREATE VIRTUAL TABLE "{SEARCH_TABLE}" USING fts5('
+        f"name_key, Player_Name UNINDEXED, content='{KEY_TABLE}', content_rowid='id', "
+        "tokenize='trigram')"
+    )
+    conn.execute(f'INSERT INTO "{SEARCH_TABLE}" ("{SEARCH_TABLE}") VALUES (\'rebuild\')')
+
+
+def search_index_available(conn):
+    """True if the player search index (current layout) has been built"""
+    rows = conn.execute(f'PRAGMA table_info("{SEARCH_TABLE}")').fetchall()
+    return any(row[1] == "name_key" for row in rows)
+
+
+def search_pattern(text):
+    """LIKE pattern over name keys for a search box entry"""
+    return f"%{name_key(text)}%"
+
+
+def autocomplete(conn, text, limit=10):
+    """
+    Player names for a partially typed name, best first: whole-name prefix,
+    then word prefix, then substring matches. Each tier is a LIMITed index
+    lookup, so the cost does not grow with the number of matches.
+    """
+    key = name_key(text)
+    if not key:
+        return []
+    names = []
+
+    def add(rows):
+        for (player_name,) in rows:
+            if player_name not in names and len(names) < limit:
+                names.append(player_name)
+
+    # Whole-name prefix: range scan on the key index
+    add(conn.execute(
+        f'SELECT Player_Name FROM "{KEY_TABLE}" '
+        "WHERE name_key >= ? AND name_key < ? ORDER BY name_key LIMIT ?",
+        [key, key[:-1] + chr(ord(key[-1]) + 1), limit * 2],
+    ))
+    # Trigram LIKE needs at least 3 characters between wildcards
+    if len(key) >= 3:
+        for pattern in (f"% {key}%", f"%-{key}%", f"%{key}%"):
+            if len(names) >= limit:
+                break
+            add(conn.execute(
+                f'SELECT Player_Name FROM "{SEARCH_TABLE}" WHERE name_key LIKE ? LIMIT ?',
+                [pattern, limit * 2],
+            ))
+    return names
+
+
+def _trigram_query(key):
+    trigrams = {key[i:i + 3] for i in range(len(key) - 2)}
+    # Each trigram as a quoted FTS5 string; any match makes a candidate
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in sorted(trigrams))
+
+
+def fuzzy_search(conn, text, limit=5, cutoff=0.6, candidates=20):
+    """
+    [(Player_Name, score)] for a possibly misspelled name: the index returns
+    the keys sharing the most trigrams, which are then scored by similarity
+    """
+    key = name_key(text)
+    if len(key) < 3:
+        return []
+    rows = conn.execute(
+        f'SELECT name_key, Player_Name FROM "{SEARCH_TABLE}" '
+        f'WHERE "{SEARCH_TABLE}" MATCH ? ORDER BY rank LIMIT ?',
+        [_trigram_query(key), candidates],
+    ).fetchall()
+
+    best = {}
+    matcher = difflib.SequenceMatcher()
+    matcher.set_seq2(key)  # seq2 is the side SequenceMatcher preprocesses
+    for row_key, player_name in rows:
+        matcher.set_seq1(row_key)
+        # quick_ratio() is an upper bound of ratio(), at a fraction of the cost
+        if matcher.quick_ratio() < cutoff:
+            continue
+        score = matcher.ratio()
+        if score >= cutoff and score > best.get(player_name, 0):
+            best[player_name] = score
+    return sorted(best.items(), key=lambda item: -item[1])[:limit]
+
+
+def resolve_player(conn, text):
+    """Canonical name for a typed name: exact key or alias, else the best fuzzy match"""
+    key = name_key(text)
+    row = conn.execute(
+        f'SELECT Player_Name FROM "{DIM_TABLE}" WHERE player_key = ? '
+        f'UNION ALL SELECT d.Player_Name FROM "{ALIAS_TABLE}" a '
+        f'JOIN "{DIM_TABLE}" d USING (player_id) WHERE a.alias_key = ? LIMIT 1',
+        [key, key],
+    ).fetchone()
+    if row:
+        return row[0]
+    matches = fuzzy_search(conn, text, limit=1)
+    return matches[0][0] if matches else None
@@ -0,0 +1,350 @@
+"""
+Query-backed filter layer for the dashboard.
+
+The sidebar filters (selected years, player search) are pushed down into
+parameterized SQL, and each view fetches only the columns it needs, so the
+app never holds or copies the whole player_stats table.
+
+NULL stats are returned as 0 (the dashboard's historical fillna behaviour).
+Averages over several seasons are ratios of totals (runs / dismissals),
+read precomputed from the metric tables where the filters allow it.
+
+pandas is imported by the functions that return DataFrames, on first use:
+the sidebar's queries return plain Python values and start without it.
+
+DataFrames are compacted before they are returned (categorical player
+names where they repeat, the narrowest integer type per count, float32
+rates) instead of the object/int64/float64 columns read_sql_query
+produces. Per-player
+totals, which most charts start from, are shared process-wide per filter
+state (shared_player_totals); callers treat them as read-only and derive
+their views with boolean masks, sorts and head().
+"""
+
+from aggregates import aggregates_available
+from db import database_path
+from leaderboard import leaderboard_available, top_players
+from lru import LRUCache
+from metadata import data_stamp
+from players import search_index_available, search_pattern
+
+# Columns the dashboard shows with NULL replaced by 0
+ZERO_FILLED_COLUMNS = [
+    "Runs_Scored", "Wickets_Taken", "Centuries", "Half_Centuries",
+    "Batting_Average", "Bowling_Average", "Year",
+]
+
+
+# Shared per-player totals: one frame per (database, data stamp, years, search)
+SHARED_FRAMES_MAX_ENTRIES = 16
+SHARED_FRAMES_MAX_BYTES = 256 * 1024 * 1024
+
+
+def frame_nbytes(df):
+    """Memory held by a frame, including the strings of object/category columns"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+_shared_player_totals = LRUCache(
+    max_entries=SHARED_FRAMES_MAX_ENTRIES, max_bytes=SHARED_FRAMES_MAX_BYTES, sizeof=frame_nbytes
+)
+
+
+def compact_frame(df):
+    """df with compact column types (see module docstring)"""
+    import numpy as np
+    import pandas as pd
+
+    # Rebuilt from the column arrays: DataFrame.astype() with a per-column
+    # dtype map costs milliseconds even on a few hundred rows
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if col == "Player_Name":
+            # Codes only pay off when names repeat (season rows, not per-player
+            # totals). Categories are in order of appearance: sorting them would
+            # cost more than the query, and no view sorts by name
+            codes, names = pd.factorize(values)
+            if len(names) <= len(values) // 2:
+                values = pd.Categorical.from_codes(codes, names)
+        elif values.dtype.kind == "i" and len(values):
+            low, high = values.min(), values.max()
+            values = values.astype(next(
+                t for t in (np.int8, np.int16, np.int32, np.int64)
+                if np.iinfo(t).min <= low and high <= np.iinfo(t).max
+            ))
+        elif values.dtype.kind == "f":
+            values = values.astype(np.float32)
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def like_pattern(player_search):
+    """Case-insensitive substring LIKE pattern with % and _ taken literally"""
+    escaped = (
+        player_search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+    return f"%{escaped}%"
+
+
+def build_where(years=None, player_search=None, conn=None):
+    """
+    Returns (sql, params) for the year and player filters;
+    sql is an empty string when no filter is active.
+    Given conn, a player search goes through the name index (matching any
+    spelling or alias) when the database has one, instead of a LIKE scan.
+    """
+    clauses, params = [], []
+    if years:
+        clauses.append(f"Year IN ({', '.join('?' for _ in years)})")
+        params += [int(year) for year in years]
+    if player_search:
+        if conn is not None and search_index_available(conn):
+            clauses.append(
+                "Player_Name IN (SELECT Player_Name FROM player_name_fts WHERE name_key LIKE ?)"
+            )
+            params.append(search_pattern(player_search))
+        else:
+            clauses.append("Player_Name LIKE ? ESCAPE '\\'")
+            params.append(like_pattern(player_search))
+    if not clauses:
+        return "", params
+    return " WHERE " + " AND ".join(clauses), params
+
+
+def _select_list(columns):
+    parts = []
+    for col in columns:
+        if col in ZERO_FILLED_COLUMNS:
+            parts.append(f'IFNULL("{col}", 0) AS "{col}"')
+        else:
+            parts.append(f'"{col}"')
+    return ", ".join(parts)
+
+
+def _season_rows_source(conn):
+    """
+    agg_player_season (one indexed row per player-season, zero-filled) when
+    built, else player_stats, for queries over the columns they share. Sums
+    are the same, and the table skips the joins behind the player_stats view.
+    """
+    return "agg_player_season" if aggregates_available(conn) else "player_stats"
+
+
+def fetch_years(conn):
+    """Distinct valid seasons, ascending"""
+    # agg_season has one row per season: no scan of player_stats
+    source = "agg_season" if aggregates_available(conn) else "player_stats"
+    rows = conn.execute(
+        f"SELECT DISTINCT Year FROM {source} WHERE Year > 0 ORDER BY Year"
+    ).fetchall()
+    return [int(row[0]) for row in rows]
+
+
+def fetch_overview(conn):
+    """Players and seasons in the whole table (with a season), for the sidebar"""
+    if aggregates_available(conn):
+        row = conn.execute("SELECT Players, Seasons FROM agg_overview").fetchone()
+    else:
+        row = conn.execute(
+            "SELECT COUNT(DISTINCT Player_Name), COUNT(DISTINCT Year) "
+            "FROM player_stats WHERE Year > 0"
+        ).fetchone()
+    return {"Players": row[0], "Seasons": row[1]}
+
+
+def fetch_rows(conn, columns, years=None, player_search=None,
+               extra_where=None, extra_params=(), order_by=None):
+    """
+    Filtered player_stats rows restricted to `columns`.
+    extra_where is an additional SQL condition with extra_params as its parameters.
+    """
+    import pandas as pd
+
+    where, params = build_where(years, player_search, conn)
+    if extra_where:
+        where = (where + " AND " if where else " WHERE ") + extra_where
+        params += list(extra_params)
+    query = f"SELECT {_select_list(columns)} FROM player_stats{where}"
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    df = pd.read_sql_query(query, conn, params=params)
+    if "Year" in df.columns:
+        df["Year"] = df["Year"].astype(int)
+    return compact_frame(df)
+
+
+def fetch_summary(conn, years=None, player_search=None):
+    """
+    Headline metrics for the filtered rows: players, total runs,
+    total wickets and the batting average (total runs / total dismissals)
+    """
+    where, params = build_where(years, player_search, conn)
+    query = f"""
+    SELECT COUNT(DISTINCT Player_Name) AS Players,
+           IFNULL(SUM(Runs_Scored), 0) AS Total_Runs,
+           IFNULL(SUM(Wickets_Taken), 0) AS Total_Wickets,
+           1.0 * SUM(Runs_Scored) / NULLIF(SUM(Dismissals), 0) AS Batting_Average
+    FROM {_season_rows_source(conn)}{where}
+    """
+    row = conn.execute(query, params).fetchone()
+    return {
+        "Players": row[0],
+        "Total_Runs": row[1],
+        "Total_Wickets": row[2],
+        "Batting_Average": row[3] if row[3] is not None else 0.0,
+    }
+
+
+def fetch_player_names(conn, years=None, player_search=None):
+    """Sorted distinct player names matching the filters"""
+    where, params = build_where(years, player_search, conn)
+    rows = conn.execute(
+        f"SELECT DISTINCT Player_Name FROM {_season_rows_source(conn)}{where} ORDER BY Player_Name",
+        params,
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def fetch_player_totals(conn, years=None, player_search=None):
+    """
+    Per-player totals over the filtered seasons:
+    Player_Name, Runs_Scored, Centuries, Half_Centuries, Wickets_Taken,
+    Batting_Average and Bowling_Average (NULL without dismissals / wickets).
+    Reads the aggregate tables when they exist, else groups player_stats.
+    """
+    import pandas as pd
+
+    where, params = build_where(years, player_search, conn)
+    if aggregates_available(conn) and not years:
+        # Career rates were computed at load time
+        query = f"""
+        SELECT Player_Name,
+               c.Total_Runs AS Runs_Scored,
+               c.Total_Centuries AS Centuries,
+               c.Total_Half_Centuries AS Half_Centuries,
+               c.Total_Wickets AS Wickets_Taken,
+               m.Batting_Average,
+               m.Bowling_Average
+        FROM agg_player_career c
+        LEFT JOIN agg_player_metrics m USING (Player_Name){where}
+        """
+    else:
+        # agg_player_season is already zero-filled; player_stats needs IFNULL
+        source = _season_rows_source(conn)
+        query = f"""
+        SELECT Player_Name,
+               SUM(IFNULL(Runs_Scored, 0)) AS Runs_Scored,
+               SUM(IFNULL(Centuries, 0)) AS Centuries,
+               SUM(IFNULL(Half_Centuries, 0)) AS Half_Centuries,
+               SUM(IFNULL(Wickets_Taken, 0)) AS Wickets_Taken,
+               1.0 * SUM(Runs_Scored) / NULLIF(SUM(Dismissals), 0) AS Batting_Average,
+               1.0 * SUM(Runs_Conceded) / NULLIF(SUM(Wickets_Taken), 0) AS Bowling_Average
+        FROM {source}{where}
+        GROUP BY Player_Name
+        """
+    return compact_frame(pd.read_sql_query(query, conn, params=params))
+
+
+def shared_player_totals(conn, years=None, player_search=None):
+    """
+    fetch_player_totals, shared by every caller in the process for the same
+    database, data stamp and filters. The frame is read-only: never modify it.
+    """
+    key = (database_path(conn), data_stamp(conn),
+           tuple(sorted(int(y) for y in years or ())), player_search or "")
+    df = _shared_player_totals.get(key)
+    if df is None:
+        df = fetch_player_totals(conn, years, player_search)
+        _shared_player_totals.put(key, df)
+    return df
+
+
+def fetch_leaders(conn, order_by, limit, years=None, player_search=None,
+                  ascending=False, minimums=None):
+    """
+    Top `limit` players by a per-player total or rate over the filtered
+    seasons (Runs_Scored, Wickets_Taken, Bowling_Average, ...): Player_Name,
+    order_by and the minimums' columns. minimums: {column: lowest value kept}.
+    Ranked by the leaderboard index without a player search, else by
+    sorting the shared per-player totals.
+    """
+    minimums = minimums or {}
+    columns = [col for col in minimums if col != order_by]
+    if not player_search and leaderboard_available(conn):
+        return top_players(conn, order_by, limit, years=years, ascending=ascending,
+                           minimums=minimums, columns=columns)
+
+    player_totals = shared_player_totals(conn, years, player_search)
+    leaders = player_totals[["Player_Name", order_by] + columns]
+    for col, minimum in minimums.items():
+        leaders = leaders[leaders[col] >= minimum]
+    leaders = leaders[leaders[order_by].notna()]  # rates without a denominator
+    return leaders.sort_values(order_by, ascending=ascending).head(limit)
+
+
+def fetch_season_totals(conn, years=None, player_search=None):
+    """
+    Per-season totals (Year, Runs_Scored, Wickets_Taken, Batting_Average,
+    Bowling_Average). agg_season has no per-player breakdown, so a player
+    search is answered from the season rows.
+    """
+    import pandas as pd
+
+    where, params = build_where(years, player_search, conn)
+    if aggregates_available(conn) and not player_search:
+        query = f"""
+        SELECT Year, Runs_Scored, Wickets_Taken, Batting_Average, Bowling_Average
+        FROM agg_season{where}
+        ORDER BY Year
+        """
+    else:
+        query = f"""
+        SELECT IFNULL(Year, 0) AS Year,
+               SUM(IFNULL(Runs_Scored, 0)) AS Runs_Scored,
+               SUM(IFNULL(Wickets_Taken, 0)) AS Wickets_Taken,
+               IFNULL(1.0 * SUM(Runs_Scored) / NULLIF(SUM(Dismissals), 0), 0) AS Batting_Average,
+               IFNULL(1.0 * SUM(Runs_Conceded) / NULLIF(SUM(Wickets_Taken), 0), 0) AS Bowling_Average
+        FROM {_season_rows_source(conn)}{where}
+        GROUP BY IFNULL(Year, 0)
+        ORDER BY Year
+        """
+    return compact_frame(pd.read_sql_query(query, conn, params=params))
+
+
+def fetch_player_career(conn, player_name):
+    """
+    Career metrics of one player from agg_player_metrics (Batting_Average,
+    Strike_Rate, Economy_Rate, Boundary_Percentage, ...), or None
+    """
+    import pandas as pd
+
+    if not aggregates_available(conn):
+        return None
+    df = pd.read_sql_query(
+        "SELECT * FROM agg_player_metrics WHERE Player_Name = ?", conn, params=[player_name]
+    )
+    if df.empty:
+        return None
+    # No dismissals / wickets / balls: the rate is None
+    return {col: (None if pd.isna(value) else value) for col, value in df.iloc[0].items()}
+
+
+def fetch_player_seasons(conn, player_name, columns, years=None):
+    """
+    One player's season rows (`columns` of player_stats) with the rolling
+    and year-over-year metrics of agg_player_season_metrics, by Year
+    """
+    import pandas as pd
+
+    df = fetch_rows(
+        conn, columns, years,
+        extra_where="Player_Name = ?", extra_params=[player_name], order_by="Year",
+    )
+    if not aggregates_available(conn):
+        return df
+    metrics = pd.read_sql_query(
+        "SELECT * FROM agg_player_season_metrics WHERE Player_Name = ?",
+        conn, params=[player_name],
+    ).drop(columns="Player_Name")
+    return compact_frame(df.merge(metrics, on="Year", how="left"))
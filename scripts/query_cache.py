@@ -0,0 +1,178 @@
+"""
+Memoized query results for analysis.py.
+
+QueryCache.memoize wraps a function returning a DataFrame. Results are
+keyed on (data stamp, function, arguments), with arguments bound to the
+function's signature (defaults filled in, sequences such as `years` sorted),
+so get_top_run_scorers(10) and get_top_run_scorers(limit=10, offset=0)
+share an entry.
+
+- Results are kept in an in-process LRU (lru.LRUCache) bounded by entry
+  count and total bytes.
+- With a disk directory set, results are also pickled there, one file per
+  entry, so a restarted process (or another one on the same machine) skips
+  the query too. Files are written atomically;
+  the directory must only be writable by trusted users (pickle).
+- Entries are only ever read back for the data they were built from: the
+  data version and content hash (etl_metadata), read on every call with one
+  indexed lookup. The hash tells apart a rebuilt database that started
+  again at version 1. The first call that sees new data drops the older
+  entries from memory and disk. load_data_to_db also invalidates every cache of its own process
+  right after it commits.
+
+Callers get a copy of the cached frame, so they may modify it.
+hits / misses count memory lookups; disk_hits the misses found on disk.
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+
+from db import DEFAULT_DB_PATH, get_pool
+from lru import LRUCache
+from metadata import data_stamp
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+# Where the optional disk cache goes by default (e.g. api.py --query-cache-dir)
+DEFAULT_DISK_DIR = "data/query_cache"
+
+# Every QueryCache of the process, for invalidate_all()
+_caches = []
+
+
+def _frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _normalize(value):
+    """Hashable, order-independent form of an argument (lists, tuples and sets sorted)"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(value, key=str))
+    return value
+
+
+class QueryCache:
+    """LRU (plus optional disk) cache of DataFrame results, keyed on the data version"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 disk_dir=None, db_path=DEFAULT_DB_PATH):
+        self.memory = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=_frame_nbytes)
+        self.disk_dir = disk_dir
+        self.db_path = db_path
+        self.disk_hits = 0
+        self.disk_writes = 0
+        self._stamp = None
+        self._lock = threading.Lock()
+        _caches.append(self)
+
+    @property
+    def hits(self):
+        return self.memory.hits
+
+    @property
+    def misses(self):
+        return self.memory.misses
+
+    def stats(self):
+        """Counters for monitoring (e.g. the API's /health)"""
+        return {
+            "entries": len(self.memory), "bytes": self.memory.size_bytes,
+            "hits": self.hits, "misses": self.misses,
+            "disk_hits": self.disk_hits, "disk_writes": self.disk_writes,
+        }
+
+    def invalidate(self):
+        """Drops every entry (memory and disk)"""
+        with self._lock:
+            self._stamp = None
+            self._clear(keep_stamp=None)
+
+    def _clear(self, keep_stamp):
+        self.memory.clear()
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return
+        keep = f"{keep_stamp}-" if keep_stamp is not None else None
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".pkl") and not (keep and name.startswith(keep)):
+                try:
+                    os.remove(os.path.join(self.disk_dir, name))
+                except OSError:  # removed by another process
+                    pass
+
+    def _current_stamp(self):
+        """data_stamp of the database; entries of any other stamp are dropped on a change"""
+        with get_pool(self.db_path).connection() as conn:
+            stamp = data_stamp(conn)
+        with self._lock:
+            if stamp != self._stamp:
+                if self._stamp is not None:
+                    self._clear(keep_stamp=stamp)
+                self._stamp = stamp
+        return stamp
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key[1:]).encode()).hexdigest()
+        return os.path.join(self.disk_dir, f"{key[0]}-{digest}.pkl")
+
+    def _read_disk(self, key):
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                stored_key, df = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # A digest collision would return another query's result
+        return df if stored_key == key else None
+
+    def _write_disk(self, key, df):
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((key, df), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            self.disk_writes += 1
+        except OSError:  # the disk cache is best effort
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def lookup(self, name, args, compute):
+        """Cached result of compute() for (name, args), computing and storing it on a miss"""
+        key = (self._current_stamp(), name, args)
+        df = self.memory.get(key)
+        if df is None:
+            if self.disk_dir:
+                df = self._read_disk(key)
+                if df is not None:
+                    self.disk_hits += 1
+            if df is None:
+                df = compute()
+                if self.disk_dir:
+                    self._write_disk(key, df)
+            self.memory.put(key, df)
+        return df.copy()
+
+    def memoize(self, func):
+        """Decorator caching func's results (see module docstring)"""
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key_args = tuple((name, _normalize(value)) for name, value in bound.arguments.items())
+            return self.lookup(func.__qualname__, key_args, lambda: func(*args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+
+
+def invalidate_all():
+    """Drops the entries of every QueryCache in this process"""
+    for cache in _caches:
+        cache.invalidate()
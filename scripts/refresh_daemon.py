@@ -0,0 +1,193 @@
+"""
+Long-running refresh service: reloads the database whenever the source
+CSVs change, replacing the scheduled one-shot update_data.py runs.
+
+- Watches the raw data directory by polling a cheap stat snapshot
+  (name, size, mtime of each source file) every --interval seconds.
+- Debounces bursts: a reload starts once the directory has been quiet for
+  --debounce seconds (or --max-delay seconds after the first change, if
+  writes never stop).
+- Each reload is update_data.update_database: incremental (only changed
+  seasons are re-read and upserted), recorded in pipeline_runs and the
+  update log, with the figure cache warmed afterwards.
+- Stays warm between runs: pandas and the pipeline modules are imported
+  once, and the change checks reuse one open read connection.
+- A failed reload is retried with exponential backoff (--retry-min up to
+  --retry-max seconds), even if nothing changes on disk in between.
+
+Polling keeps the service dependency-free and identical on Linux, macOS and
+Windows; a stat of one directory per second is negligible next to a reload.
+
+Usage (from the project root):
+    python scripts/refresh_daemon.py [--source-dir data/raw] [--interval 1]
+                                     [--debounce 5] [--max-delay 60]
+                                     [--retry-min 5] [--retry-max 600]
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(__file__))  # Add scripts folder to path
+
+# Imported once for the daemon's lifetime (pandas, the pipeline, the loader)
+import update_data
+from db import DEFAULT_DB_PATH, connect
+from ingest import RAW_DATA_DIR, SOURCE_PATTERN, discover_source_files
+
+DEFAULT_INTERVAL = 1.0
+DEFAULT_DEBOUNCE = 5.0
+DEFAULT_MAX_DELAY = 60.0
+DEFAULT_RETRY_MIN = 5.0
+DEFAULT_RETRY_MAX = 600.0
+
+
+def source_snapshot(source_dir=RAW_DATA_DIR, pattern=SOURCE_PATTERN):
+    """{path: (size, mtime_ns)} of the source files; cheap enough to poll"""
+    snapshot = {}
+    for path in discover_source_files(source_dir, pattern):
+        try:
+            st = os.stat(path)
+        except OSError:  # removed between listing and stat
+            continue
+        snapshot[path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+
+def backoff_delay(failures, retry_min=DEFAULT_RETRY_MIN, retry_max=DEFAULT_RETRY_MAX):
+    """Seconds to wait after the given number of consecutive failures"""
+    return min(retry_max, retry_min * 2 ** max(0, failures - 1))
+
+
+class RefreshDaemon:
+    """Polls the source directory and runs debounced incremental reloads"""
+
+    def __init__(self, source_dir=RAW_DATA_DIR, db_path=DEFAULT_DB_PATH, workers=None,
+                 interval=DEFAULT_INTERVAL, debounce=DEFAULT_DEBOUNCE,
+                 max_delay=DEFAULT_MAX_DELAY, retry_min=DEFAULT_RETRY_MIN,
+                 retry_max=DEFAULT_RETRY_MAX, update=None):
+        self.source_dir = source_dir
+        self.db_path = db_path
+        self.workers = workers
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        # update(conn) -> bool; update_database by default
+        self.update = update or (
+            lambda conn: update_data.update_database(self.source_dir, self.workers, conn)
+        )
+        self.stop_event = threading.Event()
+        self.failures = 0
+        self.runs = 0
+        self._conn = None
+
+    def _reader(self):
+        """The warm read connection (opened once the database exists)"""
+        if self._conn is None and os.path.exists(self.db_path):
+            self._conn = connect(self.db_path, readonly=True)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stop(self, *_):
+        """Asks the loop to exit (a reload in progress finishes first)"""
+        self.stop_event.set()
+
+    def run_update(self):
+        """One reload; returns its success (failures are counted for the backoff)"""
+        self.runs += 1
+        started = time.perf_counter()
+        try:
+            success = self.update(self._reader())
+        except Exception as e:  # the daemon outlives any single failed run
+            logging.error(f"Refresh failed: {e}")
+            success = False
+        elapsed = time.perf_counter() - started
+        if success:
+            self.failures = 0
+            print(f"✅ Refresh done in {elapsed:.2f}s")
+        else:
+            self.failures += 1
+            delay = backoff_delay(self.failures, self.retry_min, self.retry_max)
+            print(f"❌ Refresh failed ({self.failures} in a row), retrying in {delay:.0f}s")
+            logging.warning(f"Refresh failed {self.failures} time(s) in a row; "
+                            f"retrying in {delay:.0f}s")
+        return success
+
+    def _refresh(self):
+        """run_update(); returns when to retry (monotonic time), None after a success"""
+        if self.run_update():
+            return None
+        return time.monotonic() + backoff_delay(self.failures, self.retry_min, self.retry_max)
+
+    def run(self):
+        """Runs until stop() (or SIGINT/SIGTERM via main())"""
+        print(f"👀 Watching {self.source_dir} (poll {self.interval}s, debounce {self.debounce}s)")
+        logging.info(f"Refresh daemon started, watching {self.source_dir}")
+        snapshot = source_snapshot(self.source_dir)
+        # Catch up on anything that changed while the daemon wasn't running
+        retry_at = self._refresh()
+        first_change = last_change = None
+
+        while not self.stop_event.wait(self.interval):
+            now = time.monotonic()
+            current = source_snapshot(self.source_dir)
+            if current != snapshot:
+                snapshot = current
+                last_change = now
+                first_change = first_change or now
+
+            quiet = last_change is not None and now - last_change >= self.debounce
+            overdue = first_change is not None and now - first_change >= self.max_delay
+            retry_due = retry_at is not None and now >= retry_at
+            if not (quiet or overdue or retry_due):
+                continue
+
+            print("🔄 Source files changed, refreshing" if first_change is not None
+                  else "🔄 Retrying refresh")
+            first_change = last_change = None
+            retry_at = self._refresh()
+
+        self.close()
+        logging.info("Refresh daemon stopped")
+        print("👋 Refresh daemon stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reload the IPL database when source files change")
+    parser.add_argument("--source-dir", default=RAW_DATA_DIR)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="extract/transform worker processes (default: one per core)")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between polls of the source directory")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help="quiet seconds after the last change before reloading")
+    parser.add_argument("--max-delay", type=float, default=DEFAULT_MAX_DELAY,
+                        help="reload at most this long after the first change of a burst")
+    parser.add_argument("--retry-min", type=float, default=DEFAULT_RETRY_MIN,
+                        help="first retry delay after a failed reload (doubles per failure)")
+    parser.add_argument("--retry-max", type=float, default=DEFAULT_RETRY_MAX)
+    args = parser.parse_args()
+
+    daemon = RefreshDaemon(
+        args.source_dir, workers=args.workers, interval=args.interval,
+        debounce=args.debounce, max_delay=args.max_delay,
+        retry_min=args.retry_min, retry_max=args.retry_max,
+    )
+    signal.signal(signal.SIGINT, daemon.stop)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, daemon.stop)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()
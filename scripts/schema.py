@@ -0,0 +1,128 @@
+"""
+Declared column schema for the raw IPL player statistics CSV.
+
+Dtypes, NA markers and converters are applied by pandas while parsing, so the
+transform step does not need extra passes over the frame to fix types.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# Marker used in the raw data for seasons without any recorded stats
+NA_VALUES = ["No stats"]
+
+# Compact dtypes: nullable integers for counts, float32 for rates and
+# a categorical for the (highly repetitive) player name.
+COLUMN_SCHEMA = {
+    "Year": "Int16",
+    "Player_Name": "category",
+    "Matches_Batted": "Int16",
+    "Not_Outs": "Int16",
+    "Runs_Scored": "Int32",
+    "Highest_Score": "Int16",
+    "Batting_Average": "float32",
+    "Balls_Faced": "Int32",
+    "Batting_Strike_Rate": "float32",
+    "Centuries": "Int16",
+    "Half_Centuries": "Int16",
+    "Fours": "Int16",
+    "Sixes": "Int16",
+    "Catches_Taken": "Int16",
+    "Stumpings": "Int16",
+    "Matches_Bowled": "Int16",
+    "Balls_Bowled": "Int32",
+    "Runs_Conceded": "Int32",
+    "Wickets_Taken": "Int16",
+    "Best_Bowling_Match": "object",
+    "Bowling_Average": "float32",
+    "Economy_Rate": "float32",
+    "Bowling_Strike_Rate": "float32",
+    "Four_Wicket_Hauls": "Int16",
+    "Five_Wicket_Hauls": "Int16",
+}
+
+# Per-season metrics the transform derives from the raw columns
+# (transform.derive_season_metrics)
+DERIVED_SCHEMA = {
+    "Dismissals": "Int16",
+    "Innings": "Int16",
+    "Boundary_Runs": "Int32",
+    "Boundary_Percentage": "float32",
+    "Dismissal_Rate": "float32",
+}
+
+NUMERIC_COLUMNS = [
+    col for col, dtype in COLUMN_SCHEMA.items()
+    if dtype not in ("category", "object")
+]
+
+INT_COLUMNS = [col for col, dtype in COLUMN_SCHEMA.items() if dtype.startswith("Int")]
+
+
+def parse_highest_score(value):
+    """
+    Converter for Highest_Score: '37*' (not out) -> 37.0, 'No stats' -> NaN
+    Returns floats so pandas builds a float64 column without an object pass.
+    """
+    try:
+        return float(value.strip().rstrip("*"))
+    except ValueError:
+        return math.nan
+
+
+CONVERTERS = {
+    "Highest_Score": parse_highest_score,
+}
+
+
+def read_csv_options(columns):
+    """
+    Returns pd.read_csv keyword arguments (dtype, na_values, converters)
+    for the given CSV header columns. Unknown columns are read as strings.
+
+    Nullable integer columns are parsed as float64: the C parser has a fast
+    path for floats but falls back to Python objects for nullable integers.
+    apply_schema_dtypes then narrows them in one vectorized step.
+    """
+    dtype = {}
+    for col in columns:
+        if col in CONVERTERS:
+            continue
+        col_dtype = COLUMN_SCHEMA.get(col, "object")
+        dtype[col] = "float64" if col_dtype.startswith("Int") else col_dtype
+    return {
+        "dtype": dtype,
+        "na_values": NA_VALUES,
+        "converters": {col: fn for col, fn in CONVERTERS.items() if col in columns},
+    }
+
+
+def to_nullable_int(values, dtype):
+    """
+    Builds a nullable integer array from float values.
+    Non-integral or out-of-range values can't be represented and become NULL.
+    """
+    values = np.asarray(values, dtype="float64")
+    numpy_dtype = np.dtype(dtype.lower())
+    info = np.iinfo(numpy_dtype)
+    with np.errstate(invalid="ignore"):
+        mask = (
+            np.isnan(values)
+            | (values % 1 != 0)
+            | (values < info.min)
+            | (values > info.max)
+        )
+    data = np.where(mask, 0, values).astype(numpy_dtype)
+    return pd.arrays.IntegerArray(data, mask)
+
+
+def apply_schema_dtypes(df):
+    """
+    Narrows the float64-parsed integer columns to their nullable Int dtype
+    """
+    for col in INT_COLUMNS:
+        if col in df.columns and df[col].dtype == "float64":
+            df[col] = to_nullable_int(df[col].to_numpy(), COLUMN_SCHEMA[col])
+    return df
@@ -0,0 +1,304 @@
+"""
+Change detection for raw source files.
+
+The source_manifest table records, per source file, its size, mtime and a
+streaming SHA-1 of its content; source_season_hashes records a hash and row
+count per season (Year value) within the file. Comparing a fresh scan with
+the manifest tells the updater whether anything changed and, if so, exactly
+which seasons to re-load. The file is streamed line by line, never loaded
+into pandas.
+
+Files are recorded by their path relative to the source directory (with
+'/' separators), so a moved or copied checkout still matches its manifest.
+A full rebuild replaces the whole manifest in its load transaction
+(SourceChanges.record with replace=True).
+"""
+
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+from datetime import datetime
+
+MANIFEST_TABLE = "source_manifest"
+SEASON_TABLE = "source_season_hashes"
+
+# Season key for rows without a Year
+NULL_SEASON = "null"
+
+
+def season_key(raw_year):
+    """Normalizes a raw Year field ('2024.0', '2024', '') to a season key"""
+    raw_year = raw_year.strip()
+    if not raw_year:
+        return NULL_SEASON
+    try:
+        return str(int(float(raw_year)))
+    except ValueError:
+        return raw_year
+
+
+def manifest_key(path, source_dir):
+    """How a source file is recorded: its path relative to source_dir"""
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(source_dir)).replace(os.sep, "/")
+
+
+def ensure_manifest_tables(conn):
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{MANIFEST_TABLE}" ('
+        "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+        "file_hash TEXT NOT NULL, scanned_at TEXT NOT NULL)"
+    )
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{SEASON_TABLE}" ('
+        "path TEXT NOT NULL, season TEXT NOT NULL, season_hash TEXT NOT NULL, "
+        "row_count INTEGER NOT NULL, PRIMARY KEY (path, season))"
+    )
+
+
+class SourceScan:
+    """Result of streaming one source file"""
+
+    def __init__(self, path, size, mtime, file_hash, seasons):
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.file_hash = file_hash
+        self.seasons = seasons  # season -> (season_hash, row_count)
+
+
+def stat_source(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime
+
+
+def scan_source_file(path):
+    """
+    Streams the CSV once, computing the whole-file hash and a hash and
+    row count per season
+    """
+    size, mtime = stat_source(path)
+    file_digest = hashlib.sha1()
+    season_digests = {}
+    season_rows = {}
+
+    with open(path, "rb") as raw:
+        header = raw.readline()
+        file_digest.update(header)
+        columns = next(csv.reader([header.decode("utf-8-sig")]))
+        year_index = columns.index("Year")
+
+        for line in raw:
+            file_digest.update(line)
+            # Fast path: Year is normally the first column and unquoted
+            text = line.decode("utf-8")
+            if year_index == 0 and not text.startswith('"'):
+                raw_year = text.split(",", 1)[0]
+            else:
+                raw_year = next(csv.reader([text]))[year_index]
+            season = season_key(raw_year)
+            digest = season_digests.get(season)
+            if digest is None:
+                digest = season_digests[season] = hashlib.sha1()
+                season_rows[season] = 0
+            digest.update(line)
+            season_rows[season] += 1
+
+    seasons = {
+        season: (digest.hexdigest(), season_rows[season])
+        for season, digest in season_digests.items()
+    }
+    return SourceScan(os.path.abspath(path), size, mtime, file_digest.hexdigest(), seasons)
+
+
+def read_manifest(conn, key):
+    """(size, mtime, file_hash, {season: season_hash}) or None if never recorded"""
+    try:
+        row = conn.execute(
+            f'SELECT size, mtime, file_hash FROM "{MANIFEST_TABLE}" WHERE path = ?', [key]
+        ).fetchone()
+    except sqlite3.OperationalError:
+        # Table not created yet (nothing recorded)
+        return None
+    if row is None:
+        return None
+    seasons = dict(conn.execute(
+        f'SELECT season, season_hash FROM "{SEASON_TABLE}" WHERE path = ?', [key]
+    ).fetchall())
+    return row[0], row[1], row[2], seasons
+
+
+def recorded_paths(conn):
+    """Keys (manifest_key) of every source file in the manifest"""
+    try:
+        return [row[0] for row in conn.execute(f'SELECT path FROM "{MANIFEST_TABLE}"')]
+    except sqlite3.OperationalError:
+        return []
+
+
+def delete_manifest(conn, key):
+    """Forgets a source file that no longer exists (caller commits)"""
+    conn.execute(f'DELETE FROM "{MANIFEST_TABLE}" WHERE path = ?', [key])
+    conn.execute(f'DELETE FROM "{SEASON_TABLE}" WHERE path = ?', [key])
+
+
+def clear_manifest(conn):
+    """Forgets every source file, before a full rebuild records them again (caller commits)"""
+    ensure_manifest_tables(conn)
+    conn.execute(f'DELETE FROM "{MANIFEST_TABLE}"')
+    conn.execute(f'DELETE FROM "{SEASON_TABLE}"')
+
+
+def write_manifest(conn, scan, key):
+    """Records a scan as the current state of the file recorded as key (caller commits)"""
+    ensure_manifest_tables(conn)
+    conn.execute(
+        f'INSERT OR REPLACE INTO "{MANIFEST_TABLE}" VALUES (?, ?, ?, ?, ?)',
+        [key, scan.size, scan.mtime, scan.file_hash,
+         datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+    )
+    conn.execute(f'DELETE FROM "{SEASON_TABLE}" WHERE path = ?', [key])
+    conn.executemany(
+        f'INSERT INTO "{SEASON_TABLE}" VALUES (?, ?, ?, ?)',
+        [(key, season, season_hash, rows)
+         for season, (season_hash, rows) in scan.seasons.items()],
+    )
+
+
+class ChangeSet:
+    """What changed in a source file since it was last loaded"""
+
+    def __init__(self, scan=None, changed_seasons=(), removed_seasons=(), reason=""):
+        self.scan = scan
+        self.changed_seasons = sorted(changed_seasons)
+        self.removed_seasons = sorted(removed_seasons)
+        self.reason = reason
+
+    @property
+    def has_changes(self):
+        return bool(self.changed_seasons or self.removed_seasons)
+
+
+def detect_changes(conn, path, key):
+    """
+    Compares the file with its manifest entry, recorded as key (conn=None:
+    no database yet).
+    Unchanged size+mtime skips hashing entirely; otherwise the file is
+    streamed and only seasons with a different hash are reported.
+    """
+    manifest = read_manifest(conn, key) if conn is not None else None
+    if manifest is not None:
+        size, mtime, file_hash, season_hashes = manifest
+        if (size, mtime) == stat_source(path):
+            return ChangeSet(reason="size and mtime unchanged")
+
+    scan = scan_source_file(path)
+    if manifest is None:
+        return ChangeSet(scan, changed_seasons=scan.seasons, reason="first load of this file")
+
+    if scan.file_hash == file_hash:
+        # Touched or copied without content changes
+        return ChangeSet(scan, reason="content hash unchanged")
+
+    changed = [
+        season for season, (season_hash, _) in scan.seasons.items()
+        if season_hashes.get(season) != season_hash
+    ]
+    removed = [season for season in season_hashes if season not in scan.seasons]
+    return ChangeSet(scan, changed, removed, reason="content changed")
+
+
+class SourceChanges:
+    """What changed across a set of source files since they were last loaded"""
+
+    def __init__(self, changesets, removed_paths, file_seasons, keys):
+        self.changesets = changesets        # path -> ChangeSet
+        self.removed_paths = removed_paths  # key -> seasons, of recorded files that no longer exist
+        self.file_seasons = file_seasons    # path -> seasons the file holds now
+        self.keys = keys                    # path -> manifest key
+
+        reload = set()
+        for changeset in changesets.values():
+            reload.update(changeset.changed_seasons, changeset.removed_seasons)
+        for seasons in removed_paths.values():
+            reload.update(seasons)
+        self.seasons = sorted(reload)
+
+    @property
+    def has_changes(self):
+        return bool(self.seasons)
+
+    @property
+    def scans(self):
+        return [c.scan for c in self.changesets.values() if c.scan is not None]
+
+    def jobs(self):
+        """
+        (path, seasons) to re-read: every changed season is re-read from
+        every file holding it, since several files may share a season
+        """
+        reload = set(self.seasons)
+        jobs = []
+        for path, seasons in sorted(self.file_seasons.items()):
+            wanted = sorted(reload.intersection(seasons))
+            if wanted:
+                jobs.append((path, wanted))
+        return jobs
+
+    def record(self, conn, replace=False):
+        """
+        Writes the new manifest state (caller commits). replace: forget
+        every recorded file first (a full rebuild, scanned from scratch)
+        """
+        if replace:
+            clear_manifest(conn)
+        for scan in self.scans:
+            write_manifest(conn, scan, self.keys[scan.path])
+        for key in self.removed_paths:
+            delete_manifest(conn, key)
+
+
+def detect_source_changes(conn, paths, source_dir):
+    """
+    Compares each source file in source_dir with its manifest entry
+    (conn=None: no database yet, every file is scanned) and notices
+    recorded files that have been removed
+    """
+    keys = {os.path.abspath(path): manifest_key(path, source_dir) for path in paths}
+    changesets = {path: detect_changes(conn, path, key) for path, key in keys.items()}
+
+    file_seasons, removed_paths = {}, {}
+    for path, changeset in changesets.items():
+        if changeset.scan is not None:
+            file_seasons[path] = list(changeset.scan.seasons)
+        else:
+            file_seasons[path] = list(read_manifest(conn, keys[path])[3])
+    if conn is not None:
+        current = set(keys.values())
+        for key in recorded_paths(conn):
+            if key not in current:
+                removed_paths[key] = list(read_manifest(conn, key)[3])
+    return SourceChanges(changesets, removed_paths, file_seasons, keys)
+
+
+def read_season_rows(path, seasons):
+    """
+    Returns the header plus only the rows of the given seasons as a CSV
+    text buffer, streaming the file rather than parsing all of it
+    """
+    seasons = set(seasons)
+    buffer = io.StringIO()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        header = f.readline()
+        buffer.write(header)
+        year_index = next(csv.reader([header])).index("Year")
+        for line in f:
+            if year_index == 0 and not line.startswith('"'):
+                raw_year = line.split(",", 1)[0]
+            else:
+                raw_year = next(csv.reader([line]))[year_index]
+            if season_key(raw_year) in seasons:
+                buffer.write(line)
+    buffer.seek(0)
+    return buffer
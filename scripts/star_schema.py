@@ -0,0 +1,154 @@
+"""
+Normalized storage behind player_stats.
+
+The load step writes every player-season row into a star schema:
+
+- dim_player: one row per player (players.py; a stable player_id per name key)
+- dim_season: one row per season; season_id is the Year (0 for players
+  without a recorded season)
+- fact_player_season: one row per player-season: the keys, the stats that
+  are neither batting nor bowling (fielding) and Row_Hash
+- fact_batting / fact_bowling: batting / bowling stats, only for the
+  player-seasons that have any
+
+Facts are keyed and clustered on the integer (player_id, season_id)
+(WITHOUT ROWID tables), so names are stored once and a season without
+bowling costs no bowling row. player_stats is a view joining them back
+into the wide layout (same columns in the same order), so readers are
+unchanged. SQLite drops a LEFT JOIN on a fact table's primary key when a
+(non-aggregate) query uses none of its columns: the bowling rows of a
+season never read fact_batting.
+"""
+
+from players import DIM_TABLE, ensure_player_tables
+
+SEASON_TABLE = "dim_season"
+FACT_TABLE = "fact_player_season"
+BATTING_TABLE = "fact_batting"
+BOWLING_TABLE = "fact_bowling"
+FACT_TABLES = [FACT_TABLE, BATTING_TABLE, BOWLING_TABLE]
+
+FACT_KEY = ["player_id", "season_id"]
+
+BATTING_COLUMNS = [
+    "Matches_Batted", "Not_Outs", "Runs_Scored", "Highest_Score", "Batting_Average",
+    "Balls_Faced", "Batting_Strike_Rate", "Centuries", "Half_Centuries", "Fours", "Sixes",
+    "Dismissals", "Innings", "Boundary_Runs", "Boundary_Percentage", "Dismissal_Rate",
+]
+BOWLING_COLUMNS = [
+    "Matches_Bowled", "Balls_Bowled", "Runs_Conceded", "Wickets_Taken", "Best_Bowling_Match",
+    "Bowling_Average", "Economy_Rate", "Bowling_Strike_Rate", "Four_Wicket_Hauls",
+    "Five_Wicket_Hauls",
+]
+
+# View alias of each table
+_ALIASES = {FACT_TABLE: "f", BATTING_TABLE: "b", BOWLING_TABLE: "w"}
+
+
+def split_columns(columns):
+    """
+    {fact table: its columns of a wide row layout}, keys left out; columns
+    neither batting nor bowling go to fact_player_season
+    """
+    groups = {FACT_TABLE: [], BATTING_TABLE: [], BOWLING_TABLE: []}
+    for col in columns:
+        if col in ("Player_Name", "Year", *FACT_KEY):
+            continue
+        if col in BATTING_COLUMNS:
+            groups[BATTING_TABLE].append(col)
+        elif col in BOWLING_COLUMNS:
+            groups[BOWLING_TABLE].append(col)
+        else:
+            groups[FACT_TABLE].append(col)
+    return groups
+
+
+def season_ids(years):
+    """season_id of each Year (a nullable integer Series): the Year, 0 for NULL"""
+    return years.astype("Float64").fillna(0).to_numpy(dtype="int64")
+
+
+def key_codes(player_ids, season_ids):
+    """One int64 per (player_id, season_id), for set operations on keys"""
+    return player_ids * 65536 + season_ids
+
+
+def ensure_dimensions(conn):
+    ensure_player_tables(conn)
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{SEASON_TABLE}" ('
+        "season_id INTEGER PRIMARY KEY, Year INTEGER UNIQUE)"
+    )
+
+
+def add_seasons(conn, ids):
+    """Adds the seasons of the given season_ids to dim_season"""
+    conn.executemany(
+        f'INSERT OR IGNORE INTO "{SEASON_TABLE}" (season_id, Year) VALUES (?, NULLIF(?, 0))',
+        [(int(season), int(season)) for season in ids],
+    )
+
+
+def create_fact_tables(conn, df, suffix=""):
+    """Creates the fact tables (named <table><suffix>) for the columns of df"""
+    import pandas as pd
+
+    keys = pd.DataFrame({col: pd.Series(dtype="int64") for col in FACT_KEY})
+    for table, columns in split_columns(df.columns).items():
+        frame = pd.concat([keys, df[columns].iloc[:0]], axis=1)
+        ddl = pd.io.sql.get_schema(frame, f"{table}{suffix}", keys=FACT_KEY, con=conn)
+        conn.execute(ddl + " WITHOUT ROWID")
+
+
+def create_indexes(conn):
+    """Season lookups (the primary keys serve player lookups)"""
+    conn.execute(
+        f'CREATE INDEX IF NOT EXISTS "ix_{FACT_TABLE}_season" ON "{FACT_TABLE}" (season_id)'
+    )
+
+
+def analyze(conn):
+    """
+    Planner statistics for the star tables (after a rebuild): with them,
+    ordered and grouped reads by Player_Name walk dim_player's name index
+    and each player's facts in key order, instead of sorting every row
+    """
+    for table in [DIM_TABLE, SEASON_TABLE] + FACT_TABLES:
+        conn.execute(f'ANALYZE "{table}"')
+
+
+def create_view(conn, view_name, columns):
+    """The wide player_stats layout over the star schema, with `columns` in order"""
+    groups = split_columns(columns)
+    owner = {col: table for table, cols in groups.items() for col in cols}
+    select = []
+    for col in columns:
+        if col == "Player_Name":
+            select.append("p.Player_Name AS Player_Name")
+        elif col == "Year":
+            select.append("s.Year AS Year")
+        else:
+            select.append(f'{_ALIASES[owner[col]]}."{col}" AS "{col}"')
+    conn.execute(
+        f'CREATE VIEW "{view_name}" AS SELECT {", ".join(select)} '
+        f'FROM "{FACT_TABLE}" f '
+        f'JOIN "{DIM_TABLE}" p ON p.player_id = f.player_id '
+        f'JOIN "{SEASON_TABLE}" s ON s.season_id = f.season_id '
+        f'LEFT JOIN "{BATTING_TABLE}" b ON b.player_id = f.player_id AND b.season_id = f.season_id '
+        f'LEFT JOIN "{BOWLING_TABLE}" w ON w.player_id = f.player_id AND w.season_id = f.season_id'
+    )
+
+
+def drop_view_or_table(conn, name):
+    """Drops name, a view over the star schema or a (pre-star) wide table"""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", [name]).fetchone()
+    if row is not None and row[0] in ("view", "table"):
+        conn.execute(f'DROP {row[0].upper()} "{name}"')
+
+
+def star_layout_available(conn, view_name):
+    """True if view_name is the view over the star schema (not a wide table)"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?", [view_name]
+    ).fetchone()
+    return row is not None
@@ -0,0 +1,170 @@
+"""
+Synthetic IPL player-season CSVs in the layout of cricket_data_2025.csv.
+
+Reproduces the quirks the pipeline has to handle:
+- players without any recorded season: empty Year, every stat 'No stats'
+- Highest_Score with a not-out marker ('37*')
+- messy name casing and stray whitespace ('  virat kohli', 'VIRAT KOHLI')
+- Year written as a float ('2024.0'), Best_Bowling_Match as 'wickets/runs'
+
+(Player_Name, Year) stays unique after name cleaning, like the real data.
+Rows are generated and written in chunks, so 10M rows need little memory.
+
+Usage:
+    python scripts/synthetic_data.py ROWS OUT.csv [--seed 0]
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from schema import COLUMN_SCHEMA, NA_VALUES
+
+SEASONS = list(range(2008, 2025))
+CHUNK_ROWS = 200_000
+
+# Share of rows for players without any recorded season
+NO_STATS_SHARE = 0.05
+# Share of rows whose name is lower-cased / upper-cased / padded with spaces
+MESSY_NAME_SHARES = (0.10, 0.05, 0.05)
+
+FIRST_NAMES = [
+    "Virat", "Rohit", "Jasprit", "Ravindra", "Shubman", "Rishabh", "Hardik",
+    "Suryakumar", "Yuzvendra", "Mohammed", "Kuldeep", "Axar", "Ishan", "Sanju",
+    "Ruturaj", "Yashasvi", "Arshdeep", "Washington", "Devdutt", "Abdul",
+]
+LAST_NAMES = [
+    "Kohli", "Sharma", "Bumrah", "Jadeja", "Gill", "Pant", "Pandya", "Yadav",
+    "Chahal", "Siraj", "Patel", "Kishan", "Samson", "Gaikwad", "Jaiswal",
+    "Singh", "Sundar", "Padikkal", "Samad", "Iyer", "Rahul", "Khan",
+]
+SUFFIX_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def player_name(player_id):
+    """Deterministic, title-cased name; ids past the name grid get a suffix"""
+    grid = len(FIRST_NAMES) * len(LAST_NAMES)
+    base = player_id % grid
+    name = f"{FIRST_NAMES[base % len(FIRST_NAMES)]} {LAST_NAMES[base // len(FIRST_NAMES)]}"
+    n = player_id // grid
+    suffix = ""
+    while n:
+        n, rem = divmod(n - 1, len(SUFFIX_LETTERS))
+        suffix = SUFFIX_LETTERS[rem] + suffix
+    return f"{name} {suffix.title()}" if suffix else name
+
+
+def _messy_names(names, rng):
+    names = pd.Series(names, dtype=object)
+    draw = rng.random(len(names))
+    lower, upper, padded = MESSY_NAME_SHARES
+    is_lower = draw < lower
+    is_upper = (draw >= lower) & (draw < lower + upper)
+    is_padded = (draw >= lower + upper) & (draw < lower + upper + padded)
+    names[is_lower] = names[is_lower].str.lower()
+    names[is_upper] = names[is_upper].str.upper()
+    names[is_padded] = "  " + names[is_padded] + " "
+    return names
+
+
+def generate_chunk(start, n_rows, rng):
+    """
+    Rows start .. start+n_rows-1 as a DataFrame of CSV-ready values.
+    Row i belongs to player i // len(SEASONS); players own consecutive
+    seasons, so keys never repeat across chunks.
+    """
+    row_ids = np.arange(start, start + n_rows)
+    player_ids = row_ids // len(SEASONS)
+    season_ids = row_ids % len(SEASONS)
+    names = [player_name(pid) for pid in player_ids]
+
+    matches = rng.integers(1, 18, n_rows)
+    not_outs = rng.integers(0, 4, n_rows) % (matches + 1)
+    innings = np.maximum(matches - not_outs, 1)
+    runs = (rng.gamma(1.2, 90, n_rows)).astype(np.int64)
+    highest = np.minimum(runs, (runs / np.maximum(matches, 1) * rng.uniform(1, 3, n_rows)).astype(np.int64))
+    balls = np.maximum((runs * rng.uniform(0.6, 1.2, n_rows)).astype(np.int64), runs > 0)
+    matches_bowled = rng.integers(0, 18, n_rows)
+    balls_bowled = matches_bowled * rng.integers(0, 25, n_rows)
+    runs_conceded = (balls_bowled * rng.uniform(1.0, 1.7, n_rows)).astype(np.int64)
+    wickets = np.minimum(rng.poisson(balls_bowled / 22.0), 40)
+    best_wickets = np.minimum(wickets, rng.integers(0, 6, n_rows))
+    best_runs = np.minimum(runs_conceded, rng.integers(0, 50, n_rows))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bowling_avg = np.where(wickets > 0, runs_conceded / np.maximum(wickets, 1), 0)
+        economy = np.where(balls_bowled > 0, runs_conceded / np.maximum(balls_bowled, 1) * 6, 0)
+        bowling_sr = np.where(wickets > 0, balls_bowled / np.maximum(wickets, 1), 0)
+
+    not_out_best = rng.random(n_rows) < 0.3
+    highest_text = highest.astype(str).astype(object)
+    highest_text[not_out_best] = highest_text[not_out_best] + "*"
+
+    df = pd.DataFrame({
+        "Year": [f"{SEASONS[-1 - s]}.0" for s in season_ids],
+        "Player_Name": _messy_names(names, rng),
+        "Matches_Batted": matches,
+        "Not_Outs": not_outs,
+        "Runs_Scored": runs,
+        "Highest_Score": highest_text,
+        "Batting_Average": np.round(runs / innings, 2),
+        "Balls_Faced": balls,
+        "Batting_Strike_Rate": np.round(np.where(balls > 0, runs / np.maximum(balls, 1) * 100, 0), 2),
+        "Centuries": (runs >= 400) * rng.integers(0, 2, n_rows),
+        "Half_Centuries": (runs >= 150) * rng.integers(0, 5, n_rows),
+        "Fours": (runs * rng.uniform(0.05, 0.12, n_rows)).astype(np.int64),
+        "Sixes": (runs * rng.uniform(0.01, 0.06, n_rows)).astype(np.int64),
+        "Catches_Taken": rng.integers(0, 12, n_rows),
+        "Stumpings": (rng.random(n_rows) < 0.05) * rng.integers(0, 6, n_rows),
+        "Matches_Bowled": matches_bowled,
+        "Balls_Bowled": balls_bowled,
+        "Runs_Conceded": runs_conceded,
+        "Wickets_Taken": wickets,
+        "Best_Bowling_Match": np.char.add(np.char.add(best_wickets.astype(str), "/"), best_runs.astype(str)),
+        "Bowling_Average": np.round(bowling_avg, 2),
+        "Economy_Rate": np.round(economy, 2),
+        "Bowling_Strike_Rate": np.round(bowling_sr, 1),
+        "Four_Wicket_Hauls": (wickets >= 4) * rng.integers(0, 2, n_rows),
+        "Five_Wicket_Hauls": (wickets >= 5) * (rng.random(n_rows) < 0.2),
+    })
+    df["Five_Wicket_Hauls"] = df["Five_Wicket_Hauls"].astype(np.int64)
+
+    # Players without any recorded season: no Year, every stat 'No stats'
+    no_stats = rng.random(n_rows) < NO_STATS_SHARE
+    if no_stats.any():
+        stat_columns = [c for c in COLUMN_SCHEMA if c not in ("Year", "Player_Name")]
+        df[stat_columns] = df[stat_columns].astype(object)
+        df.loc[no_stats, stat_columns] = NA_VALUES[0]
+        df.loc[no_stats, "Year"] = ""
+        # Unique name per no-stats row (the key is (Player_Name, NULL))
+        df.loc[no_stats, "Player_Name"] = [
+            f"{player_name(pid)} Uncapped {s}"
+            for pid, s in zip(player_ids[no_stats], season_ids[no_stats])
+        ]
+    return df[list(COLUMN_SCHEMA)]
+
+
+def write_synthetic_csv(path, n_rows, seed=0, chunk_rows=CHUNK_ROWS):
+    """Writes n_rows synthetic rows to path (atomically); returns path"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, n_rows, chunk_rows):
+            chunk = generate_chunk(start, min(chunk_rows, n_rows - start), rng)
+            chunk.to_csv(f, index=False, header=start == 0)
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic IPL stats CSV")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_synthetic_csv(args.out, args.rows, args.seed)
+    print(f"✅ Wrote {args.rows:,} synthetic rows to {args.out}")
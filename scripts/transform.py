@@ -1,13 +1,42 @@
+import numpy as np
 import pandas as pd
 
+from instrumentation import stage
+from players import canonical_name, load_aliases
+from schema import COLUMN_SCHEMA, DERIVED_SCHEMA, NA_VALUES, NUMERIC_COLUMNS, to_nullable_int
+
+# Seasons in the rolling window of compute_player_metrics
+ROLLING_SEASONS = 3
+
+# Columns of a transformed frame, in order
+OUTPUT_COLUMNS = list(COLUMN_SCHEMA) + list(DERIVED_SCHEMA)
+
+
+def _has_schema_dtype(series, col):
+    return str(series.dtype) == COLUMN_SCHEMA[col]
+
+
+def _coerce_to_schema(series, col):
+    """
+    Coerces a raw column to its schema dtype. Invalid values become NULL.
+    """
+    values = pd.to_numeric(series, errors="coerce")
+    dtype = COLUMN_SCHEMA[col]
+    if dtype.startswith("Int"):
+        return to_nullable_int(values.astype("float64"), dtype)
+    return values.astype(dtype)
+
 
 def clean_highest_score(df):
     """
     Removes '*' from Highest_Score (e.g., '37*' -> 37)
+    Already handled at parse time when the CSV was read with the schema.
     """
+    if "Highest_Score" not in df.columns or _has_schema_dtype(df["Highest_Score"], "Highest_Score"):
+        return df
     df["Highest_Score"] = (
         df["Highest_Score"]
-        .astype(str)
+        .astype("string")
         .str.replace("*", "", regex=False)
     )
     return df
@@ -15,60 +44,220 @@ def clean_highest_score(df):
 
 def convert_numeric_columns(df):
     """
-    Converts selected columns to numeric types.
+    Converts the numeric columns to their declared (compact) types.
+    Columns already typed at parse time are skipped.
     Invalid values are safely converted to NULL.
     """
-    numeric_columns = [
-        "Year",
-        "Matches_Batted", "Not_Outs", "Runs_Scored", "Balls_Faced",
-        "Batting_Average", "Batting_Strike_Rate",
-        "Centuries", "Half_Centuries", "Fours", "Sixes",
-        "Matches_Bowled", "Balls_Bowled", "Runs_Conceded",
-        "Wickets_Taken", "Bowling_Average",
-        "Economy_Rate", "Bowling_Strike_Rate",
-        "Four_Wicket_Hauls", "Five_Wicket_Hauls",
-        "Highest_Score"
-    ]
-
-    for col in numeric_columns:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns and not _has_schema_dtype(df[col], col):
+            df[col] = _coerce_to_schema(df[col], col)
+
+    # Remaining text columns only need the 'No stats' marker nulled out
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].mask(df[col].isin(NA_VALUES))
 
     return df
 
 
 def clean_player_names(df):
     """
-    Standardizes player names
+    Replaces player names with their canonical form ('ms  dhoni' and
+    'M.S. Dhoni' -> 'MS Dhoni', aliases from data/player_aliases.csv applied)
+    For a categorical column only the (few) categories are cleaned,
+    then the codes are remapped in one vectorized step.
+    Spellings that changed beyond case are kept in
+    df.attrs["player_spellings"] as (raw, canonical) pairs for the
+    player_alias table (the load step pops them before touching the frame,
+    as pandas copies attrs on every operation).
     """
-    df["Player_Name"] = df["Player_Name"].str.strip().str.title()
+    names = df["Player_Name"]
+    if not isinstance(names.dtype, pd.CategoricalDtype):
+        names = names.astype("category")
+
+    aliases = load_aliases()
+    raw = names.cat.categories.str.strip()
+    # Case variants share a canonical name: resolve each lower-cased form once
+    lowered = raw.str.lower()
+    distinct = pd.Index(lowered.unique())
+    canonical = pd.Index([canonical_name(name, aliases) for name in distinct])
+    cleaned = canonical[distinct.get_indexer(lowered)]
+    new_categories = pd.Index(cleaned.unique())
+    remap = new_categories.get_indexer(cleaned)
+    codes = names.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, remap[codes], -1)
+
+    df["Player_Name"] = pd.Categorical.from_codes(new_codes, new_categories)
+    df.attrs["player_spellings"] = sorted(
+        {(r, c) for r, c in zip(raw, cleaned) if r.lower() != c.lower()}
+    )
     return df
 
 
-def transform_data(df):
+def _column(df, col):
+    """float64 values of a column, NULL as NaN"""
+    return df[col].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    """numerator / denominator * scale, NaN where the denominator isn't positive"""
+    out = np.full(len(numerator), np.nan)
+    valid = denominator > 0
+    out[valid] = numerator[valid] / denominator[valid] * scale
+    return out
+
+
+def derive_season_metrics(df):
     """
-    Main transformation function (ETL Transform step)
+    Adds the per-season metric columns of DERIVED_SCHEMA, vectorized:
+    Dismissals (recovered as Runs_Scored / Batting_Average; 0 when the
+    average is 0), Innings (dismissals + not outs), Boundary_Runs,
+    Boundary_Percentage (share of runs from fours and sixes) and
+    Dismissal_Rate (share of innings that ended in a dismissal), both in %.
+    Seasons without stats get NULL.
+    """
+    runs = _column(df, "Runs_Scored")
+    average = _column(df, "Batting_Average")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dismissals = np.where(average > 0, np.rint(runs / average), runs * 0)
+    innings = dismissals + _column(df, "Not_Outs")
+    boundary_runs = 4 * _column(df, "Fours") + 6 * _column(df, "Sixes")
+
+    df["Dismissals"] = to_nullable_int(dismissals, DERIVED_SCHEMA["Dismissals"])
+    df["Innings"] = to_nullable_int(innings, DERIVED_SCHEMA["Innings"])
+    df["Boundary_Runs"] = to_nullable_int(boundary_runs, DERIVED_SCHEMA["Boundary_Runs"])
+    df["Boundary_Percentage"] = _ratio(boundary_runs, runs, 100).astype("float32")
+    df["Dismissal_Rate"] = _ratio(dismissals, innings, 100).astype("float32")
+    return df
+
+
+# Season components summed by compute_player_metrics
+METRIC_COMPONENTS = [
+    "Runs_Scored", "Dismissals", "Innings", "Balls_Faced", "Boundary_Runs",
+    "Wickets_Taken", "Runs_Conceded", "Balls_Bowled",
+]
+
+
+def _rate_columns(totals):
+    """Career / window rates from summed components ({column: array})"""
+    return {
+        "Batting_Average": _ratio(totals["Runs_Scored"], totals["Dismissals"]),
+        "Strike_Rate": _ratio(totals["Runs_Scored"], totals["Balls_Faced"], 100),
+        "Boundary_Percentage": _ratio(totals["Boundary_Runs"], totals["Runs_Scored"], 100),
+        "Dismissal_Rate": _ratio(totals["Dismissals"], totals["Innings"], 100),
+        "Bowling_Average": _ratio(totals["Runs_Conceded"], totals["Wickets_Taken"]),
+        "Economy_Rate": _ratio(totals["Runs_Conceded"], totals["Balls_Bowled"], 6),
+        "Bowling_Strike_Rate": _ratio(totals["Balls_Bowled"], totals["Wickets_Taken"]),
+    }
+
+
+def compute_player_metrics(seasons, window=ROLLING_SEASONS):
     """
-    print("Starting transformation...")
+    Career and rolling metrics from season rows (Player_Name, Year and
+    METRIC_COMPONENTS; NULL counts as 0). Averages are ratios of totals
+    (career runs / career dismissals), never means of season averages.
+
+    Returns (career, season_metrics):
+    - career: one row per player with the component totals and career rates
+    - season_metrics: one row per player season with the rates over the
+      last `window` seasons played (Rolling_*) and the change from the
+      previous season played (*_YoY)
+
+    Everything is computed with NumPy over the rows sorted by player and
+    year: group totals with np.add.reduceat, windows as differences of a
+    cumulative sum, deltas as a shifted difference.
+    """
+    seasons = seasons.sort_values(["Player_Name", "Year"], kind="stable")
+    names = seasons["Player_Name"].to_numpy(dtype=object)
+    n = len(names)
+    values = np.column_stack([
+        np.nan_to_num(_column(seasons, col)) for col in METRIC_COMPONENTS
+    ]) if n else np.zeros((0, len(METRIC_COMPONENTS)))
+
+    # First row of each player's group, and each row's group start
+    is_start = np.ones(n, dtype=bool)
+    is_start[1:] = names[1:] != names[:-1]
+    starts = np.flatnonzero(is_start)
+    row_start = starts[np.cumsum(is_start) - 1] if n else starts
+
+    totals = np.add.reduceat(values, starts, axis=0) if n else values
+    career_totals = dict(zip(METRIC_COMPONENTS, totals.T))
+    career = pd.DataFrame({"Player_Name": names[starts]})
+    for col in METRIC_COMPONENTS:
+        career[col] = career_totals[col].astype("int64")
+    career["Seasons"] = np.diff(np.append(starts, n))
+    for col, rates in _rate_columns(career_totals).items():
+        career[col] = rates
+
+    # Rolling window: cumsum[i + 1] - cumsum[first row of the window]
+    cumulative = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    rows = np.arange(n)
+    window_start = np.maximum(rows - window + 1, row_start)
+    window_totals = dict(zip(METRIC_COMPONENTS, (cumulative[rows + 1] - cumulative[window_start]).T))
 
-    # Replace 'No stats' with NULL
-    df = df.replace("No stats", pd.NA)
-    print("✔ Replaced 'No stats' with NULL")
+    season_metrics = pd.DataFrame({
+        "Player_Name": names,
+        "Year": seasons["Year"].to_numpy(dtype="float64", na_value=np.nan),
+    })
+    for col, rates in _rate_columns(window_totals).items():
+        season_metrics[f"Rolling_{col}"] = rates
 
-    # Clean columns
-    df = clean_highest_score(df)
-    df = convert_numeric_columns(df)
-    df = clean_player_names(df)
+    # Change from the player's previous season (NaN for a first season)
+    has_previous = rows > row_start
+    previous = np.maximum(rows - 1, 0)
+    season_totals = dict(zip(METRIC_COMPONENTS, values.T))
+    season_rates = _rate_columns(season_totals)
+    deltas = {
+        "Runs_Scored": season_totals["Runs_Scored"],
+        "Wickets_Taken": season_totals["Wickets_Taken"],
+        "Batting_Average": season_rates["Batting_Average"],
+        "Strike_Rate": season_rates["Strike_Rate"],
+        "Economy_Rate": season_rates["Economy_Rate"],
+    }
+    for col, current in deltas.items():
+        season_metrics[f"{col}_YoY"] = np.where(has_previous, current - current[previous], np.nan)
+    return career, season_metrics
 
-    print("✅ Transformation complete")
+
+def transform_data(df, verbose=True):
+    """
+    Main transformation function (ETL Transform step)
+    verbose=False silences progress output (used when transforming chunks)
+    """
+    if verbose:
+        print("Starting transformation...")
+
+    # Clean columns ('No stats' becomes NULL while converting types)
+    rows = len(df)
+    with stage("transform.clean_highest_score", rows):
+        df = clean_highest_score(df)
+    with stage("transform.convert_numeric_columns", rows):
+        df = convert_numeric_columns(df)
+    with stage("transform.clean_player_names", rows):
+        df = clean_player_names(df)
+    with stage("transform.derive_season_metrics", rows):
+        df = derive_season_metrics(df)
+
+    if verbose:
+        print("✅ Transformation complete")
     return df
 
 
+def transform_chunks(chunks):
+    """
+    Lazily transforms an iterable of raw DataFrame chunks
+    """
+    for chunk in chunks:
+        yield transform_data(chunk, verbose=False)
+
+
 # -------------------------
 # Test block (safe to keep)
 # -------------------------
 if __name__ == "__main__":
-    df_raw = pd.read_csv("data/raw/cricket_data_2025.csv")
+    from extract import extract_data
+
+    df_raw = extract_data("data/raw/cricket_data_2025.csv")
     df_clean = transform_data(df_raw)
 
     print("\nData types:")
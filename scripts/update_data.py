@@ -6,17 +6,20 @@ Run this script periodically to keep your dashboard fresh with latest data.
 
 import os
 import sys
-import pandas as pd
-import sqlite3
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 
 # Add scripts directory to path
 sys.path.append(os.path.dirname(__file__))
 
-from extract import extract_data
-from transform import transform_data
-from load import load_data_to_db
+from ingest import RAW_DATA_DIR, discover_source_files, iter_transformed_files
+from load import layout_is_current, load_frames_to_db
+from etl_pipeline import warm_dashboard_cache
+from db import connect
+from source_manifest import detect_source_changes
+from instrumentation import RunRecorder, save_run, stage
+from transform import OUTPUT_COLUMNS
+from validate import format_counts
 
 # Set up logging
 logging.basicConfig(
@@ -25,54 +28,141 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def check_for_new_data(csv_path="data/raw/cricket_data_2025.csv"):
+def scan_sources(source_dir=RAW_DATA_DIR, db_path="data/ipl_stats.db", conn=None):
     """
-    Check if there's new data available
-    For now, we'll simulate this by checking file modification time
-    In production, you might check an API or website for updates
+    Compares every source CSV with the manifest recorded at the last load.
+    Returns a SourceChanges listing what to re-load, or None if there are
+    no source files. conn: an open read connection to reuse (else one is
+    opened for the scan).
     """
-    if not os.path.exists(csv_path):
-        logging.warning(f"Data file {csv_path} not found")
-        return False
-
-    # Check if file was modified in the last 24 hours
-    file_modified = datetime.fromtimestamp(os.path.getmtime(csv_path))
-    time_since_update = datetime.now() - file_modified
+    source_files = discover_source_files(source_dir)
+    if not source_files:
+        logging.warning(f"No data files found in {source_dir}")
+        return None
+
+    if conn is not None:
+        return detect_source_changes(conn, source_files, source_dir)
+    conn = connect(db_path, readonly=True) if os.path.exists(db_path) else None
+    try:
+        return detect_source_changes(conn, source_files, source_dir)
+    finally:
+        if conn is not None:
+            conn.close()
 
-    # If file was updated recently, assume there's new data
-    if time_since_update < timedelta(hours=24):
-        logging.info(f"New data detected in {csv_path} (modified {time_since_update} ago)")
+def check_for_new_data(source_dir=RAW_DATA_DIR, db_path="data/ipl_stats.db"):
+    """
+    Check if there's new data available: a source file's content (not just
+    its modification time) must differ from what was last loaded
+    """
+    changes = scan_sources(source_dir, db_path)
+    if changes is None:
+        return False
+    if not table_layout_is_current(db_path):
+        logging.info("Table layout is outdated; a full reload is needed")
+        return True
+    if changes.has_changes:
+        logging.info(f"New data detected in {source_dir}: "
+                     f"{len(changes.seasons)} season(s) to reload")
         return True
 
     logging.info("No new data detected")
     return False
 
-def update_database():
+def table_layout_is_current(db_path, table_name="player_stats", conn=None):
+    """False if the table is missing or was built by an older transform"""
+    if conn is not None:
+        return layout_is_current(conn, table_name, OUTPUT_COLUMNS)
+    if not os.path.exists(db_path):
+        return False
+    conn = connect(db_path, readonly=True)
+    try:
+        return layout_is_current(conn, table_name, OUTPUT_COLUMNS)
+    finally:
+        conn.close()
+
+def _record_manifest(db_path, changes):
+    """Stores the scanned state of the source files"""
+    conn = connect(db_path)
+    try:
+        with conn:
+            changes.record(conn)
+    finally:
+        conn.close()
+
+def update_database(source_dir=RAW_DATA_DIR, workers=None, conn=None):
     """
-    Main function to update the database with new data
+    Main function to update the database with new data.
+    Per-stage timings are recorded in data/pipeline_runs.jsonl and the
+    pipeline_runs table. conn: an open read connection to reuse for the
+    change checks (the refresh daemon keeps one between runs).
     """
+    config = {"source_dir": source_dir, "workers": workers}
+    with RunRecorder("update", config=config) as recorder:
+        success = _update_database(source_dir, workers, conn)
+
+    report, slowdowns = save_run(recorder, "data/ipl_stats.db", "success" if success else "failed")
+    logging.info(f"Run {report['run_id']}: {report['wall_s']:.2f}s, " + ", ".join(
+        f"{s['stage']} {s['wall_s']:.3f}s" for s in report["stages"]
+    ))
+    for name, wall_s, median, ratio in slowdowns:
+        logging.warning(f"{name} took {wall_s:.3f}s, {ratio:.1f}x its recent median ({median:.3f}s)")
+    validation = {name[len("validate."):]: n for name, n in report.get("counters", {}).items()
+                  if name.startswith("validate.")}
+    if validation.get("quarantined"):
+        logging.warning(f"Validation: {format_counts(validation)}")
+    return success
+
+def _update_database(source_dir, workers, conn=None):
     try:
         logging.info("Starting automated database update")
 
+        db_path = "data/ipl_stats.db"
+        table_name = "player_stats"
+
         # Check for new data
-        csv_path = "data/raw/cricket_data_2025.csv"
-        if not check_for_new_data(csv_path):
+        with stage("detect_changes"):
+            changes = scan_sources(source_dir, db_path, conn)
+        if changes is None:
+            return False
+        for path, changeset in changes.changesets.items():
+            logging.info(f"{os.path.basename(path)}: {changeset.reason}")
+        if not table_layout_is_current(db_path, table_name, conn):
+            # The table is rebuilt from whatever is loaded, so a layout
+            # change (new derived columns) needs every file in full
+            logging.info("Table layout is outdated; reloading every source file")
+            jobs, prune_seasons = sorted(changes.file_seasons), None
+        elif not changes.has_changes:
             logging.info("No update needed - data is current")
+            if changes.scans:
+                # Touched without content changes: remember the new mtimes so
+                # the next check can skip hashing again
+                _record_manifest(db_path, changes)
             return True
-
-        # Extract
-        logging.info("Extracting data...")
-        df_raw = extract_data(csv_path)
-
-        # Transform
-        logging.info("Transforming data...")
-        df_clean = transform_data(df_raw)
-
-        # Load
+        else:
+            jobs, prune_seasons = changes.jobs(), changes.seasons
+            logging.info(f"Seasons to reload: {changes.seasons} "
+                         f"from {len(jobs)} file(s); removed files: {len(changes.removed_paths)}")
+
+        # Extract + transform only the rows of changed seasons, one worker
+        # process per file
+        logging.info("Extracting and transforming data...")
+        frames = iter_transformed_files(jobs, workers)
+
+        # Load (incremental: only new or changed player-seasons are written,
+        # rows gone from the reloaded seasons are deleted). The manifest is
+        # written in the same transaction, so it never runs ahead of the data.
         logging.info("Loading data to database...")
-        db_path = "data/ipl_stats.db"
-        table_name = "player_stats"
-        load_data_to_db(df_clean, db_path, table_name)
+        loaded = load_frames_to_db(
+            frames, db_path, table_name, mode="upsert",
+            prune_seasons=prune_seasons, before_commit=changes.record,
+        )
+        if not loaded:
+            logging.error("Loading data failed; manifest left unchanged")
+            return False
+
+        # Pre-build the dashboard's default view for the new data
+        logging.info("Warming dashboard figure cache...")
+        warm_dashboard_cache(db_path)
 
         # Update timestamp file
         with open("data/last_updated.txt", "w") as f:
@@ -99,10 +189,19 @@ def send_notification(success, update_type="scheduled"):
     print(message)  # Also print to console for immediate feedback
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Update the IPL database from changed source files")
+    parser.add_argument("--source-dir", default=RAW_DATA_DIR,
+                        help="directory of source CSVs to check")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="extract/transform worker processes (default: one per core)")
+    args = parser.parse_args()
+
     print("🔄 Starting IPL Data Update Automation")
     print("=" * 50)
 
-    success = update_database()
+    success = update_database(args.source_dir, args.workers)
     send_notification(success, "manual")
 
     if success:
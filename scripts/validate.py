@@ -0,0 +1,211 @@
+"""
+Data quality checks between transform and load.
+
+RULES declares what a valid player-season row looks like. Each rule is a
+vectorized check over the whole frame (or chunk) returning a boolean mask
+of the rows that break it; NULL stats never break a rule (a season without
+batting has no batting stats to contradict). Every check is one or a few
+array comparisons, and duplicate keys are found by hashing, so a frame is
+validated in linear time.
+
+validate_frame splits a transformed frame into the rows to load and the
+quarantined rows, which the load step writes to the quarantine table with
+the names of the rules they broke, in the same transaction as the data.
+Per-rule counts go into the run report (instrumentation counters).
+
+Duplicate (Player_Name, Year) rows are checked within a frame, where the
+last one is kept (matching the loader, where later files win).
+"""
+
+import json
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+from schema import NUMERIC_COLUMNS
+
+QUARANTINE_TABLE = "quarantine"
+
+# First IPL season; nothing is recorded beyond the current year
+MIN_YEAR = 2008
+
+# Where validate_frame leaves its results for the load step (see transform.clean_player_names)
+QUARANTINE_ATTR = "quarantine"
+COUNTS_ATTR = "validation_counts"
+
+# Stats that can't be negative (Year has its own range rule)
+NON_NEGATIVE_COLUMNS = [col for col in NUMERIC_COLUMNS if col != "Year"] + [
+    "Dismissals", "Innings", "Boundary_Runs", "Boundary_Percentage", "Dismissal_Rate",
+]
+
+
+class _Columns:
+    """float64 views of a frame's columns (NaN for NULL or a missing column), built once"""
+
+    def __init__(self, df):
+        self.df = df
+        self._values = {}
+
+    def __getitem__(self, col):
+        values = self._values.get(col)
+        if values is None:
+            if col in self.df.columns:
+                values = self.df[col].to_numpy(dtype="float64", na_value=np.nan)
+            else:
+                values = np.full(len(self.df), np.nan)
+            self._values[col] = values
+        return values
+
+
+def _negative_value(c):
+    return np.logical_or.reduce([c[col] < 0 for col in NON_NEGATIVE_COLUMNS])
+
+
+def _year_out_of_range(c):
+    year = c["Year"]
+    return (year < MIN_YEAR) | (year > date.today().year)
+
+
+def _missing_player_name(df):
+    if "Player_Name" not in df.columns:
+        return np.ones(len(df), dtype=bool)
+    names = df["Player_Name"]
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        # One check per distinct name, then looked up by code
+        blank = np.asarray(names.cat.categories.astype(str).str.strip() == "")
+        codes = names.cat.codes.to_numpy()
+        return (codes < 0) | blank[codes]
+    return (names.isna() | (names.astype("string").str.strip() == "")).to_numpy(dtype=bool)
+
+
+def _duplicate_player_year(df):
+    if not {"Player_Name", "Year"} <= set(df.columns):
+        return np.zeros(len(df), dtype=bool)
+    names = df["Player_Name"]
+    if isinstance(names.dtype, pd.CategoricalDtype) and str(df["Year"].dtype) == "Int16":
+        # One int64 key per row (name code, Year with NULL as its own value):
+        # hashing integers is several times faster than hashing the two columns
+        year = df["Year"].to_numpy(dtype="float64", na_value=np.nan)
+        year = np.where(np.isnan(year), -1, year + 32768).astype(np.int64)
+        keys = names.cat.codes.to_numpy().astype(np.int64) * 65537 + year
+        return pd.Series(keys).duplicated(keep="last").to_numpy()
+    return df.duplicated(["Player_Name", "Year"], keep="last").to_numpy()
+
+
+# name: (what the rule requires, check(columns) -> mask of breaking rows)
+RULES = {
+    "negative_value": ("counts and rates are >= 0", _negative_value),
+    "balls_faced_below_runs": ("Balls_Faced >= Runs_Scored / 6",
+                               lambda c: c["Balls_Faced"] * 6 < c["Runs_Scored"]),
+    "not_outs_exceed_matches": ("Not_Outs <= Matches_Batted",
+                                lambda c: c["Not_Outs"] > c["Matches_Batted"]),
+    "highest_score_exceeds_runs": ("Highest_Score <= Runs_Scored",
+                                   lambda c: c["Highest_Score"] > c["Runs_Scored"]),
+    "wickets_exceed_balls": ("Wickets_Taken <= Balls_Bowled",
+                             lambda c: c["Wickets_Taken"] > c["Balls_Bowled"]),
+    "year_out_of_range": (f"Year between {MIN_YEAR} and the current year", _year_out_of_range),
+}
+
+# Rules over the frame itself rather than numeric columns
+FRAME_RULES = {
+    "missing_player_name": ("Player_Name is not empty", _missing_player_name),
+    "duplicate_player_year": ("one row per (Player_Name, Year)", _duplicate_player_year),
+}
+
+
+def find_violations(df):
+    """{rule: boolean mask of the rows breaking it}"""
+    columns = _Columns(df)
+    violations = {name: check(columns) for name, (_, check) in RULES.items()}
+    violations.update({name: check(df) for name, (_, check) in FRAME_RULES.items()})
+    return violations
+
+
+def validate_frame(df):
+    """
+    Returns the rows of df that pass every rule. The others are left in
+    .attrs["quarantine"] with a Reasons column (comma-separated rule names),
+    and .attrs["validation_counts"] holds rows, quarantined and per-rule counts.
+    """
+    with stage("validate", len(df)):
+        violations = find_violations(df)
+        bad = np.logical_or.reduce(list(violations.values())) if len(df) else np.zeros(0, bool)
+        counts = {"rows": len(df), "quarantined": int(bad.sum())}
+        counts.update({name: int(mask.sum()) for name, mask in violations.items()})
+
+        attrs = dict(df.attrs)
+        if counts["quarantined"]:
+            # Reasons are only spelled out for the (few) failing rows
+            reasons = np.full(counts["quarantined"], "", dtype=object)
+            for name, mask in violations.items():
+                hit = mask[bad]
+                reasons[hit] = reasons[hit] + f",{name}"
+            quarantined = df[bad].copy()
+            quarantined.attrs = {}
+            quarantined["Reasons"] = [reason[1:] for reason in reasons]
+            df = df[~bad]
+        else:
+            quarantined = None
+        df.attrs = dict(attrs, **{QUARANTINE_ATTR: quarantined, COUNTS_ATTR: counts})
+    return df
+
+
+def validate_frames(frames):
+    """Lazily validates an iterable of transformed frames (e.g. chunks)"""
+    for df in frames:
+        yield validate_frame(df)
+
+
+def pop_validation(df):
+    """(quarantined rows or None, counts or None) left by validate_frame; removed from df.attrs"""
+    return df.attrs.pop(QUARANTINE_ATTR, None), df.attrs.pop(COUNTS_ATTR, None)
+
+
+def ensure_quarantine_table(conn):
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{QUARANTINE_TABLE}" ('
+        "Player_Name TEXT, Year INTEGER, Reasons TEXT NOT NULL, "
+        "Row_Data TEXT NOT NULL, Quarantined_At TEXT NOT NULL)"
+    )
+
+
+def clear_quarantine(conn, seasons=None):
+    """
+    Forgets quarantined rows before their source is validated again: all
+    of them, or those of the given season keys ('2024', 'null'). Caller commits.
+    """
+    ensure_quarantine_table(conn)
+    if seasons is None:
+        conn.execute(f'DELETE FROM "{QUARANTINE_TABLE}"')
+        return
+    values = [0 if season == "null" else int(season) for season in seasons]
+    placeholders = ", ".join("?" for _ in values)
+    conn.execute(
+        f'DELETE FROM "{QUARANTINE_TABLE}" WHERE IFNULL(Year, 0) IN ({placeholders})', values
+    )
+
+
+def write_quarantine(conn, quarantined):
+    """Stores quarantined rows (the whole row as JSON, NULLs as null). Caller commits."""
+    ensure_quarantine_table(conn)
+    row_data = quarantined.drop(columns="Reasons").to_json(orient="records", lines=True)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.executemany(
+        f'INSERT INTO "{QUARANTINE_TABLE}" VALUES (?, ?, ?, ?, ?)',
+        [
+            (row["Player_Name"], row["Year"], reasons, line, now)
+            for row, reasons, line in zip(
+                map(json.loads, row_data.splitlines()), quarantined["Reasons"], row_data.splitlines()
+            )
+        ],
+    )
+
+
+def format_counts(counts):
+    """'3 of 1,008 rows quarantined (negative_value: 2, ...)' from merged counts"""
+    rules = ", ".join(f"{name}: {counts[name]:,}" for name in list(RULES) + list(FRAME_RULES)
+                      if counts.get(name))
+    return (f"{counts.get('quarantined', 0):,} of {counts.get('rows', 0):,} rows quarantined"
+            + (f" ({rules})" if rules else ""))
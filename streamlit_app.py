@@ -1,8 +1,20 @@
+import os
+import sys
 import streamlit as st
-import sqlite3
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "scripts"))
+
+from charts import career_chart_id
+from db import ConnectionPool, DEFAULT_DB_PATH
+from figure_cache import FigureCache, deserialize_figure, get_figure_payload
+from metadata import data_stamp
+from players import fuzzy_search, search_index_available
+import queries
+
+# Bound on cached results per loader; least recently used entries are evicted
+CACHE_MAX_ENTRIES = 64
+# How often (seconds) to check the database for a new data stamp
+VERSION_CHECK_TTL = 5
 
 # Set page config
 st.set_page_config(
@@ -11,243 +23,194 @@ st.set_page_config(
     layout="wide"
 )
 
+# Views; only the selected one is built on each run
+VIEWS = ["🏏 Batting Stats", "🥎 Bowling Stats", "📊 Player Comparison", "🔍 Individual Player"]
+
 # Connect to database
-@st.cache_data
-def load_data():
-    """Load data from SQLite database"""
-    conn = sqlite3.connect("data/ipl_stats.db")
-    df = pd.read_sql_query("SELECT * FROM player_stats", conn)
-    conn.close()
-    return df
-
-# Load data
-df = load_data()
-
-# Clean data - fill NaN values appropriately
-df = df.fillna({
-    'Runs_Scored': 0,
-    'Wickets_Taken': 0,
-    'Centuries': 0,
-    'Half_Centuries': 0,
-    'Batting_Average': 0,
-    'Bowling_Average': 0,
-    'Year': 0
-})
-
-# Convert Year to int for better handling
-df['Year'] = df['Year'].astype(int)
+@st.cache_resource
+def get_read_pool():
+    """Read connection pool shared by every session of this process"""
+    return ConnectionPool(DEFAULT_DB_PATH, size=8)
+
+@st.cache_data(ttl=VERSION_CHECK_TTL)
+def load_data_stamp():
+    """Data stamp (version plus content hash) of the load step; a new one invalidates every loader below"""
+    with get_read_pool().connection() as conn:
+        return data_stamp(conn)
+
+@st.cache_resource
+def get_figure_cache():
+    """Figure payload LRU shared by every session of this process"""
+    return FigureCache(max_entries=256, max_bytes=64 * 1024 * 1024)
+
+def render_chart(chart_id):
+    """
+    Draws a chart from the figure cache (built on a miss).
+    Returns False if the chart has no data for the current filters.
+    """
+    with get_read_pool().connection() as conn:
+        payload = get_figure_payload(
+            get_figure_cache(), conn, stamp, years_key, player_search, chart_id
+        )
+    figure = deserialize_figure(payload)
+    if figure is None:
+        return False
+    st.plotly_chart(figure, use_container_width=True)
+    return True
+
+# Filters are pushed down into SQL; each loader fetches only what its view needs.
+# Every loader takes the data stamp as its first argument so cache entries are
+# keyed on it: after a reload, stale entries stop being hit and age out.
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_years(stamp):
+    """Distinct valid seasons for the sidebar"""
+    with get_read_pool().connection() as conn:
+        return queries.fetch_years(conn)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_overview(stamp):
+    """Player and season counts for the sidebar"""
+    with get_read_pool().connection() as conn:
+        return queries.fetch_overview(conn)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_summary(stamp, years, player_search):
+    """Headline metrics for the current filters"""
+    with get_read_pool().connection() as conn:
+        return queries.fetch_summary(conn, years, player_search)
+
+# cache_resource: every session gets the same (immutable) tuple, where
+# cache_data would unpickle a fresh copy of a possibly 100k-name list per run
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES)
+def load_player_names(stamp, years, player_search):
+    """Player names matching the current filters"""
+    with get_read_pool().connection() as conn:
+        return tuple(queries.fetch_player_names(conn, years, player_search))
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_player_suggestions(stamp, player_search):
+    """Closest player names for a search that matched nobody"""
+    with get_read_pool().connection() as conn:
+        if not search_index_available(conn):
+            return []
+        return [name for name, _ in fuzzy_search(conn, player_search, limit=3)]
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_player_rows(stamp, player_name, years):
+    """Season rows (with rolling and year-over-year metrics) of one player within the selected years"""
+    with get_read_pool().connection() as conn:
+        return queries.fetch_player_seasons(
+            conn,
+            player_name,
+            ['Year', 'Matches_Batted', 'Runs_Scored', 'Batting_Average',
+             'Matches_Bowled', 'Wickets_Taken', 'Bowling_Average'],
+            years,
+        )
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES)
+def load_player_career(stamp, player_name):
+    """Precomputed career metrics of one player (None before the metric tables exist)"""
+    with get_read_pool().connection() as conn:
+        return queries.fetch_player_career(conn, player_name)
 
 # Title
 st.title("🏏 IPL Player Statistics Dashboard")
 st.markdown("Interactive analysis of IPL player performance data")
 
+# Current data version (re-read every few seconds)
+stamp = load_data_stamp()
+
 # Sidebar filters
 st.sidebar.header("Filters")
 
 # Year filter
-years = sorted(df[df['Year'] > 0]['Year'].unique())  # Only valid years
+years = load_years(stamp)  # Only valid years
 selected_years = st.sidebar.multiselect(
     "Select Years",
     years,
     default=years[-3:] if len(years) > 3 else years  # Default to last 3 years
 )
+overview = load_overview(stamp)
+st.sidebar.caption(f"{overview['Players']:,} players across {overview['Seasons']} seasons")
 
 # Player search
 player_search = st.sidebar.text_input("Search Player", "")
 
-# Filter data
-filtered_df = df.copy()
-if selected_years:
-    filtered_df = filtered_df[filtered_df['Year'].isin(selected_years)]
-if player_search:
-    filtered_df = filtered_df[filtered_df['Player_Name'].str.contains(player_search, case=False, na=False)]
+# Cache keys must be hashable
+years_key = tuple(selected_years)
 
 # Main content
+summary = load_summary(stamp, years_key, player_search)
+if player_search and not summary['Players']:
+    suggestions = load_player_suggestions(stamp, player_search)
+    if suggestions:
+        st.sidebar.caption("Did you mean: " + ", ".join(suggestions) + "?")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    try:
-        st.metric("Total Players", len(filtered_df['Player_Name'].unique()))
-    except:
-        st.metric("Total Players", 0)
+    st.metric("Total Players", summary['Players'])
 
 with col2:
-    try:
-        total_runs = filtered_df['Runs_Scored'].sum()
-        st.metric("Total Runs", f"{total_runs:,.0f}")
-    except:
-        st.metric("Total Runs", "0")
+    st.metric("Total Runs", f"{summary['Total_Runs']:,.0f}")
 
 with col3:
-    try:
-        total_wickets = filtered_df['Wickets_Taken'].sum()
-        st.metric("Total Wickets", f"{total_wickets:,.0f}")
-    except:
-        st.metric("Total Wickets", "0")
+    st.metric("Total Wickets", f"{summary['Total_Wickets']:,.0f}")
 
 with col4:
-    try:
-        avg_batting_avg = filtered_df['Batting_Average'].mean()
-        st.metric("Avg Batting Average", f"{avg_batting_avg:.2f}")
-    except:
-        st.metric("Avg Batting Average", "0.00")
+    st.metric("Batting Average", f"{summary['Batting_Average']:.2f}")
 
-# Tabs for different views
-tab1, tab2, tab3, tab4 = st.tabs(["🏏 Batting Stats", "🥎 Bowling Stats", "📊 Player Comparison", "🔍 Individual Player"])
+# View selector; unlike st.tabs, which runs every tab's code on each rerun,
+# only the selected view queries data and draws charts
+view = st.radio("View", VIEWS, horizontal=True, label_visibility="collapsed", key="view")
 
-with tab1:
+if view == VIEWS[0]:
     st.header("Top Run Scorers")
 
-    # Aggregate runs by player
-    if not filtered_df.empty and 'Runs_Scored' in filtered_df.columns:
-        runs_by_player = filtered_df.groupby('Player_Name')['Runs_Scored'].sum().reset_index()
-        runs_by_player = runs_by_player[runs_by_player['Runs_Scored'] > 0]  # Only players with runs
-        runs_by_player = runs_by_player.sort_values('Runs_Scored', ascending=False).head(15)
-
-        if not runs_by_player.empty:
-            fig_runs = px.bar(
-                runs_by_player,
-                x='Runs_Scored',
-                y='Player_Name',
-                orientation='h',
-                title="Top 15 Run Scorers",
-                labels={'Runs_Scored': 'Total Runs', 'Player_Name': 'Player'}
-            )
-            fig_runs.update_layout(height=600)
-            st.plotly_chart(fig_runs, use_container_width=True)
-        else:
-            st.warning("No run scoring data available for the selected filters.")
-    else:
-        st.warning("No data available for run scoring analysis.")
+    if not render_chart("runs_top15"):
+        st.warning("No run scoring data available for the selected filters.")
 
     # Centuries and Half-Centuries
-    if not filtered_df.empty and 'Centuries' in filtered_df.columns and 'Half_Centuries' in filtered_df.columns:
-        centuries_data = filtered_df.groupby('Player_Name')[['Centuries', 'Half_Centuries']].sum().reset_index()
-        centuries_data = centuries_data[(centuries_data['Centuries'] > 0) | (centuries_data['Half_Centuries'] > 0)]
-        centuries_data = centuries_data.sort_values('Centuries', ascending=False).head(10)
-
-        if not centuries_data.empty:
-            col1, col2 = st.columns(2)
-            with col1:
-                fig_centuries = px.bar(
-                    centuries_data,
-                    x='Player_Name',
-                    y='Centuries',
-                    title="Most Centuries",
-                    color='Centuries'
-                )
-                st.plotly_chart(fig_centuries, use_container_width=True)
-
-            with col2:
-                fig_half_centuries = px.bar(
-                    centuries_data,
-                    x='Player_Name',
-                    y='Half_Centuries',
-                    title="Most Half-Centuries",
-                    color='Half_Centuries'
-                )
-                st.plotly_chart(fig_half_centuries, use_container_width=True)
-        else:
-            st.info("No centuries or half-centuries data available for the selected filters.")
-    else:
-        st.warning("Centuries data not available.")
-
-with tab2:
+    col1, col2 = st.columns(2)
+    with col1:
+        has_centuries = render_chart("centuries")
+    with col2:
+        render_chart("half_centuries")
+    if not has_centuries:
+        st.info("No centuries or half-centuries data available for the selected filters.")
+
+elif view == VIEWS[1]:
     st.header("Top Wicket Takers")
 
-    # Aggregate wickets by player
-    wickets_by_player = filtered_df.groupby('Player_Name')['Wickets_Taken'].sum().reset_index()
-    wickets_by_player = wickets_by_player.sort_values('Wickets_Taken', ascending=False).head(15)
-
-    fig_wickets = px.bar(
-        wickets_by_player,
-        x='Wickets_Taken',
-        y='Player_Name',
-        orientation='h',
-        title="Top 15 Wicket Takers",
-        labels={'Wickets_Taken': 'Total Wickets', 'Player_Name': 'Player'}
-    )
-    fig_wickets.update_layout(height=600)
-    st.plotly_chart(fig_wickets, use_container_width=True)
+    render_chart("wickets_top15")
 
     # Bowling averages
-    bowling_avg_data = filtered_df[filtered_df['Wickets_Taken'] > 0].groupby('Player_Name').agg({
-        'Bowling_Average': 'mean',
-        'Wickets_Taken': 'sum'
-    }).reset_index()
-    bowling_avg_data = bowling_avg_data[bowling_avg_data['Wickets_Taken'] >= 10].sort_values('Bowling_Average').head(15)
-
-    fig_bowling_avg = px.bar(
-        bowling_avg_data,
-        x='Bowling_Average',
-        y='Player_Name',
-        orientation='h',
-        title="Best Bowling Averages (Min 10 wickets)",
-        labels={'Bowling_Average': 'Bowling Average', 'Player_Name': 'Player'}
-    )
-    st.plotly_chart(fig_bowling_avg, use_container_width=True)
-
-with tab3:
+    render_chart("bowling_averages")
+
+elif view == VIEWS[2]:
     st.header("Player Comparison")
 
     # Scatter plot: Batting Average vs Strike Rate
-    scatter_data = filtered_df[filtered_df['Runs_Scored'] > 100].copy()  # Players with significant runs
-
-    fig_scatter = px.scatter(
-        scatter_data,
-        x='Batting_Average',
-        y='Batting_Strike_Rate',
-        size='Runs_Scored',
-        color='Year',
-        hover_name='Player_Name',
-        title="Batting Average vs Strike Rate (Players with >100 runs)",
-        labels={
-            'Batting_Average': 'Batting Average',
-            'Batting_Strike_Rate': 'Strike Rate',
-            'Runs_Scored': 'Total Runs'
-        }
-    )
-    st.plotly_chart(fig_scatter, use_container_width=True)
+    render_chart("batting_scatter")
 
     # Season trends
     st.subheader("Season-wise Trends")
-    season_stats = filtered_df.groupby('Year').agg({
-        'Runs_Scored': 'sum',
-        'Wickets_Taken': 'sum',
-        'Batting_Average': 'mean',
-        'Bowling_Average': 'mean'
-    }).reset_index()
 
     col1, col2 = st.columns(2)
     with col1:
-        fig_runs_trend = px.line(
-            season_stats,
-            x='Year',
-            y='Runs_Scored',
-            title="Total Runs by Season",
-            markers=True
-        )
-        st.plotly_chart(fig_runs_trend, use_container_width=True)
+        render_chart("runs_trend")
 
     with col2:
-        fig_wickets_trend = px.line(
-            season_stats,
-            x='Year',
-            y='Wickets_Taken',
-            title="Total Wickets by Season",
-            markers=True
-        )
-        st.plotly_chart(fig_wickets_trend, use_container_width=True)
+        render_chart("wickets_trend")
 
-with tab4:
+elif view == VIEWS[3]:
     st.header("Individual Player Analysis")
 
     # Player selector
-    players = sorted(filtered_df['Player_Name'].unique())
+    players = load_player_names(stamp, years_key, player_search)
     selected_player = st.selectbox("Select Player", players)
 
     if selected_player:
-        player_data = filtered_df[filtered_df['Player_Name'] == selected_player]
+        player_data = load_player_rows(stamp, selected_player, years_key)
 
         # Player summary
         col1, col2, col3 = st.columns(3)
@@ -263,40 +226,28 @@ with tab4:
             seasons = len(player_data)
             st.metric("Seasons Played", seasons)
 
-        # Player career chart
-        fig_career = go.Figure()
-
-        fig_career.add_trace(go.Scatter(
-            x=player_data['Year'],
-            y=player_data['Runs_Scored'],
-            mode='lines+markers',
-            name='Runs Scored',
-            line=dict(color='blue')
-        ))
-
-        fig_career.add_trace(go.Scatter(
-            x=player_data['Year'],
-            y=player_data['Wickets_Taken'],
-            mode='lines+markers',
-            name='Wickets Taken',
-            line=dict(color='red'),
-            yaxis='y2'
-        ))
-
-        fig_career.update_layout(
-            title=f"{selected_player} - Career Performance",
-            xaxis=dict(title="Year"),
-            yaxis=dict(title="Runs Scored"),
-            yaxis2=dict(title="Wickets Taken", overlaying="y", side="right"),
-            height=400
-        )
+        # Career rates (all seasons, computed at load time)
+        career = load_player_career(stamp, selected_player)
+        if career:
+            career_metrics = [
+                ("Career Batting Average", career['Batting_Average']),
+                ("Career Strike Rate", career['Strike_Rate']),
+                ("Career Economy", career['Economy_Rate']),
+                ("Boundary %", career['Boundary_Percentage']),
+            ]
+            for col, (label, value) in zip(st.columns(4), career_metrics):
+                with col:
+                    st.metric(label, "–" if value is None else f"{value:.2f}")
 
-        st.plotly_chart(fig_career, use_container_width=True)
+        # Player career chart
+        render_chart(career_chart_id(selected_player))
 
         # Detailed stats table
         st.subheader("Season-wise Statistics")
         display_cols = ['Year', 'Matches_Batted', 'Runs_Scored', 'Batting_Average',
                        'Matches_Bowled', 'Wickets_Taken', 'Bowling_Average']
+        display_cols += [col for col in ['Runs_Scored_YoY', 'Rolling_Batting_Average',
+                                         'Rolling_Strike_Rate'] if col in player_data.columns]
         st.dataframe(player_data[display_cols].sort_values('Year', ascending=False))
 
 # Footer
@@ -5,8 +5,8 @@ REM This script activates the Python environment and runs the update
 echo Starting IPL Dashboard Update...
 echo %DATE% %TIME%
 
-REM Change to the IPL project directory
-cd /d "C:\Users\Ishwari\Desktop\ipl"
+REM Change to the IPL project directory (the folder holding this script)
+cd /d "%~dp0"
 
 REM Run the update script
 python scripts\update_data.py
@@ -5,8 +5,8 @@ Write-Host "Starting IPL Dashboard Update..." -ForegroundColor Green
 Write-Host "Time: $(Get-Date)" -ForegroundColor Yellow
 
 try {
-    # Change to the IPL project directory
-    Set-Location "C:\Users\Ishwari\Desktop\ipl"
+    # Change to the IPL project directory (the folder holding this script)
+    Set-Location $PSScriptRoot
 
     # Run the update script
     Write-Host "Running update script..." -ForegroundColor Cyan